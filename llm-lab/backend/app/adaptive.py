@@ -0,0 +1,245 @@
+"""
+Adaptive parameter search: spends a fixed budget of provider calls on the
+part of the temperature x top_p grid where overall_score is highest,
+instead of calling every combination.
+
+The search is a coarse-to-fine successive halving. It first evaluates an
+evenly spaced subset of the grid that uses about half the budget. Each
+following round keeps the best-scoring half of the previous round's
+survivors and evaluates their unexplored grid neighbours at the current
+spacing; when none are left the spacing is halved. It stops when the
+budget is spent or the survivors' neighbours at the finest spacing have
+all been evaluated.
+"""
+
+import os
+import math
+import asyncio
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+from dotenv import load_dotenv
+
+from app.llm_service import LLMService, GenerationResult
+from app.scoring import MetricsExecutor
+from app.blobs import score_contents
+
+load_dotenv()
+
+# Default budget as a share of the grid's provider calls
+ADAPTIVE_BUDGET_FRACTION = float(os.getenv("ADAPTIVE_BUDGET_FRACTION", "0.25"))
+
+# Grid position as (temperature index, top_p index)
+Position = Tuple[int, int]
+
+
+class ExploredPoint(NamedTuple):
+    """One evaluated combination; score is the mean overall_score of its samples"""
+    temperature: float
+    top_p: float
+    score: Optional[float]
+    round: int
+
+
+class SearchOutcome(NamedTuple):
+    """Scored results of every call made, in call order, and the points they cover"""
+    results: List[GenerationResult]
+    points: List[ExploredPoint]
+    best: Optional[ExploredPoint]
+    budget: int
+    grid_cells: int
+    rounds: int
+
+
+def default_budget(grid_cells: int, repetitions: int = 1) -> int:
+    calls = grid_cells * repetitions
+    return min(calls, max(4 * repetitions, math.ceil(calls * ADAPTIVE_BUDGET_FRACTION)))
+
+
+def validate_search(
+    temperature_range: List[float],
+    top_p_range: List[float],
+    budget: Optional[int],
+    repetitions: int = 1
+):
+    """Raise ValueError for a search with no grid or a budget too small for one cell"""
+    if not temperature_range or not top_p_range:
+        raise ValueError("Adaptive search needs at least one temperature and one top_p value")
+    if budget is not None and budget < repetitions:
+        raise ValueError(
+            f"Budget of {budget} calls is smaller than the {repetitions} repetitions of one combination"
+        )
+
+
+def _axis(size: int, step: int) -> List[int]:
+    """Indices every `step` apart, always including both ends"""
+    indices = list(range(0, size, step))
+    if indices[-1] != size - 1:
+        indices.append(size - 1)
+    return indices
+
+
+def _coarse_grid(rows: int, columns: int, limit: int) -> Tuple[List[Position], int]:
+    """The densest evenly spaced subset with at most `limit` points, and its spacing"""
+    step = 1
+    while len(_axis(rows, step)) * len(_axis(columns, step)) > limit and step < max(rows, columns):
+        step += 1
+    return [(i, j) for i in _axis(rows, step) for j in _axis(columns, step)], step
+
+
+def _neighbours(position: Position, step: int, rows: int, columns: int) -> List[Position]:
+    i, j = position
+    found = []
+    for di in (-step, 0, step):
+        for dj in (-step, 0, step):
+            neighbour = (min(max(i + di, 0), rows - 1), min(max(j + dj, 0), columns - 1))
+            if neighbour != position and neighbour not in found:
+                found.append(neighbour)
+    return found
+
+
+class AdaptiveSearch:
+    """Runs adaptive searches through an LLMService, scoring every sample"""
+
+    def __init__(self, llm_service: LLMService, metrics_executor: MetricsExecutor):
+        self.llm_service = llm_service
+        self.metrics_executor = metrics_executor
+
+    async def _evaluate(
+        self,
+        prompt: str,
+        model: str,
+        cells: List[Tuple[float, float]],
+        repetitions: int,
+        cache_stochastic: bool,
+        stream: bool,
+        queue_key: object,
+        remaining: Optional[float],
+        timeout: Optional[float]
+    ) -> List[List[GenerationResult]]:
+        """Generate and score the samples of each cell; cells past the deadline come back as errors"""
+        tasks = [
+            asyncio.ensure_future(self.llm_service.generate_cell_samples(
+                prompt, model, temperature, top_p, repetitions, queue_key, cache_stochastic, stream
+            ))
+            for temperature, top_p in cells
+        ]
+        done, pending = await asyncio.wait(tasks, timeout=remaining)
+        for task in pending:
+            task.cancel()
+        error = f"Error: sweep deadline of {timeout:g}s exceeded" if timeout is not None else ""
+        samples = [
+            task.result() if task in done else [GenerationResult(*cell, error, error=True)] * repetitions
+            for task, cell in zip(tasks, cells)
+        ]
+
+        flat = [result for cell_samples in samples for result in cell_samples]
+        unscored = [result for result in flat if result.metrics is None and not result.error]
+        scores = iter(await score_contents(self.metrics_executor, [result.content for result in unscored]))
+        return [
+            [
+                result._replace(metrics=next(scores)) if result.metrics is None and not result.error else result
+                for result in cell_samples
+            ]
+            for cell_samples in samples
+        ]
+
+    async def run(
+        self,
+        prompt: str,
+        model: str,
+        temperature_range: List[float],
+        top_p_range: List[float],
+        budget: Optional[int] = None,
+        repetitions: int = 1,
+        cache_stochastic: bool = False,
+        timeout: Optional[float] = None,
+        stream: bool = False
+    ) -> SearchOutcome:
+        """
+        Search the grid spanned by the two ranges within `budget` provider
+        calls (samples), defaulting to ADAPTIVE_BUDGET_FRACTION of the grid.
+        Failed samples count against the budget and are left out of scores.
+        Raises ValueError for inputs rejected by validate_search.
+        """
+        validate_search(temperature_range, top_p_range, budget, repetitions)
+        temperatures = sorted(set(temperature_range))
+        top_ps = sorted(set(top_p_range))
+        rows, columns = len(temperatures), len(top_ps)
+        grid_cells = rows * columns
+        budget = min(budget or default_budget(grid_cells, repetitions), grid_cells * repetitions)
+        # Whole cells only, so the search never makes more calls than the budget
+        cells_left = budget // repetitions
+
+        loop = asyncio.get_running_loop()
+        timeout = timeout if timeout is not None else self.llm_service.resilience.sweep_timeout
+        deadline = loop.time() + timeout if timeout is not None else None
+        queue_key = object()
+
+        results: List[GenerationResult] = []
+        scores: Dict[Position, Optional[float]] = {}
+        points: List[ExploredPoint] = []
+        candidates, step = _coarse_grid(rows, columns, max(1, cells_left // 2))
+        keep = max(1, math.ceil(len(candidates) / 2))
+        rounds = 0
+
+        while candidates and cells_left > 0:
+            remaining = deadline - loop.time() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                break
+            batch = candidates[:cells_left]
+            cells_left -= len(batch)
+            rounds += 1
+            evaluated = await self._evaluate(
+                prompt, model, [(temperatures[i], top_ps[j]) for i, j in batch],
+                repetitions, cache_stochastic, stream, queue_key, remaining, timeout
+            )
+            for position, cell_samples in zip(batch, evaluated):
+                results.extend(cell_samples)
+                sample_scores = [
+                    result.metrics["overall_score"] for result in cell_samples if not result.error
+                ]
+                scores[position] = sum(sample_scores) / len(sample_scores) if sample_scores else None
+                points.append(ExploredPoint(
+                    temperatures[position[0]], top_ps[position[1]], scores[position], rounds
+                ))
+
+            ranked = sorted(
+                (position for position, score in scores.items() if score is not None),
+                key=lambda position: scores[position],
+                reverse=True
+            )
+            survivors = ranked[:keep]
+            keep = max(1, keep // 2)
+            explored: Set[Position] = set(scores)
+            while True:
+                candidates = list(dict.fromkeys(
+                    neighbour
+                    for position in survivors
+                    for neighbour in _neighbours(position, step, rows, columns)
+                    if neighbour not in explored
+                ))
+                if candidates or step == 1:
+                    break
+                step = max(1, step // 2)
+
+        scored = [point for point in points if point.score is not None]
+        best = max(scored, key=lambda point: point.score) if scored else None
+        return SearchOutcome(results, points, best, budget, grid_cells, rounds)
+
+
+def summarize(outcome: SearchOutcome) -> Dict[str, Any]:
+    """Fields of the API's SearchSummary"""
+    best = outcome.best
+    return {
+        "strategy": "successive_halving",
+        "budget": outcome.budget,
+        "calls": len(outcome.results),
+        "grid_cells": outcome.grid_cells,
+        "rounds": outcome.rounds,
+        "best_temperature": best.temperature if best else None,
+        "best_top_p": best.top_p if best else None,
+        "best_overall_score": best.score if best else None,
+        "points": [
+            {"temperature": point.temperature, "top_p": point.top_p, "overall_score": point.score, "round": point.round}
+            for point in outcome.points
+        ],
+    }
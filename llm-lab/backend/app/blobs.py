@@ -0,0 +1,108 @@
+"""
+Content-addressed storage of response text.
+
+Each distinct response text is stored once in response_blobs, zlib
+compressed and keyed by its SHA-256; responses refer to it by hash. The
+blob also keeps the text's scores, so identical responses (common at low
+temperature) are scored once.
+"""
+
+import os
+import zlib
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import select, insert, delete, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+
+from app.database import AsyncSessionLocal
+from app.models import Response, ResponseBlob
+from app.scoring import MetricsExecutor
+from app.instrumentation import SCORE_CACHE_REQUESTS
+
+load_dotenv()
+
+COMPRESSION_LEVEL = int(os.getenv("BLOB_COMPRESSION_LEVEL", "6"))
+
+# A response text to store and its scores, if already computed
+Content = Tuple[str, Optional[Dict[str, Any]]]
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def decompress(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def new_blobs(contents: Iterable[Content], existing: Set[str]) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Hash each text; returns the hashes in input order and rows for blobs not in `existing`"""
+    hashes = []
+    rows: Dict[str, Dict[str, Any]] = {}
+    for text, metrics in contents:
+        digest = content_hash(text)
+        hashes.append(digest)
+        if digest not in existing and digest not in rows:
+            encoded = text.encode("utf-8")
+            rows[digest] = {
+                "hash": digest,
+                "data": zlib.compress(encoded, COMPRESSION_LEVEL),
+                "size": len(encoded),
+                "metrics": metrics,
+            }
+    return hashes, list(rows.values())
+
+
+async def store_contents(session: AsyncSession, contents: List[Content]) -> List[str]:
+    """
+    Store the texts that are not stored yet and return every text's hash,
+    in input order. Runs on the writer, so no other transaction can insert
+    the same blob in between. The caller owns the transaction.
+    """
+    hashes = {content_hash(text) for text, _ in contents}
+    result = await session.execute(select(ResponseBlob.hash).where(ResponseBlob.hash.in_(hashes)))
+    ordered, rows = new_blobs(contents, set(result.scalars()))
+    if rows:
+        await session.execute(insert(ResponseBlob), rows)
+    return ordered
+
+
+async def delete_unreferenced(session: AsyncSession, hashes: Iterable[str]) -> List[Tuple[Optional[int], bytes]]:
+    """
+    Delete the given blobs that no response refers to any more; returns the
+    (search_id, data) of each deleted blob
+    """
+    hashes = set(hashes)
+    if not hashes:
+        return []
+    result = await session.execute(
+        delete(ResponseBlob)
+        .where(
+            ResponseBlob.hash.in_(hashes),
+            ~exists().where(Response.content_hash == ResponseBlob.hash)
+        )
+        .returning(ResponseBlob.search_id, ResponseBlob.data)
+    )
+    return [tuple(row) for row in result]
+
+
+async def score_contents(metrics_executor: MetricsExecutor, contents: List[str]) -> List[Dict[str, Any]]:
+    """
+    Scores of each text. Texts stored before reuse the scores kept with
+    their blob, and repeated texts in the batch are scored once.
+    """
+    hashes = [content_hash(text) for text in contents]
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(ResponseBlob.hash, ResponseBlob.metrics)
+            .where(ResponseBlob.hash.in_(set(hashes)), ResponseBlob.metrics.isnot(None))
+        )
+        scores = {row.hash: row.metrics for row in result}
+
+    missing = {digest: text for digest, text in zip(hashes, contents) if digest not in scores}
+    SCORE_CACHE_REQUESTS.inc(len(contents) - len(missing), result="hit")
+    SCORE_CACHE_REQUESTS.inc(len(missing), result="miss")
+    for digest, metrics in zip(missing, await metrics_executor.score(list(missing.values()))):
+        scores[digest] = metrics
+    return [dict(scores[digest]) for digest in hashes]
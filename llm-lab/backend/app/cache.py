@@ -0,0 +1,255 @@
+"""
+Response cache for LLM calls, keyed on prompt, model and sampling parameters
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
+import threading
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt so trivially different spellings share a cache entry"""
+    return unicodedata.normalize("NFC", prompt).replace("\r\n", "\n").strip()
+
+
+def cache_key(prompt: str, model: str, temperature: float, top_p: float, max_tokens: int) -> str:
+    """Hash of the normalized prompt, model and sampling parameters"""
+    payload = json.dumps(
+        [normalize_prompt(prompt), model, float(temperature), float(top_p), max_tokens],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def should_cache(temperature: float, cache_stochastic: bool = False) -> bool:
+    """Deterministic calls are always cached; stochastic ones only on opt-in"""
+    return temperature == 0 or cache_stochastic
+
+
+class ResponseCache(ABC):
+    """Base class for response caches"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """Cached value for the key, or None on a miss"""
+
+    @abstractmethod
+    async def set(self, key: str, value: str):
+        """Store a value under the key"""
+
+    def close(self):
+        """Release any resources held by the cache"""
+
+    def _record(self, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class MemoryCache(ResponseCache):
+    """In-process LRU cache with a per-entry time to live"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self.expirations = 0
+        self.memory_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+    @staticmethod
+    def _size(key: str, value: str) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(value)
+
+    def _remove(self, key: str):
+        value, _ = self._entries.pop(key)
+        self.memory_bytes -= self._size(key, value)
+
+    def get_sync(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set_sync(self, key: str, value: str):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self.memory_bytes += self._size(key, value)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._record(self.get_sync(key))
+
+    async def set(self, key: str, value: str):
+        self.set_sync(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "memory_bytes": self.memory_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SQLiteCache(ResponseCache):
+    """On-disk cache stored in a SQLite file, queried off the event loop"""
+
+    # Expired rows are pruned once every this many writes
+    PRUNE_INTERVAL = 256
+
+    def __init__(self, path: str, ttl_seconds: float = 86400):
+        super().__init__()
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        # Row count kept up to date by set_sync, so stats never query the file
+        self.entries = self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+    def get_sync(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM response_cache WHERE key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl_seconds)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_sync(self, key: str, value: str):
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM response_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+            self._writes += 1
+            if not exists:
+                self.entries += 1
+            if self._writes % self.PRUNE_INTERVAL == 0:
+                cursor = self._conn.execute(
+                    "DELETE FROM response_cache WHERE created_at < ?",
+                    (time.time() - self.ttl_seconds,)
+                )
+                self.evictions += cursor.rowcount
+                self.entries -= cursor.rowcount
+            self._conn.commit()
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._record(await asyncio.to_thread(self.get_sync, key))
+
+    async def set(self, key: str, value: str):
+        await asyncio.to_thread(self.set_sync, key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "backend": "sqlite",
+            "entries": self.entries,
+            "disk_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache(ResponseCache):
+    """Memory cache in front of an on-disk cache; disk hits are promoted"""
+
+    def __init__(self, memory: MemoryCache, disk: SQLiteCache):
+        super().__init__()
+        self.memory = memory
+        self.disk = disk
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.memory.get(key)
+        if value is None:
+            value = await self.disk.get(key)
+            if value is not None:
+                self.memory.set_sync(key, value)
+        return self._record(value)
+
+    async def set(self, key: str, value: str):
+        self.memory.set_sync(key, value)
+        await self.disk.set(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "backend": "tiered",
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats(),
+        }
+
+    def close(self):
+        self.disk.close()
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """
+    Build the response cache from RESPONSE_CACHE (memory | sqlite | off),
+    RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL and RESPONSE_CACHE_PATH
+    """
+    backend = os.getenv("RESPONSE_CACHE", "memory").lower()
+    if backend in ("off", "none", ""):
+        return None
+
+    ttl = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+    memory = MemoryCache(
+        max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024")),
+        ttl_seconds=ttl
+    )
+    if backend == "memory":
+        return memory
+    if backend == "sqlite":
+        disk = SQLiteCache(os.getenv("RESPONSE_CACHE_PATH", "response_cache.db"), ttl_seconds=ttl)
+        return TieredCache(memory, disk)
+    raise ValueError(f"Unknown response cache backend '{backend}'")
@@ -1,48 +1,137 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.pool import StaticPool
-
-# Use in-memory SQLite database with StaticPool to ensure the same connection
-# is reused across async calls (prevents "database table is locked" issues)
-DATABASE_URL = "sqlite+aiosqlite:///:memory:"
-
-# Create async engine with StaticPool for in-memory database
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool
-)
+from sqlalchemy.pool import StaticPool, AsyncAdaptedQueuePool
+from dotenv import load_dotenv
+
+from app.instrumentation import instrument_engine
+
+load_dotenv()
+
+# File-backed SQLite by default; any SQLAlchemy async URL can be configured
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./llm_lab.db")
+DATABASE_ECHO = os.getenv("DATABASE_ECHO", "false").lower() == "true"
+READ_POOL_SIZE = int(os.getenv("DATABASE_READ_POOL_SIZE", "4"))
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+IS_MEMORY = IS_SQLITE and ":memory:" in DATABASE_URL
+
+# SQLite tuning: WAL lets readers run alongside the writer, NORMAL sync is
+# durable under WAL except for the last transactions on power loss
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negative values are in KiB
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", str(-64 * 1024))),
+    "busy_timeout": 5000,
+    "foreign_keys": "ON",
+    "temp_store": "MEMORY",
+}
+
+
+def _apply_pragmas(engine, read_only: bool = False):
+    """Apply SQLite pragmas to every new connection of an engine"""
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+if IS_MEMORY:
+    # An in-memory database only exists on one connection, so readers and
+    # the writer share it
+    engine = create_async_engine(
+        DATABASE_URL,
+        echo=DATABASE_ECHO,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    write_engine = engine
+elif IS_SQLITE:
+    # Pool of reader connections
+    engine = create_async_engine(
+        DATABASE_URL,
+        echo=DATABASE_ECHO,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=READ_POOL_SIZE,
+        max_overflow=0
+    )
+    _apply_pragmas(engine, read_only=True)
 
-# Create session factory
+    # SQLite allows one writer at a time; a single dedicated connection
+    # avoids "database is locked" contention between writers
+    write_engine = create_async_engine(
+        DATABASE_URL,
+        echo=DATABASE_ECHO,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0
+    )
+    _apply_pragmas(write_engine)
+else:
+    engine = create_async_engine(DATABASE_URL, echo=DATABASE_ECHO, pool_pre_ping=True)
+    write_engine = engine
+
+# Statement timings for /metrics
+instrument_engine(engine)
+if write_engine is not engine:
+    instrument_engine(write_engine)
+
+# Create session factories
 AsyncSessionLocal = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
+WriteSessionLocal = async_sessionmaker(
+    write_engine, class_=AsyncSession, expire_on_commit=False
+)
 
 # Base class for models
 Base = declarative_base()
 
-# Flag to track if tables have been initialized
-_tables_initialized = False
+# Serializes write transactions on the single writer connection
+_write_lock = asyncio.Lock()
+
+
+async def init_db():
+    """Create database tables and apply migrations (called once at application startup)"""
+    from app.migrations import run_migrations
 
+    async with write_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
 
-async def _initialize_tables():
-    """Initialize database tables on first use"""
-    global _tables_initialized
-    if not _tables_initialized:
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        _tables_initialized = True
+
+async def close_db():
+    """Dispose of all database connections"""
+    await engine.dispose()
+    if write_engine is not engine:
+        await write_engine.dispose()
+
+
+@asynccontextmanager
+async def write_session():
+    """Session on the serialized writer connection"""
+    async with _write_lock:
+        async with WriteSessionLocal() as session:
+            yield session
 
 
 async def get_db():
-    """Dependency for getting database session"""
-    # Initialize tables on first session request
-    await _initialize_tables()
+    """Dependency for getting a read session"""
     async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+        yield session
 
 
+async def get_write_db():
+    """Dependency for getting a session on the serialized writer"""
+    async with write_session() as session:
+        yield session
@@ -0,0 +1,137 @@
+"""
+Streaming export of experiments as CSV, NDJSON or JSON, optionally gzipped
+"""
+
+import io
+import csv
+import json
+import zlib
+from typing import AsyncIterator, Dict, Any, List
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models import Experiment, Response, ResponseBlob
+from app.blobs import decompress
+from app.metrics import METRIC_NAMES
+
+# Column order for exported rows; metric columns are fixed so every export
+# has the same header regardless of which metrics a row stored
+EXPORT_COLUMNS = [
+    "experiment_id",
+    "prompt",
+    "temperature",
+    "top_p",
+    "model",
+    "content",
+    "created_at",
+] + [f"metric_{name}" for name in METRIC_NAMES]
+
+# Rows fetched per cursor round-trip and rows per emitted chunk
+EXPORT_BATCH_ROWS = 500
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+async def iter_export_rows(experiment_ids: List[int]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Walk responses for the given experiments with a server-side cursor,
+    ordered by experiment, yielding one flat row per response.
+    """
+    # The request's session is closed before a streaming body is sent,
+    # so the cursor gets its own session
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            select(
+                Response.experiment_id,
+                Experiment.prompt,
+                Response.temperature,
+                Response.top_p,
+                Response.model,
+                ResponseBlob.data,
+                Response.created_at,
+                *(getattr(Response, name) for name in METRIC_NAMES)
+            )
+            .join(Experiment, Response.experiment_id == Experiment.id)
+            .join(ResponseBlob, Response.content_hash == ResponseBlob.hash)
+            .where(Response.experiment_id.in_(experiment_ids))
+            .order_by(Response.experiment_id, Response.id)
+            .execution_options(yield_per=EXPORT_BATCH_ROWS)
+        )
+        async for row in result:
+            yield {
+                "experiment_id": row.experiment_id,
+                "prompt": row.prompt,
+                "temperature": row.temperature,
+                "top_p": row.top_p,
+                "model": row.model,
+                "content": decompress(row.data),
+                "created_at": row.created_at.isoformat(),
+                **{f"metric_{name}": getattr(row, name) for name in METRIC_NAMES}
+            }
+
+
+async def encode_csv(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Encode rows as CSV with a stable header, in chunks of EXPORT_BATCH_ROWS"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    async for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % EXPORT_BATCH_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _json_row(row: Dict[str, Any]) -> str:
+    return json.dumps({column: row.get(column) for column in EXPORT_COLUMNS})
+
+
+async def encode_ndjson(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Encode rows as newline-delimited JSON, in chunks of EXPORT_BATCH_ROWS"""
+    lines = []
+    async for row in rows:
+        lines.append(_json_row(row) + "\n")
+        if len(lines) == EXPORT_BATCH_ROWS:
+            yield "".join(lines)
+            lines = []
+    yield "".join(lines)
+
+
+async def encode_json(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Encode rows as {"format": "json", "data": [...]}, written incrementally"""
+    yield '{"format": "json", "data": ['
+    items = []
+    separator = ""
+    async for row in rows:
+        items.append(separator + _json_row(row))
+        separator = ","
+        if len(items) == EXPORT_BATCH_ROWS:
+            yield "".join(items)
+            items = []
+    yield "".join(items) + "]}"
+
+
+ENCODERS = {
+    "csv": encode_csv,
+    "ndjson": encode_ndjson,
+    "json": encode_json,
+}
+
+
+async def gzip_stream(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Gzip a text stream on the fly"""
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
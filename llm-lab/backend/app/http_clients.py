@@ -0,0 +1,56 @@
+"""
+Pooled HTTP transports for the LLM provider SDKs
+"""
+
+import os
+import asyncio
+import importlib.util
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# HTTP/2 multiplexes a whole grid over a few connections; it needs the h2
+# package (httpx[http2]) and falls back to HTTP/1.1 without it
+PROVIDER_HTTP2 = os.getenv("PROVIDER_HTTP2", "true").lower() == "true"
+PROVIDER_KEEPALIVE_EXPIRY = float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY", "120"))
+
+# Connections opened per provider at startup (0 disables warm-up)
+PROVIDER_WARMUP_CONNECTIONS = int(os.getenv("PROVIDER_WARMUP_CONNECTIONS", "0"))
+
+
+def http2_enabled() -> bool:
+    return PROVIDER_HTTP2 and importlib.util.find_spec("h2") is not None
+
+
+def create_http_client(max_connections: int) -> httpx.AsyncClient:
+    """
+    Client whose pool holds max_connections open between calls, so a sweep
+    that runs that many cells at once reuses connections instead of
+    handshaking for each cell
+    """
+    return httpx.AsyncClient(
+        http2=http2_enabled(),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=PROVIDER_KEEPALIVE_EXPIRY
+        ),
+        follow_redirects=True
+    )
+
+
+async def warm_up(client: httpx.AsyncClient, base_url: str, connections: int) -> int:
+    """
+    Open up to `connections` pooled connections to base_url by sending
+    concurrent HEAD requests. The status code does not matter, only the
+    connection and TLS session left in the pool. Returns how many succeeded.
+    """
+    if http2_enabled():
+        # Concurrent requests share one multiplexed connection
+        connections = min(connections, 1)
+    results = await asyncio.gather(
+        *(client.head(base_url) for _ in range(connections)),
+        return_exceptions=True
+    )
+    return sum(1 for result in results if not isinstance(result, Exception))
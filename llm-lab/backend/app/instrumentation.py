@@ -0,0 +1,332 @@
+"""
+In-process counters, gauges and histograms, exposed in the Prometheus text
+format on /metrics
+"""
+
+import time
+import bisect
+import threading
+import contextvars
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app import profiling
+
+# Latency buckets in seconds, from sub-millisecond DB queries to slow
+# provider calls
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# Output tokens per second of streamed calls
+TOKEN_RATE_BUCKETS = (5, 10, 20, 40, 60, 80, 120, 160, 240, 320, 640)
+
+# Cells per sweep
+GRID_BUCKETS = (1, 2, 4, 9, 16, 25, 36, 50, 100, 200, 400)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> Iterable[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down"""
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: Any):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last is +Inf), sum, count]
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, count: int = 1, **labels: Any):
+        """Record value; count > 1 records it that many times (e.g. a batch average)"""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += count
+            state[1] += value * count
+            state[2] += count
+
+    def time(self, **labels: Any) -> "_Timer":
+        """Context manager observing the duration of its block"""
+        return _Timer(self, labels)
+
+    def _samples(self) -> Iterable[str]:
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                yield f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.label_names, key)} {count}"
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+class Registry:
+    """Metrics rendered together; collectors refresh gauges just before rendering"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+PROVIDER_CALL_SECONDS = REGISTRY.register(Histogram(
+    "llm_lab_provider_call_seconds",
+    "Provider call attempts by provider, model and outcome (success, error, timeout)",
+    ["provider", "model", "outcome"]
+))
+PROVIDER_TTFT_SECONDS = REGISTRY.register(Histogram(
+    "llm_lab_provider_ttft_seconds",
+    "Time to first token of streamed provider calls",
+    ["provider", "model"]
+))
+PROVIDER_TOKENS_PER_SECOND = REGISTRY.register(Histogram(
+    "llm_lab_provider_tokens_per_second",
+    "Decode rate of streamed provider calls after the first token",
+    ["provider", "model"],
+    buckets=TOKEN_RATE_BUCKETS
+))
+PROVIDER_QUEUE_SECONDS = REGISTRY.register(Histogram(
+    "llm_lab_provider_queue_seconds",
+    "Time provider calls waited for a scheduler slot",
+    ["provider"]
+))
+PROVIDER_IN_FLIGHT = REGISTRY.register(Gauge(
+    "llm_lab_provider_in_flight",
+    "Provider calls currently running",
+    ["provider"]
+))
+SCORING_SECONDS = REGISTRY.register(Histogram(
+    "llm_lab_scoring_seconds",
+    "Metric scoring time per response, averaged over each scored batch",
+    ["executor"]
+))
+DB_QUERY_SECONDS = REGISTRY.register(Histogram(
+    "llm_lab_db_query_seconds",
+    "Database statement time by the API endpoint that issued it (background for workers)",
+    ["endpoint"]
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "llm_lab_http_request_seconds",
+    "API request time by method, endpoint and status code",
+    ["method", "endpoint", "status"]
+))
+GRID_CELLS = REGISTRY.register(Histogram(
+    "llm_lab_grid_cells",
+    "Parameter combinations per generated sweep",
+    buckets=GRID_BUCKETS
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "llm_lab_cache_requests_total",
+    "Response cache lookups by result (hit or miss)",
+    ["result"]
+))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    "llm_lab_cache_hit_ratio",
+    "Share of response cache lookups served from the cache since startup"
+))
+COALESCED_CALLS = REGISTRY.register(Counter(
+    "llm_lab_coalesced_calls_total",
+    "Cell requests served by joining an identical in-flight provider call"
+))
+SCORE_CACHE_REQUESTS = REGISTRY.register(Counter(
+    "llm_lab_score_cache_requests_total",
+    "Responses scored (miss) or reusing the scores of identical stored text (hit)",
+    ["result"]
+))
+
+
+def _update_cache_hit_ratio():
+    hits = CACHE_REQUESTS.value(result="hit")
+    lookups = hits + CACHE_REQUESTS.value(result="miss")
+    CACHE_HIT_RATIO.set(hits / lookups if lookups else 0.0)
+
+
+REGISTRY.add_collector(_update_cache_hit_ratio)
+
+
+# ASGI scope of the request being handled, for labelling work it causes
+current_scope: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "current_scope", default=None
+)
+
+_route_paths: Dict[Any, str] = {}
+
+
+def endpoint_label(scope: Optional[Dict[str, Any]]) -> str:
+    """Route template of a request ("/api/experiments/{experiment_id}"), bounded in cardinality"""
+    if scope is None:
+        return "background"
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if endpoint not in _route_paths:
+        for route in scope["app"].routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                _route_paths[endpoint] = route.path
+                break
+        else:
+            _route_paths[endpoint] = getattr(endpoint, "__name__", "unknown")
+    return _route_paths[endpoint]
+
+
+class InstrumentationMiddleware:
+    """Times each HTTP request and makes its scope available to DB query timing"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        token = current_scope.set(scope)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_scope.reset(token)
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                endpoint=endpoint_label(scope),
+                status=status["code"]
+            )
+
+
+def instrument_engine(engine):
+    """Time every statement an async engine runs, labelled by endpoint"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERY_SECONDS.observe(elapsed, endpoint=endpoint_label(current_scope.get()))
+        profiling.record("db", elapsed)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute
+        if context.connection is not None and context.connection.info.get("query_started"):
+            context.connection.info["query_started"].pop()
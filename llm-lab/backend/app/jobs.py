@@ -0,0 +1,467 @@
+"""
+Background jobs for large parameter sweeps, queued in the database.
+
+A job is one row in jobs plus one job_cells row per (prompt, temperature,
+top_p) call. Workers claim pending cells, generate and score them through
+LLMService, and persist each response as soon as it finishes.
+
+A claim is a lease: the worker extends it while the cell runs, and cells
+whose lease expired (their process stopped or hung) are requeued when
+workers look for work. Runners in several processes can therefore share
+the queue without re-issuing each other's calls, and a restarted job only
+issues the calls it had not completed.
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+from sqlalchemy import select, update, insert, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+
+from app.database import write_session
+from app.models import Experiment, Response, Job, JobCell
+from app.llm_service import LLMService
+from app.scoring import MetricsExecutor
+from app.blobs import store_contents, score_contents
+from app.search import index_contents
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Concurrent cells across all jobs, and how often idle workers look for work
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+
+# Seconds a claimed cell stays reserved without a renewal; leases are
+# renewed every third of this while the cell runs
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+# Claims after which a cell whose result cannot be saved is failed
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# Job states in which cells are still being worked on
+ACTIVE_JOB_STATES = ("queued", "running")
+
+
+async def create_job(
+    session: AsyncSession,
+    prompts: List[str],
+    model: str,
+    temperature_range: List[float],
+    top_p_range: List[float],
+    cache_stochastic: bool = False
+) -> int:
+    """
+    Insert a job, one experiment per prompt and one pending cell per grid
+    combination. The caller owns the transaction.
+    """
+    temperatures = list(dict.fromkeys(temperature_range))
+    top_ps = list(dict.fromkeys(top_p_range))
+    created_at = datetime.utcnow()
+
+    result = await session.execute(
+        insert(Job).returning(Job.id),
+        [{
+            "status": "queued",
+            "params": {"model": model, "cache_stochastic": cache_stochastic},
+            "total_cells": len(prompts) * len(temperatures) * len(top_ps),
+            "created_at": created_at,
+        }]
+    )
+    job_id = result.scalar_one()
+
+    result = await session.execute(
+        insert(Experiment).returning(Experiment.id, sort_by_parameter_order=True),
+        [{"prompt": prompt, "created_at": created_at, "response_count": 0} for prompt in prompts]
+    )
+    experiment_ids = list(result.scalars())
+
+    await session.execute(
+        insert(JobCell),
+        [
+            {
+                "job_id": job_id,
+                "experiment_id": experiment_id,
+                "temperature": temp,
+                "top_p": top_p,
+                "status": "pending",
+            }
+            for experiment_id in experiment_ids
+            for temp in temperatures
+            for top_p in top_ps
+        ]
+    )
+    return job_id
+
+
+async def finish_if_done(session: AsyncSession, job_id: int):
+    """Mark an active job completed once none of its cells are left to run"""
+    remaining = select(JobCell.id).where(
+        JobCell.job_id == job_id, JobCell.status.in_(("pending", "running"))
+    ).exists()
+    await session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status.in_(ACTIVE_JOB_STATES), ~remaining)
+        .values(status="completed", finished_at=datetime.utcnow())
+    )
+
+
+async def cancel_job(session: AsyncSession, job_id: int) -> bool:
+    """Stop handing out a job's pending cells; cells already running finish"""
+    result = await session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status.in_(ACTIVE_JOB_STATES))
+        .values(status="cancelled", finished_at=datetime.utcnow())
+    )
+    await session.execute(
+        update(JobCell)
+        .where(JobCell.job_id == job_id, JobCell.status == "pending")
+        .values(status="cancelled")
+    )
+    return result.rowcount > 0
+
+
+async def job_status(session: AsyncSession, job_id: int) -> Optional[Dict[str, Any]]:
+    """Progress of one job, or None if it does not exist"""
+    job = (await session.execute(select(Job).where(Job.id == job_id))).scalar_one_or_none()
+    if job is None:
+        return None
+
+    result = await session.execute(
+        select(JobCell.status, func.count(JobCell.id))
+        .where(JobCell.job_id == job_id)
+        .group_by(JobCell.status)
+    )
+    cells = dict(result.all())
+    result = await session.execute(
+        select(JobCell.experiment_id)
+        .where(JobCell.job_id == job_id)
+        .group_by(JobCell.experiment_id)
+        .order_by(JobCell.experiment_id)
+    )
+
+    finished = job.completed_cells + job.failed_cells
+    # Cancelled cells will never run, so they do not count towards progress
+    cancelled = cells.get("cancelled", 0)
+    runnable = job.total_cells - cancelled
+    return {
+        "id": job.id,
+        "status": job.status,
+        "model": job.params.get("model"),
+        "total_cells": job.total_cells,
+        "completed_cells": job.completed_cells,
+        "failed_cells": job.failed_cells,
+        "pending_cells": cells.get("pending", 0),
+        "running_cells": cells.get("running", 0),
+        "cancelled_cells": cancelled,
+        "progress": round(finished / runnable, 4) if runnable else 1.0,
+        "experiment_ids": list(result.scalars()),
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+class JobRunner:
+    """
+    Pool of async workers draining the job_cells queue.
+
+    Claims and completions are short transactions on the serialized writer
+    connection; provider calls and scoring run outside them. A claim is
+    identified by the cell's attempts count, so a worker whose lease expired
+    and was taken over cannot complete or release the new claim.
+    """
+
+    def __init__(
+        self,
+        llm_service: LLMService,
+        metrics_executor: MetricsExecutor,
+        workers: int = JOB_WORKERS,
+        poll_interval: float = JOB_POLL_INTERVAL,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS
+    ):
+        self.llm_service = llm_service
+        self.metrics_executor = metrics_executor
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.completed = 0
+        self.failed = 0
+        self.reclaimed = 0
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        # Cells claimed by this runner's workers
+        self._running: Dict[int, Dict[str, Any]] = {}
+
+    async def start(self):
+        """Start the workers; abandoned cells are requeued once their lease expires"""
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Stop the workers and hand the cells they were running back to the queue"""
+        # Taken before cancelling, since cancelled workers forget their cells
+        running = list(self._running.values())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        for cell in running:
+            try:
+                await self._release(cell, requeue=True)
+            except Exception:
+                logger.exception("Releasing job cell %d failed; it is requeued when its lease expires", cell["id"])
+
+    def notify(self):
+        """Wake idle workers after new cells were queued"""
+        self._wakeup.set()
+
+    def _lease_expiry(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+
+    @staticmethod
+    def _claimed(cell: Dict[str, Any]):
+        """Conditions matching a cell only while it is held by this claim"""
+        return (
+            JobCell.id == cell["id"],
+            JobCell.status == "running",
+            JobCell.attempts == cell["attempts"],
+        )
+
+    async def _worker(self):
+        while True:
+            # Cleared before claiming so a notify() during the claim is not lost
+            self._wakeup.clear()
+            try:
+                cell = await self._claim()
+            except Exception:
+                logger.exception("Claiming a job cell failed")
+                cell = None
+            if cell is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(cell)
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Requeue running cells whose lease expired, then take the oldest
+        pending cell of an active job and lease it
+        """
+        now = datetime.utcnow()
+        next_cell = (
+            select(JobCell.id)
+            .where(JobCell.status == "pending")
+            .order_by(JobCell.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        async with write_session() as session:
+            # Cells claimed before leases existed have no expiry
+            result = await session.execute(
+                update(JobCell)
+                .where(
+                    JobCell.status == "running",
+                    or_(JobCell.lease_expires_at.is_(None), JobCell.lease_expires_at < now)
+                )
+                .values(status="pending", lease_expires_at=None)
+            )
+            reclaimed = result.rowcount
+
+            result = await session.execute(
+                update(JobCell)
+                .where(JobCell.id == next_cell, JobCell.status == "pending")
+                .values(
+                    status="running",
+                    claimed_at=now,
+                    lease_expires_at=self._lease_expiry(),
+                    attempts=JobCell.attempts + 1
+                )
+                .returning(
+                    JobCell.id,
+                    JobCell.job_id,
+                    JobCell.experiment_id,
+                    JobCell.temperature,
+                    JobCell.top_p,
+                    JobCell.attempts
+                )
+            )
+            claimed = result.first()
+            if claimed is None:
+                await session.commit()
+                self._reclaimed(reclaimed)
+                return None
+
+            await session.execute(
+                update(Job)
+                .where(Job.id == claimed.job_id, Job.status == "queued")
+                .values(status="running", started_at=now)
+            )
+            result = await session.execute(
+                select(Experiment.prompt, Job.params)
+                .join(JobCell, JobCell.experiment_id == Experiment.id)
+                .join(Job, Job.id == JobCell.job_id)
+                .where(JobCell.id == claimed.id)
+            )
+            prompt, params = result.one()
+            await session.commit()
+
+        self._reclaimed(reclaimed)
+        return {**claimed._mapping, "prompt": prompt, **params}
+
+    def _reclaimed(self, count: int):
+        if count:
+            self.reclaimed += count
+            logger.info("Requeued %d job cells whose lease expired", count)
+
+    async def _heartbeat(self, cell: Dict[str, Any]):
+        """Extend a running cell's lease until cancelled"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with write_session() as session:
+                    await session.execute(
+                        update(JobCell)
+                        .where(*self._claimed(cell))
+                        .values(lease_expires_at=self._lease_expiry())
+                    )
+                    await session.commit()
+            except Exception:
+                logger.exception("Renewing the lease of job cell %d failed", cell["id"])
+
+    async def _run(self, cell: Dict[str, Any]):
+        """Generate, score and persist one claimed cell"""
+        self._running[cell["id"]] = cell
+        heartbeat = asyncio.create_task(self._heartbeat(cell))
+        try:
+            result = await self.llm_service.generate_cell(
+                cell["prompt"],
+                cell["model"],
+                cell["temperature"],
+                cell["top_p"],
+                queue_key=("job", cell["job_id"]),
+                cache_stochastic=cell.get("cache_stochastic", False)
+            )
+            metrics = None
+            if not result.error:
+                metrics = (await score_contents(self.metrics_executor, [result.content]))[0]
+            await self._complete(cell, result.content, metrics, result.error)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Job cell %d failed to complete", cell["id"])
+            try:
+                await self._release(cell, error=f"Error: {str(e)}")
+            except Exception:
+                logger.exception("Releasing job cell %d failed; it is requeued when its lease expires", cell["id"])
+        finally:
+            heartbeat.cancel()
+            self._running.pop(cell["id"], None)
+
+    async def _release(self, cell: Dict[str, Any], error: Optional[str] = None, requeue: bool = False):
+        """
+        Give up a claimed cell without a result: requeue it, or fail it with
+        `error` once it has been claimed max_attempts times
+        """
+        failed = not requeue and cell["attempts"] >= self.max_attempts
+        async with write_session() as session:
+            result = await session.execute(
+                update(JobCell)
+                .where(*self._claimed(cell))
+                .values(
+                    status="failed" if failed else "pending",
+                    lease_expires_at=None,
+                    error=error if failed else None
+                )
+            )
+            if failed and result.rowcount:
+                await session.execute(
+                    update(Job)
+                    .where(Job.id == cell["job_id"])
+                    .values({Job.failed_cells: Job.failed_cells + 1})
+                )
+                await finish_if_done(session, cell["job_id"])
+            await session.commit()
+
+        if failed and result.rowcount:
+            self.failed += 1
+        elif result.rowcount:
+            self.notify()
+
+    async def _complete(
+        self,
+        cell: Dict[str, Any],
+        content: str,
+        metrics: Optional[Dict[str, Any]],
+        error: bool
+    ):
+        """Persist a finished cell's response and advance its job's counters"""
+        async with write_session() as session:
+            response_id = None
+            if not error:
+                content_hash, = await store_contents(session, [(content, metrics)])
+                result = await session.execute(
+                    insert(Response).returning(Response.id),
+                    [{
+                        "experiment_id": cell["experiment_id"],
+                        "temperature": cell["temperature"],
+                        "top_p": cell["top_p"],
+                        "model": cell["model"],
+                        "content_hash": content_hash,
+                        "created_at": datetime.utcnow(),
+                        **Response.metric_values(metrics),
+                    }]
+                )
+                response_id = result.scalar_one()
+                await index_contents(session, [content])
+                await session.execute(
+                    update(Experiment)
+                    .where(Experiment.id == cell["experiment_id"])
+                    .values(response_count=Experiment.response_count + 1)
+                )
+
+            result = await session.execute(
+                update(JobCell)
+                .where(*self._claimed(cell))
+                .values(
+                    status="failed" if error else "done",
+                    lease_expires_at=None,
+                    response_id=response_id,
+                    error=content if error else None
+                )
+            )
+            if result.rowcount == 0:
+                # The cell was removed (its experiment deleted) or its lease
+                # expired and it was claimed again while running
+                await session.rollback()
+                return
+
+            counter = Job.failed_cells if error else Job.completed_cells
+            await session.execute(
+                update(Job)
+                .where(Job.id == cell["job_id"])
+                .values({counter: counter + 1})
+            )
+            await finish_if_done(session, cell["job_id"])
+            await session.commit()
+
+        if error:
+            self.failed += 1
+        else:
+            self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._tasks),
+            "running": len(self._running),
+            "completed": self.completed,
+            "failed": self.failed,
+            "reclaimed": self.reclaimed,
+        }
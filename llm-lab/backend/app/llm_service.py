@@ -3,29 +3,140 @@ LLM Service for generating responses with different parameter combinations
 """
 
 import os
-from typing import List, Dict, Tuple
+import time
+import logging
+from typing import Any, List, Dict, Tuple, AsyncIterator, Awaitable, Callable, Hashable, Optional, NamedTuple, TypeVar, Union
 import asyncio
+import httpx
 from openai import AsyncOpenAI
 from anthropic import AsyncAnthropic
 from dotenv import load_dotenv
 
+from app.rate_limiter import RequestScheduler, estimate_tokens
+from app.cache import create_response_cache, cache_key, should_cache
+from app.single_flight import SingleFlight
+from app.http_clients import create_http_client, warm_up, PROVIDER_WARMUP_CONNECTIONS
+from app.resilience import ResilientCaller, AttemptClock, ProviderError, is_retryable
+from app.mock_provider import MockProvider, ReplayStore
+from app import profiling
+from app.metrics import MetricsAccumulator
+from app.instrumentation import (
+    PROVIDER_CALL_SECONDS, PROVIDER_QUEUE_SECONDS, PROVIDER_IN_FLIGHT, PROVIDER_TTFT_SECONDS,
+    PROVIDER_TOKENS_PER_SECOND, GRID_CELLS, CACHE_REQUESTS
+)
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Completion budget for every provider call
+MAX_TOKENS = 1000
+
+# live: real providers, falling back to the mock provider for models without
+# a configured key; mock: every call is synthetic; record: live, with each
+# response appended to REPLAY_PATH; replay: serve responses from REPLAY_PATH
+PROVIDER_MODES = ("live", "mock", "record", "replay")
+PROVIDER_MODE = os.getenv("PROVIDER_MODE", "live").lower()
+REPLAY_PATH = os.getenv("REPLAY_PATH", "./replay.jsonl")
+
+T = TypeVar("T")
+
+
+class GenerationResult(NamedTuple):
+    """One generated grid cell"""
+    temperature: float
+    top_p: float
+    content: str
+    cached: bool = False
+    # The call failed and content holds the error message
+    error: bool = False
+    # Set when the cell was streamed: scores computed as tokens arrived,
+    # time to first token in seconds and decode rate after it
+    metrics: Optional[Dict[str, Any]] = None
+    ttft: Optional[float] = None
+    tokens_per_second: Optional[float] = None
+
+
+class StreamedResponse(NamedTuple):
+    """A provider response received as a token stream"""
+    content: str
+    metrics: Dict[str, Any]
+    ttft: Optional[float]
+    tokens_per_second: Optional[float]
+
 
 class LLMService:
     """Service for interacting with LLM APIs"""
     
     def __init__(self):
+        # Provider clients are created by start() for keys that are configured
         self.openai_client = None
-        # self.anthropic_client = None
-           
-        # Initialize clients if API keys are available
-        openai_key = os.getenv("OPENAI_API_KEY")
-
-        print("OpenAI Key:", openai_key)
+        self.anthropic_client = None
+        self.openai_key = os.getenv("OPENAI_API_KEY")
+        self.anthropic_key = os.getenv("ANTHROPIC_API_KEY")
+        # Pooled HTTP transports the provider clients run on, by provider.
+        # SDK retries are off; ResilientCaller retries instead
+        self.http_clients: Dict[str, httpx.AsyncClient] = {}
+        
+        # Per-provider concurrency and rate limits
+        self.scheduler = RequestScheduler()
+        
+        # Cache of provider responses (None when disabled)
+        self.cache = create_response_cache()
+        
+        # Coalesces identical provider calls that are in flight at once
+        self.single_flight = SingleFlight()
+        
+        # Deadlines, retries, hedging and circuit breakers around provider calls
+        self.resilience = ResilientCaller.from_env()
+        
+        # Offline backends: synthetic responses and recorded provider responses
+        if PROVIDER_MODE not in PROVIDER_MODES:
+            raise ValueError(f"PROVIDER_MODE must be one of {', '.join(PROVIDER_MODES)}")
+        self.provider_mode = PROVIDER_MODE
+        self.mock = MockProvider.from_env()
+        self.replay_store = ReplayStore(REPLAY_PATH) if PROVIDER_MODE in ("record", "replay") else None
+    
+    def _http_client(self, provider: str) -> httpx.AsyncClient:
+        """Connection pool sized to the provider's concurrency limit"""
+        client = create_http_client(self.scheduler.provider(provider).queue.limit)
+        self.http_clients[provider] = client
+        return client
+    
+    async def start(self):
+        """Create provider clients on pooled connections, optionally warmed up"""
+        if self.openai_key and not self.openai_client:
+            self.openai_client = AsyncOpenAI(
+                api_key=self.openai_key, http_client=self._http_client("openai"), max_retries=0
+            )
+        if self.anthropic_key and not self.anthropic_client:
+            self.anthropic_client = AsyncAnthropic(
+                api_key=self.anthropic_key, http_client=self._http_client("anthropic"), max_retries=0
+            )
         
-        if openai_key:
-            self.openai_client = AsyncOpenAI(api_key=openai_key)
+        if PROVIDER_WARMUP_CONNECTIONS > 0:
+            base_urls = {}
+            if self.openai_client:
+                base_urls["openai"] = str(self.openai_client.base_url)
+            if self.anthropic_client:
+                base_urls["anthropic"] = str(self.anthropic_client.base_url)
+            await asyncio.gather(*(
+                self._warm_up(provider, base_url) for provider, base_url in base_urls.items()
+            ))
+    
+    async def _warm_up(self, provider: str, base_url: str):
+        connections = min(PROVIDER_WARMUP_CONNECTIONS, self.scheduler.provider(provider).queue.limit)
+        opened = await warm_up(self.http_clients[provider], base_url, connections)
+        logger.info("Warmed up %d/%d %s connections", opened, connections, provider)
+    
+    async def close(self):
+        """Close provider clients and their connection pools"""
+        for client in (self.openai_client, self.anthropic_client):
+            if client:
+                await client.close()
+        self.openai_client = None
+        self.anthropic_client = None
+        self.http_clients.clear()
     
     async def generate_response_openai(
         self,
@@ -44,12 +155,36 @@ class LLMService:
                 messages=[{"role": "user", "content": prompt}],
                 temperature=temperature,
                 top_p=top_p,
-                max_tokens=1000
+                max_tokens=MAX_TOKENS
             )
-            print(response,"Hi this is the llmservice")
             return response.choices[0].message.content
         except Exception as e:
-            raise Exception(f"OpenAI API error: {str(e)}")
+            raise ProviderError(f"OpenAI API error: {str(e)}", retryable=is_retryable(e)) from e
+    
+    async def generate_samples_openai(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        top_p: float,
+        n: int
+    ) -> List[str]:
+        """Generate n samples in one OpenAI call, sharing the prompt tokens"""
+        if not self.openai_client:
+            raise ValueError("OpenAI API key not configured")
+        
+        try:
+            response = await self.openai_client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                top_p=top_p,
+                max_tokens=MAX_TOKENS,
+                n=n
+            )
+            return [choice.message.content for choice in response.choices]
+        except Exception as e:
+            raise ProviderError(f"OpenAI API error: {str(e)}", retryable=is_retryable(e)) from e
     
     async def generate_response_anthropic(
         self,
@@ -65,63 +200,518 @@ class LLMService:
         try:
             response = await self.anthropic_client.messages.create(
                 model=model,
-                max_tokens=1000,
+                max_tokens=MAX_TOKENS,
                 temperature=temperature,
                 top_p=top_p,
                 messages=[{"role": "user", "content": prompt}]
             )
             return response.content[0].text
         except Exception as e:
-            raise Exception(f"Anthropic API error: {str(e)}")
+            raise ProviderError(f"Anthropic API error: {str(e)}", retryable=is_retryable(e)) from e
     
-    async def generate_response(
+    async def stream_response_openai(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        top_p: float
+    ) -> AsyncIterator[Union[str, int]]:
+        """Stream an OpenAI completion: text deltas, then the completion token count"""
+        if not self.openai_client:
+            raise ValueError("OpenAI API key not configured")
+        
+        try:
+            stream = await self.openai_client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                top_p=top_p,
+                max_tokens=MAX_TOKENS,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            async with stream:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+                    if chunk.usage:
+                        yield chunk.usage.completion_tokens
+        except Exception as e:
+            raise ProviderError(f"OpenAI API error: {str(e)}", retryable=is_retryable(e)) from e
+    
+    async def stream_response_anthropic(
         self,
         prompt: str,
         model: str,
         temperature: float,
         top_p: float
+    ) -> AsyncIterator[Union[str, int]]:
+        """Stream an Anthropic message: text deltas, then the output token count"""
+        if not self.anthropic_client:
+            raise ValueError("Anthropic API key not configured")
+        
+        try:
+            stream = await self.anthropic_client.messages.create(
+                model=model,
+                max_tokens=MAX_TOKENS,
+                temperature=temperature,
+                top_p=top_p,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True
+            )
+            async with stream:
+                async for event in stream:
+                    if event.type == "content_block_delta" and event.delta.type == "text_delta":
+                        yield event.delta.text
+                    elif event.type == "message_delta":
+                        yield event.usage.output_tokens
+        except Exception as e:
+            raise ProviderError(f"Anthropic API error: {str(e)}", retryable=is_retryable(e)) from e
+    
+    @staticmethod
+    async def _consume(provider: str, model: str, stream: AsyncIterator[Union[str, int]]) -> StreamedResponse:
+        """Read a token stream, scoring the text as it arrives"""
+        accumulator = MetricsAccumulator()
+        started = time.perf_counter()
+        first_token = None
+        tokens = chunks = 0
+        async for item in stream:
+            if isinstance(item, int):
+                tokens = item
+                continue
+            if first_token is None:
+                first_token = time.perf_counter()
+            accumulator.feed(item)
+            chunks += 1
+        finished = time.perf_counter()
+        metrics = accumulator.finish()
+        
+        ttft = tokens_per_second = None
+        if first_token is not None:
+            ttft = first_token - started
+            PROVIDER_TTFT_SECONDS.observe(ttft, provider=provider, model=model)
+            # Decode rate after the first token; chunks stand in for tokens
+            # when the provider does not report usage
+            decoded = (tokens or chunks) - 1
+            if decoded > 0 and finished > first_token:
+                tokens_per_second = decoded / (finished - first_token)
+                PROVIDER_TOKENS_PER_SECOND.observe(tokens_per_second, provider=provider, model=model)
+        return StreamedResponse(accumulator.text, metrics, ttft, tokens_per_second)
+    
+    def _slot(self, provider: str, prompt: str, model: str, queue_key: Hashable, samples: int = 1):
+        """Wait for the provider's scheduler to admit one call"""
+        return self.scheduler.provider(provider).slot(
+            model, estimate_tokens(prompt, MAX_TOKENS * samples), queue_key
+        )
+    
+    async def _attempt(
+        self,
+        provider: str,
+        prompt: str,
+        model: str,
+        queue_key: Optional[Hashable],
+        call: Callable[[], Awaitable[T]],
+        samples: int,
+        clock: AttemptClock
+    ) -> T:
+        """
+        One provider call: wait for a slot, then call within the per-call
+        deadline. The clock starts once the slot is acquired.
+        """
+        timeout = self.resilience.call_timeout
+        queued = time.perf_counter()
+        async with self._slot(provider, prompt, model, queue_key, samples):
+            clock.start()
+            started = time.perf_counter()
+            PROVIDER_QUEUE_SECONDS.observe(started - queued, provider=provider)
+            profiling.record("queue", started - queued)
+            PROVIDER_IN_FLIGHT.inc(provider=provider)
+            outcome = "error"
+            try:
+                result = await asyncio.wait_for(call(), timeout)
+                outcome = "success"
+                return result
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                raise ProviderError(f"{provider} call timed out after {timeout:g}s", retryable=True)
+            finally:
+                elapsed = time.perf_counter() - started
+                PROVIDER_IN_FLIGHT.dec(provider=provider)
+                PROVIDER_CALL_SECONDS.observe(elapsed, provider=provider, model=model, outcome=outcome)
+                profiling.record("provider", elapsed)
+    
+    def _call(
+        self,
+        provider: str,
+        prompt: str,
+        model: str,
+        queue_key: Optional[Hashable],
+        call: Callable[[], Awaitable[T]],
+        samples: int = 1
+    ) -> Awaitable[T]:
+        return self.resilience.call(
+            provider,
+            model,
+            lambda clock: self._attempt(provider, prompt, model, queue_key, call, samples, clock)
+        )
+    
+    async def generate_response(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        top_p: float,
+        queue_key: Optional[Hashable] = None
     ) -> str:
-        """Generate response using appropriate provider or mock"""
-        # Determine provider based on model
-        if model.startswith("gpt"):
-            if self.openai_client:
-                return await self.generate_response_openai(prompt, model, temperature, top_p)
-        elif model.startswith("claude"):
-            if self.anthropic_client:
-                return await self.generate_response_anthropic(prompt, model, temperature, top_p)
+        """
+        Generate response using appropriate provider or mock.
+        Calls sharing a queue_key (one experiment) are queued fairly against
+        calls from other experiments. Retryable failures are retried with
+        backoff, and slow calls may be hedged.
+        """
+        if self.provider_mode == "replay":
+            return self._replay(prompt, model, temperature, top_p)
+        
+        provider = self._provider_for(model)
+        generate = {
+            "openai": self.generate_response_openai,
+            "anthropic": self.generate_response_anthropic,
+            "mock": self.mock.generate,
+        }[provider]
+        response = await self._call(
+            provider, prompt, model, queue_key,
+            lambda: generate(prompt, model, temperature, top_p)
+        )
+        if provider != "mock":
+            await self._record(prompt, model, temperature, top_p, [response])
+        return response
+    
+    async def generate_streamed(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        top_p: float,
+        queue_key: Optional[Hashable] = None
+    ) -> StreamedResponse:
+        """
+        Like generate_response, but with provider token streaming: metrics
+        are accumulated as chunks arrive and time to first token and decode
+        rate are measured. A retried call starts a fresh stream.
+        """
+        if self.provider_mode == "replay":
+            content = self._replay(prompt, model, temperature, top_p)
+            accumulator = MetricsAccumulator()
+            accumulator.feed(content)
+            return StreamedResponse(content, accumulator.finish(), None, None)
+        
+        provider = self._provider_for(model)
+        stream = {
+            "openai": self.stream_response_openai,
+            "anthropic": self.stream_response_anthropic,
+            "mock": self.mock.stream,
+        }[provider]
+        response = await self._call(
+            provider, prompt, model, queue_key,
+            lambda: self._consume(provider, model, stream(prompt, model, temperature, top_p))
+        )
+        if provider != "mock":
+            await self._record(prompt, model, temperature, top_p, [response.content])
+        return response
+    
+    def _provider_for(self, model: str) -> str:
+        """
+        Provider serving a model. Models without a configured provider (or
+        every model in mock mode) fall back to the mock provider, which goes
+        through the same scheduler and retries, so load tests exercise the
+        whole call path.
+        """
+        if self.provider_mode != "mock":
+            if model.startswith("gpt") and self.openai_client:
+                return "openai"
+            if model.startswith("claude") and self.anthropic_client:
+                return "anthropic"
+        return "mock"
+    
+    def _replay(self, prompt: str, model: str, temperature: float, top_p: float) -> str:
+        response = self.replay_store.replay(cache_key(prompt, model, temperature, top_p, MAX_TOKENS))
+        if response is None:
+            raise ProviderError(
+                f"No recorded response for {model} at temperature={temperature}, top_p={top_p}"
+            )
+        return response
+    
+    async def _record(self, prompt: str, model: str, temperature: float, top_p: float, responses: List[str]):
+        """Append live responses to the replay file in record mode"""
+        if self.provider_mode != "record":
+            return
+        key = cache_key(prompt, model, temperature, top_p, MAX_TOKENS)
+        for response in responses:
+            await self.replay_store.record(
+                key, response, prompt=prompt, model=model, temperature=temperature, top_p=top_p
+            )
+    
+    def stats(self) -> Dict[str, object]:
+        stats = {"mode": self.provider_mode, "mock": self.mock.stats()}
+        if self.replay_store:
+            stats["replay"] = self.replay_store.stats()
+        return stats
+    
+    async def generate_cell_samples(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        top_p: float,
+        repetitions: int = 1,
+        queue_key: Optional[Hashable] = None,
+        cache_stochastic: bool = False,
+        stream: bool = False
+    ) -> List[GenerationResult]:
+        """
+        Generate `repetitions` samples of one grid cell.
+        OpenAI returns all samples from one call via its `n` parameter; other
+        providers, and streamed cells, get one call per sample, each failing
+        on its own. Repeated samples bypass the response cache, since they
+        exist to measure variance.
+        """
+        if repetitions == 1:
+            return [await self.generate_cell(
+                prompt, model, temperature, top_p, queue_key, cache_stochastic, stream
+            )]
+        
+        if stream:
+            samples = await asyncio.gather(*(
+                self.generate_streamed(prompt, model, temperature, top_p, queue_key)
+                for _ in range(repetitions)
+            ), return_exceptions=True)
+            return [
+                GenerationResult(temperature, top_p, f"Error: {str(sample)}", error=True)
+                if isinstance(sample, Exception) else self._streamed_result(temperature, top_p, sample)
+                for sample in samples
+            ]
+        
+        if self.provider_mode != "replay" and self._provider_for(model) == "openai":
+            # Identical concurrent requests still share one call
+            key = (cache_key(prompt, model, temperature, top_p, MAX_TOKENS), repetitions)
+            try:
+                samples = await self.single_flight.do(key, lambda: self._call(
+                    "openai", prompt, model, queue_key,
+                    lambda: self.generate_samples_openai(prompt, model, temperature, top_p, repetitions),
+                    samples=repetitions
+                ))
+            except Exception as e:
+                return [GenerationResult(temperature, top_p, f"Error: {str(e)}", error=True)] * repetitions
+            await self._record(prompt, model, temperature, top_p, samples)
+            return [GenerationResult(temperature, top_p, sample) for sample in samples]
+        
+        samples = await asyncio.gather(*(
+            self.generate_response(prompt, model, temperature, top_p, queue_key)
+            for _ in range(repetitions)
+        ), return_exceptions=True)
+        return [
+            GenerationResult(temperature, top_p, f"Error: {str(sample)}", error=True)
+            if isinstance(sample, Exception) else GenerationResult(temperature, top_p, sample)
+            for sample in samples
+        ]
+    
+    async def generate_cell(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        top_p: float,
+        queue_key: Optional[Hashable] = None,
+        cache_stochastic: bool = False,
+        stream: bool = False
+    ) -> GenerationResult:
+        """
+        Generate one grid cell, serving it from the response cache when allowed.
+        Concurrent identical calls share a single provider request.
+        Errors are reported in place of the content. Streamed cells come back
+        already scored, except cache hits.
+        """
+        key = cache_key(prompt, model, temperature, top_p, MAX_TOKENS)
+        use_cache = self.cache is not None and should_cache(temperature, cache_stochastic)
+        if use_cache:
+            cached = await self.cache.get(key)
+            CACHE_REQUESTS.inc(result="miss" if cached is None else "hit")
+            if cached is not None:
+                return GenerationResult(temperature, top_p, cached, cached=True)
         
-        # Fallback to mock if no API keys available
-        # return await self.generate_mock_response(prompt, model, temperature, top_p)
+        store_key = key if use_cache else None
+        try:
+            if stream:
+                streamed = await self.single_flight.do(
+                    (key, "stream"),
+                    lambda: self._fetch_streamed(prompt, model, temperature, top_p, queue_key, store_key)
+                )
+                return self._streamed_result(temperature, top_p, streamed)
+            response = await self.single_flight.do(
+                key,
+                lambda: self._fetch_response(prompt, model, temperature, top_p, queue_key, store_key)
+            )
+        except Exception as e:
+            return GenerationResult(temperature, top_p, f"Error: {str(e)}", error=True)
+        
+        return GenerationResult(temperature, top_p, response)
+    
+    @staticmethod
+    def _streamed_result(temperature: float, top_p: float, streamed: StreamedResponse) -> GenerationResult:
+        return GenerationResult(
+            temperature,
+            top_p,
+            streamed.content,
+            metrics=streamed.metrics,
+            ttft=streamed.ttft,
+            tokens_per_second=streamed.tokens_per_second
+        )
+    
+    async def _fetch_response(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        top_p: float,
+        queue_key: Optional[Hashable],
+        store_key: Optional[str]
+    ) -> str:
+        """Call the provider and store the response in the cache under store_key"""
+        response = await self.generate_response(prompt, model, temperature, top_p, queue_key)
+        if store_key is not None:
+            await self.cache.set(store_key, response)
+        return response
+    
+    async def _fetch_streamed(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        top_p: float,
+        queue_key: Optional[Hashable],
+        store_key: Optional[str]
+    ) -> StreamedResponse:
+        """Stream from the provider and store the content in the cache under store_key"""
+        response = await self.generate_streamed(prompt, model, temperature, top_p, queue_key)
+        if store_key is not None:
+            await self.cache.set(store_key, response.content)
+        return response
+    
+    @staticmethod
+    def _unique(values: List[float]) -> List[float]:
+        """Drop repeated values, keeping the first occurrence's position"""
+        return list(dict.fromkeys(values))
+    
+    def _start_cells(
+        self,
+        prompt: str,
+        model: str,
+        temperature_range: List[float],
+        top_p_range: List[float],
+        cache_stochastic: bool,
+        repetitions: int,
+        stream: bool
+    ) -> Dict[asyncio.Task, Tuple[float, float]]:
+        """Start one task per parameter combination, mapped to its (temperature, top_p)"""
+        queue_key = object()
+        temperatures = self._unique(temperature_range)
+        top_ps = self._unique(top_p_range)
+        GRID_CELLS.observe(len(temperatures) * len(top_ps))
+        return {
+            asyncio.ensure_future(
+                self.generate_cell_samples(
+                    prompt, model, temp, top_p, repetitions, queue_key, cache_stochastic, stream
+                )
+            ): (temp, top_p)
+            for temp in temperatures
+            for top_p in top_ps
+        }
+    
+    def _sweep_timeout(self, timeout: Optional[float]) -> Optional[float]:
+        return timeout if timeout is not None else self.resilience.sweep_timeout
+    
+    @staticmethod
+    def _deadline_exceeded(cell: Tuple[float, float], timeout: float, repetitions: int) -> List[GenerationResult]:
+        error = f"Error: sweep deadline of {timeout:g}s exceeded"
+        return [GenerationResult(*cell, error, error=True)] * repetitions
     
     async def generate_multiple_responses(
         self,
         prompt: str,
         model: str,
         temperature_range: List[float],
-        top_p_range: List[float]
-    ) -> List[Tuple[float, float, str]]:
-        """Generate multiple responses with different parameter combinations"""
-        tasks = []
-        param_combinations = []
-        
-        # Create all parameter combinations
-        for temp in temperature_range:
-            for top_p in top_p_range:
-                param_combinations.append((temp, top_p))
-                tasks.append(self.generate_response(prompt, model, temp, top_p))
-        
-        # Execute all requests in parallel
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Combine parameters with responses
-        results = []
-        for i, response in enumerate(responses):
-            temp, top_p = param_combinations[i]
-            if isinstance(response, Exception):
-                # Handle errors gracefully
-                results.append((temp, top_p, f"Error: {str(response)}"))
-            else:
-                results.append((temp, top_p, response))
-        
-        return results
+        top_p_range: List[float],
+        cache_stochastic: bool = False,
+        timeout: Optional[float] = None,
+        repetitions: int = 1,
+        stream: bool = False
+    ) -> List[GenerationResult]:
+        """
+        Generate multiple responses with different parameter combinations,
+        `repetitions` samples per combination, grouped by combination.
+        With stream, cells use provider token streaming and arrive scored.
+        Cells still running when the sweep deadline passes are cancelled and
+        reported as errors.
+        """
+        timeout = self._sweep_timeout(timeout)
+        cells = self._start_cells(
+            prompt, model, temperature_range, top_p_range, cache_stochastic, repetitions, stream
+        )
+        if not cells:
+            # An empty range spans no combinations (asyncio.wait rejects an empty set)
+            return []
 
+        # Execute all parameter combinations in parallel
+        done, pending = await asyncio.wait(cells, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        return [
+            result
+            for task, cell in cells.items()
+            for result in (
+                task.result() if task in done else self._deadline_exceeded(cell, timeout, repetitions)
+            )
+        ]
+    
+    async def iter_multiple_responses(
+        self,
+        prompt: str,
+        model: str,
+        temperature_range: List[float],
+        top_p_range: List[float],
+        cache_stochastic: bool = False,
+        timeout: Optional[float] = None,
+        repetitions: int = 1,
+        stream: bool = False
+    ) -> AsyncIterator[GenerationResult]:
+        """
+        Yield each parameter combination's samples as soon as it completes.
+        Cells still running at the sweep deadline are yielded as errors.
+        """
+        timeout = self._sweep_timeout(timeout)
+        cells = self._start_cells(
+            prompt, model, temperature_range, top_p_range, cache_stochastic, repetitions, stream
+        )
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        
+        pending = set(cells)
+        try:
+            while pending:
+                remaining = deadline - loop.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    for result in task.result():
+                        yield result
+            for task in pending:
+                task.cancel()
+                for result in self._deadline_exceeded(cells[task], timeout, repetitions):
+                    yield result
+        finally:
+            # Stop outstanding calls if the consumer goes away early
+            for task in cells:
+                task.cancel()
@@ -2,33 +2,79 @@
 Main FastAPI application for LLM Lab
 """
 
-from fastapi import FastAPI, Depends, HTTPException
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import FastAPI, Depends, HTTPException, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse, FileResponse, ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from typing import List
+from sqlalchemy import select, func, delete, or_, and_
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+import os
+import asyncio
 import json
-import csv
-import io
+import time
+import base64
 
-from app.database import get_db
-from app.models import Experiment, Response
+from app.database import get_db, get_write_db, init_db, close_db, IS_SQLITE
+from app.models import Experiment, Response, ResponseBlob, JobCell
 from app.schemas import (
     GenerateRequest,
     ExperimentResponse,
     ResponseData,
     ResponseMetrics as ResponseMetricsSchema,
+    CellStats,
     ExperimentListItem,
-    ExportRequest
+    ExperimentPage,
+    SearchResult,
+    ParameterStats,
+    ExportRequest,
+    JobRequest,
+    JobStatus,
+    SearchSummary
 )
 from app.llm_service import LLMService
 from app.metrics import ResponseMetrics
+from app.scoring import MetricsExecutor
+from app.persistence import ExperimentStore
+from app.blobs import score_contents, decompress, delete_unreferenced
+from app.adaptive import AdaptiveSearch, validate_search, summarize as summarize_search
+from app.export import ENCODERS, MEDIA_TYPES, iter_export_rows, gzip_stream
+from app.search import search_responses, unindex_blobs
+from app.jobs import JobRunner, create_job, cancel_job, job_status, finish_if_done
+from app.instrumentation import REGISTRY, CONTENT_TYPE, InstrumentationMiddleware
+from app import profiling
+
+# Executor for metric scoring (inline, thread pool or process pool)
+metrics_executor = MetricsExecutor()
+
+# Saves generated experiments, inline or through a write-behind queue
+experiment_store = ExperimentStore()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start up and shut down shared resources"""
+    await init_db()
+    await llm_service.start()
+    experiment_store.start()
+    await job_runner.start()
+    yield
+    await job_runner.stop()
+    await experiment_store.stop()
+    await llm_service.close()
+    metrics_executor.shutdown()
+    await close_db()
+    if llm_service.cache:
+        llm_service.cache.close()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="LLM Lab API",
     description="API for experimenting with LLM parameters and analyzing response quality",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -40,9 +86,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request timings and per-endpoint DB query timings for /metrics
+app.add_middleware(InstrumentationMiddleware)
+
+# Server-Timing breakdowns and stack profiles for authorized requests
+app.add_middleware(profiling.ProfilingMiddleware)
+
 # Initialize LLM service
 llm_service = LLMService()
 
+# Workers for background sweeps queued through /api/jobs
+job_runner = JobRunner(llm_service, metrics_executor)
+
+# Budgeted search over the parameter grid for search="adaptive"
+adaptive_search = AdaptiveSearch(llm_service, metrics_executor)
+
 
 @app.get("/")
 async def root():
@@ -61,104 +119,345 @@ async def health_check():
         "status": "healthy",
         "openai_configured": llm_service.openai_client is not None,
         "anthropic_configured": llm_service.anthropic_client is not None,
+        "providers": llm_service.stats(),
+        "scheduler": llm_service.scheduler.stats(),
+        "cache": llm_service.cache.stats() if llm_service.cache else None,
+        "single_flight": llm_service.single_flight.stats(),
+        "resilience": llm_service.resilience.stats(),
+        "persistence": experiment_store.stats(),
+        "jobs": job_runner.stats(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Counters and latency histograms in the Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/api/profiles", include_in_schema=False)
+async def list_profiles(x_profile_token: Optional[str] = Header(default=None)):
+    """Saved stack profiles still within retention, newest first"""
+    if not profiling.authorized(x_profile_token):
+        raise HTTPException(status_code=403, detail="Profiling token required")
+    return {"profiles": await asyncio.to_thread(profiling.prune_profiles)}
+
+
+@app.get("/api/profiles/{profile_id}", include_in_schema=False)
+async def download_profile(profile_id: str, x_profile_token: Optional[str] = Header(default=None)):
+    """Stack profile of a request sampled with X-Profile: sample, in folded format"""
+    if not profiling.authorized(x_profile_token):
+        raise HTTPException(status_code=403, detail="Profiling token required")
+    path = profiling.profile_path(profile_id)
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"profile-{profile_id}.folded")
+
+
+def _cell_stats(
+    samples: Iterable[Tuple[float, float, Optional[Dict[str, float]]]]
+) -> List[CellStats]:
+    """Per-combination metric statistics from (temperature, top_p, metrics) samples"""
+    groups: Dict[Tuple[float, float], List[Dict[str, float]]] = {}
+    for temperature, top_p, metrics in samples:
+        cell = groups.setdefault((temperature, top_p), [])
+        if metrics:
+            cell.append(metrics)
+    return [
+        CellStats(
+            temperature=temperature,
+            top_p=top_p,
+            samples=len(metrics),
+            metrics=ResponseMetrics.summarize(metrics)
+        )
+        for (temperature, top_p), metrics in groups.items()
+        if metrics
+    ]
+
+
+def _stream_timings(result) -> Dict[str, Optional[float]]:
+    """Time to first token (ms) and decode rate of a streamed cell, None otherwise"""
+    return {
+        'ttft_ms': round(result.ttft * 1000, 1) if result.ttft is not None else None,
+        'tokens_per_second': round(result.tokens_per_second, 1) if result.tokens_per_second is not None else None,
     }
 
 
+def _experiment_json(experiment: ExperimentResponse) -> ORJSONResponse:
+    """
+    Encode an experiment assembled with model_construct. Returning a response
+    skips FastAPI re-validating it against response_model and its
+    jsonable_encoder pass, which dominate the cost for large grids.
+    """
+    return ORJSONResponse(experiment.model_dump())
+
+
 @app.post("/api/generate", response_model=ExperimentResponse)
 async def generate_responses(request: GenerateRequest):
     """
     Generate multiple LLM responses with different parameter combinations.
-    Calculates quality metrics for each response.
+    Calculates quality metrics for each response. With search="adaptive"
+    only the combinations an adaptive search explores are generated.
     """
+    if request.search == "adaptive":
+        try:
+            validate_search(request.temperature_range, request.top_p_range, request.budget, request.repetitions)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     try:
-        from datetime import datetime
-        
         # Generate responses with different parameter combinations
-        responses_data = await llm_service.generate_multiple_responses(
-            prompt=request.prompt,
-            model=request.model,
-            temperature_range=request.temperature_range,
-            top_p_range=request.top_p_range
-        )
+        search = None
+        with profiling.stage("sweep"):
+            if request.search == "adaptive":
+                search = await adaptive_search.run(
+                    prompt=request.prompt,
+                    model=request.model,
+                    temperature_range=request.temperature_range,
+                    top_p_range=request.top_p_range,
+                    budget=request.budget,
+                    repetitions=request.repetitions,
+                    cache_stochastic=request.cache_stochastic,
+                    timeout=request.timeout,
+                    stream=request.stream_tokens
+                )
+                responses_data = search.results
+            else:
+                responses_data = await llm_service.generate_multiple_responses(
+                    prompt=request.prompt,
+                    model=request.model,
+                    temperature_range=request.temperature_range,
+                    top_p_range=request.top_p_range,
+                    cache_stochastic=request.cache_stochastic,
+                    timeout=request.timeout,
+                    repetitions=request.repetitions,
+                    stream=request.stream_tokens
+                )
         
-        # Process each response and calculate metrics
-        response_objects = []
-        for idx, (temp, top_p, content) in enumerate(responses_data, 1):
-            # Calculate quality metrics
-            metrics = ResponseMetrics.calculate_all_metrics(content)
-            metrics['overall_score'] = ResponseMetrics.calculate_overall_score(metrics)
-            
-            # Create response object (in-memory only, no DB)
-            response_obj = {
-                'id': idx,
-                'temperature': temp,
-                'top_p': top_p,
+        # Calculate quality metrics off the event loop for cells that were
+        # not already scored while streaming or stored with the same text
+        with profiling.stage("scoring"):
+            all_metrics = [result.metrics for result in responses_data]
+            unscored = [i for i, metrics in enumerate(all_metrics) if metrics is None]
+            scored = await score_contents(metrics_executor, [responses_data[i].content for i in unscored])
+            for i, metrics in zip(unscored, scored):
+                all_metrics[i] = metrics
+        
+        # Build response rows
+        created_at = datetime.utcnow()
+        rows = [
+            {
+                'temperature': result.temperature,
+                'top_p': result.top_p,
                 'model': request.model,
-                'content': content,
+                'content': result.content,
                 'metrics': metrics,
-                'created_at': datetime.utcnow()
+                **_stream_timings(result),
+                'created_at': created_at
             }
-            response_objects.append(response_obj)
-
-        print(f"Generated {len(response_objects)} responses")
+            for result, metrics in zip(responses_data, all_metrics)
+        ]
         
-        # Return response without saving to database
-        return ExperimentResponse(
-            id=1,
-            prompt=request.prompt,
-            created_at=datetime.utcnow(),
-            responses=[
-                ResponseData(
-                    id=resp['id'],
-                    temperature=resp['temperature'],
-                    top_p=resp['top_p'],
-                    model=resp['model'],
-                    content=resp['content'],
-                    metrics=ResponseMetricsSchema(**resp['metrics']) if resp['metrics'] else None,
-                    created_at=resp['created_at']
-                )
-                for resp in response_objects
-            ]
-        )
+        # Save the experiment and its responses in one transaction
+        # (ids are 0 / positional when the write is deferred)
+        with profiling.stage("persist"):
+            saved = await experiment_store.save(request.prompt, created_at, rows)
+        experiment_id, response_ids = saved or (0, list(range(1, len(rows) + 1)))
+        
+        response_objects = [
+            {**row, 'id': response_id, 'cached': result.cached}
+            for row, response_id, result in zip(rows, response_ids, responses_data)
+        ]
+        
+        # Every field comes from validated input or our own code, so the
+        # models are built without validation
+        with profiling.stage("serialize"):
+            experiment = ExperimentResponse.model_construct(
+                id=experiment_id,
+                prompt=request.prompt,
+                created_at=created_at,
+                responses=[
+                    ResponseData.model_construct(
+                        id=resp['id'],
+                        temperature=resp['temperature'],
+                        top_p=resp['top_p'],
+                        model=resp['model'],
+                        content=resp['content'],
+                        metrics=ResponseMetricsSchema.model_construct(**resp['metrics']) if resp['metrics'] else None,
+                        cached=resp['cached'],
+                        ttft_ms=resp['ttft_ms'],
+                        tokens_per_second=resp['tokens_per_second'],
+                        created_at=resp['created_at']
+                    )
+                    for resp in response_objects
+                ],
+                # Failed samples are left out of the statistics
+                cell_stats=_cell_stats(
+                    (row['temperature'], row['top_p'], None if result.error else row['metrics'])
+                    for row, result in zip(rows, responses_data)
+                ) if request.repetitions > 1 else None,
+                search=SearchSummary(**summarize_search(search)) if search else None
+            )
+            return _experiment_json(experiment)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating responses: {str(e)}")
 
 
-@app.get("/api/experiments", response_model=List[ExperimentListItem])
+def _encode_event(event: str, data: Dict[str, Any], stream_format: str) -> str:
+    """Encode one stream event as a server-sent event or an NDJSON line"""
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, "data": data}) + "\n"
+
+
+@app.post("/api/generate/stream")
+async def generate_responses_stream(
+    request: GenerateRequest,
+    format: str = Query(default="ndjson", pattern="^(ndjson|sse)$")
+):
+    """
+    Stream generated responses as each parameter combination completes.
+    Emits one "result" event per response followed by a "summary" event.
+    """
+    if request.search != "grid":
+        raise HTTPException(status_code=422, detail="Adaptive search is only available on /api/generate")
+    experiment_created_at = datetime.utcnow()
+
+    async def events():
+        started = time.perf_counter()
+        best = None
+        count = 0
+        cache_hits = 0
+        rows = []
+        samples = []
+        try:
+            async for result in llm_service.iter_multiple_responses(
+                prompt=request.prompt,
+                model=request.model,
+                temperature_range=request.temperature_range,
+                top_p_range=request.top_p_range,
+                cache_stochastic=request.cache_stochastic,
+                timeout=request.timeout,
+                repetitions=request.repetitions,
+                stream=request.stream_tokens
+            ):
+                count += 1
+                cache_hits += result.cached
+                metrics = result.metrics or (await score_contents(metrics_executor, [result.content]))[0]
+                timings = _stream_timings(result)
+                response = ResponseData(
+                    id=count,
+                    temperature=result.temperature,
+                    top_p=result.top_p,
+                    model=request.model,
+                    content=result.content,
+                    metrics=ResponseMetricsSchema(**metrics),
+                    cached=result.cached,
+                    **timings,
+                    created_at=datetime.utcnow()
+                )
+                rows.append({
+                    'temperature': result.temperature,
+                    'top_p': result.top_p,
+                    'model': request.model,
+                    'content': result.content,
+                    'metrics': metrics,
+                    **timings,
+                    'created_at': response.created_at
+                })
+                samples.append((result.temperature, result.top_p, None if result.error else metrics))
+                if best is None or metrics['overall_score'] > best.metrics.overall_score:
+                    best = response
+                yield _encode_event("result", response.model_dump(mode="json"), format)
+
+            saved = await experiment_store.save(request.prompt, experiment_created_at, rows)
+
+            yield _encode_event("summary", {
+                "id": saved[0] if saved else 0,
+                "prompt": request.prompt,
+                "created_at": experiment_created_at.isoformat(),
+                "response_count": count,
+                "cache_hits": cache_hits,
+                "best_response_id": best.id if best else None,
+                "cell_stats": [
+                    stats.model_dump() for stats in _cell_stats(samples)
+                ] if request.repetitions > 1 else None,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }, format)
+        except Exception as e:
+            yield _encode_event("error", {"detail": f"Error generating responses: {str(e)}"}, format)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _encode_cursor(created_at: datetime, experiment_id: int) -> str:
+    """Opaque cursor for the (created_at, id) position of the last listed experiment"""
+    raw = json.dumps([created_at.isoformat(), experiment_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, experiment_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(experiment_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@app.get("/api/experiments", response_model=ExperimentPage)
 async def list_experiments(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=500),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all experiments"""
-    try:
-        # Get experiments with response count
-        result = await db.execute(
-            select(
-                Experiment.id,
-                Experiment.prompt,
-                Experiment.created_at,
-                func.count(Response.id).label('response_count')
-            )
-            .outerjoin(Response)
-            .group_by(Experiment.id)
-            .order_by(Experiment.created_at.desc())
-            .offset(skip)
-            .limit(limit)
+    """
+    List experiments, newest first.
+    Pages are keyed on (created_at, id); pass next_cursor to get the next one.
+    """
+    query = (
+        select(
+            Experiment.id,
+            Experiment.prompt,
+            Experiment.created_at,
+            Experiment.response_count
         )
+        .order_by(Experiment.created_at.desc(), Experiment.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        created_at, experiment_id = _decode_cursor(cursor)
+        query = query.where(or_(
+            Experiment.created_at < created_at,
+            and_(Experiment.created_at == created_at, Experiment.id < experiment_id)
+        ))
+
+    try:
+        # One extra row tells whether there is a next page
+        experiments = (await db.execute(query)).all()
         
-        experiments = result.all()
+        next_cursor = None
+        if len(experiments) > limit:
+            experiments = experiments[:limit]
+            last = experiments[-1]
+            next_cursor = _encode_cursor(last.created_at, last.id)
         
-        return [
-            ExperimentListItem(
-                id=exp.id,
-                prompt=exp.prompt,
-                created_at=exp.created_at,
-                response_count=exp.response_count
-            )
-            for exp in experiments
-        ]
+        return ExperimentPage(
+            items=[
+                ExperimentListItem(
+                    id=exp.id,
+                    prompt=exp.prompt,
+                    created_at=exp.created_at,
+                    response_count=exp.response_count
+                )
+                for exp in experiments
+            ],
+            next_cursor=next_cursor
+        )
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching experiments: {str(e)}")
@@ -180,31 +479,38 @@ async def get_experiment(
         if not experiment:
             raise HTTPException(status_code=404, detail="Experiment not found")
         
-        # Get responses
+        # Get responses with their compressed content
         result = await db.execute(
-            select(Response)
+            select(Response, ResponseBlob.data)
+            .join(ResponseBlob, Response.content_hash == ResponseBlob.hash)
             .where(Response.experiment_id == experiment_id)
             .order_by(Response.temperature, Response.top_p)
         )
-        responses = result.scalars().all()
+        rows = result.all()
+        responses = [resp for resp, _ in rows]
         
-        return ExperimentResponse(
+        return _experiment_json(ExperimentResponse.model_construct(
             id=experiment.id,
             prompt=experiment.prompt,
             created_at=experiment.created_at,
             responses=[
-                ResponseData(
+                ResponseData.model_construct(
                     id=resp.id,
                     temperature=resp.temperature,
                     top_p=resp.top_p,
                     model=resp.model,
-                    content=resp.content,
-                    metrics=ResponseMetricsSchema(**resp.metrics) if resp.metrics else None,
+                    content=decompress(data),
+                    metrics=ResponseMetricsSchema.model_construct(**resp.metrics_dict) if resp.metrics_dict else None,
+                    ttft_ms=resp.ttft_ms,
+                    tokens_per_second=resp.tokens_per_second,
                     created_at=resp.created_at
                 )
-                for resp in responses
-            ]
-        )
+                for resp, data in rows
+            ],
+            cell_stats=_cell_stats(
+                (resp.temperature, resp.top_p, resp.metrics_dict) for resp in responses
+            ) if len(responses) > len({(resp.temperature, resp.top_p) for resp in responses}) else None
+        ))
     
     except HTTPException:
         raise
@@ -215,19 +521,28 @@ async def get_experiment(
 @app.delete("/api/experiments/{experiment_id}")
 async def delete_experiment(
     experiment_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Delete an experiment"""
     try:
+        # Drop the experiment's cells from any job still sweeping it
         result = await db.execute(
-            select(Experiment).where(Experiment.id == experiment_id)
+            delete(JobCell).where(JobCell.experiment_id == experiment_id).returning(JobCell.job_id)
         )
-        experiment = result.scalar_one_or_none()
+        for job_id in set(result.scalars()):
+            await finish_if_done(db, job_id)
         
-        if not experiment:
+        # Bulk deletes avoid loading every response just to cascade
+        result = await db.execute(
+            delete(Response).where(Response.experiment_id == experiment_id).returning(Response.content_hash)
+        )
+        await unindex_blobs(db, await delete_unreferenced(db, result.scalars()))
+        result = await db.execute(delete(Experiment).where(Experiment.id == experiment_id))
+        
+        if result.rowcount == 0:
+            await db.rollback()
             raise HTTPException(status_code=404, detail="Experiment not found")
         
-        await db.delete(experiment)
         await db.commit()
         
         return {"message": "Experiment deleted successfully"}
@@ -239,65 +554,169 @@ async def delete_experiment(
         raise HTTPException(status_code=500, detail=f"Error deleting experiment: {str(e)}")
 
 
+@app.post("/api/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(
+    request: JobRequest,
+    db: AsyncSession = Depends(get_write_db)
+):
+    """
+    Queue a sweep over every prompt and parameter combination.
+    Returns immediately; poll GET /api/jobs/{id} for progress.
+    """
+    try:
+        job_id = await create_job(
+            db,
+            prompts=request.prompts,
+            model=request.model,
+            temperature_range=request.temperature_range,
+            top_p_range=request.top_p_range,
+            cache_stochastic=request.cache_stochastic
+        )
+        await db.commit()
+        job_runner.notify()
+        return JobStatus(**await job_status(db, job_id))
+    
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error creating job: {str(e)}")
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatus)
+async def get_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a job's progress"""
+    status = await job_status(db, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatus(**status)
+
+
+@app.post("/api/jobs/{job_id}/cancel", response_model=JobStatus)
+async def stop_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_write_db)
+):
+    """Cancel a job's pending cells; responses already generated are kept"""
+    try:
+        await cancel_job(db, job_id)
+        await db.commit()
+        status = await job_status(db, job_id)
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error cancelling job: {str(e)}")
+    
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatus(**status)
+
+
 @app.post("/api/export")
 async def export_experiments(
     request: ExportRequest,
     db: AsyncSession = Depends(get_db)
 ):
-    """Export experiments to JSON or CSV format"""
+    """
+    Export experiments as CSV, NDJSON or JSON, optionally gzipped.
+    Rows are streamed from a database cursor, so memory use stays flat
+    regardless of export size.
+    """
     try:
-        # Get experiments
         result = await db.execute(
-            select(Experiment).where(Experiment.id.in_(request.experiment_ids))
+            select(Experiment.id).where(Experiment.id.in_(request.experiment_ids)).limit(1)
         )
-        experiments = result.scalars().all()
-        
-        if not experiments:
+        if result.first() is None:
             raise HTTPException(status_code=404, detail="No experiments found")
-        
-        # Get all responses
-        result = await db.execute(
-            select(Response).where(Response.experiment_id.in_(request.experiment_ids))
-        )
-        responses = result.scalars().all()
-        
-        # Organize data
-        export_data = []
-        for experiment in experiments:
-            exp_responses = [r for r in responses if r.experiment_id == experiment.id]
-            
-            for response in exp_responses:
-                export_data.append({
-                    "experiment_id": experiment.id,
-                    "prompt": experiment.prompt,
-                    "temperature": response.temperature,
-                    "top_p": response.top_p,
-                    "model": response.model,
-                    "content": response.content,
-                    "created_at": response.created_at.isoformat(),
-                    **{f"metric_{k}": v for k, v in (response.metrics or {}).items()}
-                })
-        
-        if request.format == "json":
-            return {"data": export_data, "format": "json"}
-        else:  # CSV
-            if not export_data:
-                return {"data": "", "format": "csv"}
-            
-            # Create CSV
-            output = io.StringIO()
-            fieldnames = export_data[0].keys()
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(export_data)
-            
-            return {"data": output.getvalue(), "format": "csv"}
-    
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error exporting data: {str(e)}")
 
+    body = ENCODERS[request.format](iter_export_rows(request.experiment_ids))
+    filename = f"experiments.{request.format}"
+    media_type = MEDIA_TYPES[request.format]
+    if request.gzip:
+        body = gzip_stream(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@app.get("/api/search", response_model=List[SearchResult])
+async def search(
+    q: str = Query(..., min_length=1, max_length=500),
+    model: Optional[str] = None,
+    min_temperature: Optional[float] = None,
+    max_temperature: Optional[float] = None,
+    min_overall_score: Optional[float] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """Full-text search over prompts and responses, best matches first"""
+    if not IS_SQLITE:
+        raise HTTPException(status_code=501, detail="Search requires the SQLite backend")
+    try:
+        results = await search_responses(
+            db,
+            q,
+            model=model,
+            min_temperature=min_temperature,
+            max_temperature=max_temperature,
+            min_overall_score=min_overall_score,
+            limit=limit
+        )
+        return [SearchResult(**result) for result in results]
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching experiments: {str(e)}")
+
+
+@app.get("/api/analytics/parameters", response_model=List[ParameterStats])
+async def get_parameter_stats(
+    model: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Average and best overall score per temperature/top_p, aggregated in SQL"""
+    try:
+        query = (
+            select(
+                Response.temperature,
+                Response.top_p,
+                func.count(Response.id).label('response_count'),
+                func.avg(Response.overall_score).label('avg_overall_score'),
+                func.max(Response.overall_score).label('max_overall_score'),
+                func.avg(Response.ttft_ms).label('avg_ttft_ms'),
+                func.avg(Response.tokens_per_second).label('avg_tokens_per_second')
+            )
+            .group_by(Response.temperature, Response.top_p)
+            .order_by(Response.temperature, Response.top_p)
+        )
+        if model:
+            query = query.where(Response.model == model)
+        result = await db.execute(query)
+        
+        return [
+            ParameterStats(
+                temperature=row.temperature,
+                top_p=row.top_p,
+                response_count=row.response_count,
+                avg_overall_score=row.avg_overall_score,
+                max_overall_score=row.max_overall_score,
+                avg_ttft_ms=row.avg_ttft_ms,
+                avg_tokens_per_second=row.avg_tokens_per_second
+            )
+            for row in result.all()
+        ]
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing parameter stats: {str(e)}")
+
 
 @app.get("/api/metrics/info")
 async def get_metrics_info():
@@ -6,27 +6,612 @@ These metrics provide programmatic assessment of LLM responses without relying o
 
 import re
 import math
-from collections import Counter
-from typing import Dict, Any
+from collections import Counter, deque
+from itertools import chain
+from typing import Dict, Any, List, Sequence, Union
+
+import numpy as np
+
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+SENTENCE_SPLIT_PATTERN = re.compile(r'[.!?]+')
+NUMBERED_LIST_PATTERN = re.compile(r'^\s*\d+\.', re.MULTILINE)
+BULLET_LIST_PATTERN = re.compile(r'^\s*[-*•]', re.MULTILINE)
+HEADER_PATTERN = re.compile(r'^#+\s+.+$|^[A-Z][^.!?]*:$', re.MULTILINE)
+# Word characters at the end of a chunk, which the next chunk may extend
+TRAILING_WORD_PATTERN = re.compile(r'\w*$')
+
+# Transition words (indicators of coherence)
+TRANSITION_WORDS = {
+    'however', 'therefore', 'furthermore', 'moreover', 'additionally',
+    'consequently', 'thus', 'hence', 'nevertheless', 'meanwhile',
+    'subsequently', 'specifically', 'particularly', 'similarly',
+    'conversely', 'alternatively', 'in addition', 'for example',
+    'in contrast', 'as a result', 'on the other hand'
+}
+
+CONCLUSION_INDICATORS = ['in conclusion', 'finally', 'to summarize', 'in summary']
+
+# Weights for the overall score, prioritizing coherence and completeness
+OVERALL_WEIGHTS = {
+    "coherence_score": 0.25,
+    "lexical_diversity": 0.15,
+    "completeness_score": 0.25,
+    "structure_score": 0.15,
+    "readability_score": 0.10,
+    "length_appropriateness": 0.10,
+}
+
+# Every metric produced for a response, in a stable order
+METRIC_NAMES = list(OVERALL_WEIGHTS) + ["overall_score"]
+
+TTR_WINDOW_SIZE = 50
+TTR_WINDOW_STEP = 25
+
+# Number of TTR windows materialized at once by the batch path
+_TTR_WINDOW_CHUNK = 1 << 15
+
+# Batches with fewer characters than this are scored text by text: the
+# array pipeline's fixed cost only pays off above it
+BATCH_MIN_CHARS = 8192
+
+
+class TextAnalysis:
+    """
+    Shared analysis of a response, computed once and read by every metric.
+
+    Tokenizes, splits sentences and paragraphs, and counts words in a single
+    pass so that scoring a response does not repeat the same regex work for
+    each metric.
+    """
+
+    __slots__ = (
+        "text",
+        "stripped",
+        "is_empty",
+        "lower",
+        "words",
+        "words_lower",
+        "sentences",
+        "sentence_lengths",
+        "paragraphs",
+    )
+
+    def __init__(self, text: str):
+        self.text = text or ""
+        self.stripped = self.text.strip()
+        self.is_empty = len(self.stripped) == 0
+
+        if self.is_empty:
+            self.lower = ""
+            self.words: List[str] = []
+            self.words_lower: List[str] = []
+            self.sentences: List[str] = []
+            self.sentence_lengths: List[int] = []
+            self.paragraphs: List[str] = []
+            return
+
+        self.lower = self.text.lower()
+        self.words = WORD_PATTERN.findall(self.text)
+        if self.text.isascii():
+            # Lowercasing ASCII never changes token boundaries
+            self.words_lower = list(map(str.lower, self.words))
+        else:
+            self.words_lower = WORD_PATTERN.findall(self.lower)
+
+        sentences = (s.strip() for s in SENTENCE_SPLIT_PATTERN.split(self.text))
+        self.sentences = [s for s in sentences if s]
+        self.sentence_lengths = [len(s.split()) for s in self.sentences]
+
+        paragraphs = (p.strip() for p in self.text.split('\n\n'))
+        self.paragraphs = [p for p in paragraphs if p]
+
+
+TextInput = Union[str, TextAnalysis]
+
+
+def _ragged_positions(counts: np.ndarray):
+    """Row index and offset within the row for every element of a ragged layout"""
+    rows = np.repeat(np.arange(len(counts)), counts)
+    row_starts = np.cumsum(counts) - counts
+    return rows, np.arange(len(rows)) - row_starts[rows]
+
+
+def _padded(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Scatter a flat ragged array into a zero-padded (rows x longest row) matrix"""
+    width = int(counts.max()) if len(counts) else 0
+    padded = np.zeros((len(counts), width), dtype=values.dtype)
+    padded[np.arange(width) < counts[:, None]] = values
+    return padded
+
+
+def _row_sums(padded: np.ndarray) -> np.ndarray:
+    """Left-to-right row sums, matching Python's sum() bit for bit"""
+    if padded.shape[1] == 0:
+        return np.zeros(padded.shape[0], dtype=padded.dtype)
+    return np.cumsum(padded, axis=1)[:, -1]
+
+
+def _tuple_runs(columns: List[np.ndarray], spans: List[int]):
+    """
+    Group identical tuples across parallel non-negative integer columns.
+    
+    Returns the first column's value and the size of every group. Tuples are
+    packed into a single int64 sort key when the key space allows it, with a
+    multi-key lexsort as the fallback.
+    """
+    size = len(columns[0])
+    if math.prod(spans) < 2 ** 63:
+        packed = columns[0]
+        for column, span in zip(columns[1:], spans[1:]):
+            packed = packed * span + column
+        packed = np.sort(packed)
+        starts = np.flatnonzero(np.diff(packed, prepend=-1))
+        leading = packed[starts] // math.prod(spans[1:])
+    else:
+        order = np.lexsort(columns[::-1])
+        sorted_columns = [column[order] for column in columns]
+        boundaries = np.zeros(size, dtype=bool)
+        boundaries[:1] = True
+        for column in sorted_columns:
+            boundaries[1:] |= column[1:] != column[:-1]
+        starts = np.flatnonzero(boundaries)
+        leading = sorted_columns[0][starts]
+    return leading, np.diff(np.append(starts, size))
+
+
+# Byte classes of the ASCII range, taken from the patterns and str methods
+# the scalar path uses, so the byte-level batch parser agrees with it
+_WORD_BYTE, _SPACE_BYTE, _TERMINATOR_BYTE, _NEWLINE_BYTE = 1, 2, 4, 8
+_BYTE_CLASSES = np.array([
+    (_WORD_BYTE if WORD_PATTERN.fullmatch(chr(c)) else 0)
+    | (_SPACE_BYTE if chr(c).isspace() else 0)
+    | (_TERMINATOR_BYTE if SENTENCE_SPLIT_PATTERN.fullmatch(chr(c)) else 0)
+    | (_NEWLINE_BYTE if chr(c) == "\n" else 0)
+    for c in range(128)
+] + [0] * 128, dtype=np.uint8)
+
+# Words up to two 8-byte halves long are packed into integers to get word
+# ids; longer ones are looked up in a dict
+_PACKED_HALF = 8
+
+
+def _starts(mask: np.ndarray, first: np.ndarray) -> np.ndarray:
+    """Positions where a run of True begins, runs being cut at text starts"""
+    previous = np.zeros_like(mask)
+    previous[1:] = mask[:-1]
+    return np.flatnonzero(mask & (first | ~previous))
+
+
+def _ends(mask: np.ndarray, last: np.ndarray) -> np.ndarray:
+    """Positions just past the end of each run of True, cut at text ends"""
+    following = np.zeros_like(mask)
+    following[:-1] = mask[1:]
+    return np.flatnonzero(mask & (last | ~following)) + 1
+
+
+def _counts_between(positions: np.ndarray, boundaries: np.ndarray) -> np.ndarray:
+    """How many of the sorted positions fall between each boundary and the next"""
+    return np.diff(np.searchsorted(positions, boundaries), append=len(positions))
+
+
+def _packed_words(data: np.ndarray, starts: np.ndarray, lengths: np.ndarray, half: int) -> np.ndarray:
+    """
+    One 8-byte half of each word as a big-endian integer, with the bytes
+    past the word's end zeroed. `data` must be padded with 16 zero bytes.
+    """
+    # Unaligned view whose element i is the 8 bytes starting at byte i
+    windows = np.ndarray((len(data) - _PACKED_HALF + 1,), dtype=">u8", buffer=data, strides=(1,))
+    packed = windows[starts + half * _PACKED_HALF].astype(np.uint64)
+    unused = (8 * np.clip(_PACKED_HALF - (lengths - half * _PACKED_HALF), 0, _PACKED_HALF - 1)).astype(np.uint64)
+    return (packed >> unused) << unused
+
+
+def _run_ids(columns: List[np.ndarray]) -> np.ndarray:
+    """Dense ids of the distinct rows of parallel integer columns"""
+    order = np.lexsort(columns[::-1])
+    boundaries = np.zeros(len(order), dtype=bool)
+    boundaries[:1] = True
+    for column in columns:
+        ordered = column[order]
+        boundaries[1:] |= ordered[1:] != ordered[:-1]
+    ids = np.empty(len(order), dtype=np.int64)
+    ids[order] = np.cumsum(boundaries) - 1
+    return ids
+
+
+def _surface_features(texts: List[str], lowers: List[str], stripped: List[str]) -> Dict[str, np.ndarray]:
+    """Phrase, punctuation and layout checks, one C-level search per text"""
+    n = len(texts)
+
+    def column(values, dtype=bool):
+        return np.fromiter(values, dtype=dtype, count=n)
+
+    return {
+        "transition_counts": column(
+            (sum(1 for word in TRANSITION_WORDS if word in lower) for lower in lowers), np.int64
+        ),
+        "has_conclusion": column(
+            any(indicator in lower for indicator in CONCLUSION_INDICATORS) for lower in lowers
+        ),
+        "ends_terminal": column(bool(text) and text[-1] in '.!?"' for text in stripped),
+        "ends_weak": column(bool(text) and text[-1] in ',.;:' for text in stripped),
+        "has_list": column(
+            bool(NUMBERED_LIST_PATTERN.search(text) or BULLET_LIST_PATTERN.search(text)) for text in texts
+        ),
+        "has_headers": column(bool(HEADER_PATTERN.search(text)) for text in texts),
+    }
+
+
+def _analysis_features(analyses: List[TextAnalysis]) -> Dict[str, Any]:
+    """Batch features read from per-text analyses"""
+    n = len(analyses)
+
+    def column(values, dtype=np.int64):
+        return np.fromiter(values, dtype=dtype, count=n)
+
+    # Integer word ids shared across the batch, so unique-word counts,
+    # windows and trigrams can be computed with array operations
+    tokens = list(chain.from_iterable(a.words_lower for a in analyses))
+    vocab = {word: index for index, word in enumerate(set(tokens))}
+    return {
+        **_surface_features(
+            [a.text for a in analyses], [a.lower for a in analyses], [a.stripped for a in analyses]
+        ),
+        "empty": column((a.is_empty for a in analyses), bool),
+        "n_sentences": column(len(a.sentences) for a in analyses),
+        "n_words": column(len(a.words) for a in analyses),
+        "n_tokens": column(len(a.words_lower) for a in analyses),
+        "n_paragraphs": column(len(a.paragraphs) for a in analyses),
+        "word_chars": column(sum(map(len, a.words)) for a in analyses),
+        "sentence_lengths": np.fromiter(
+            chain.from_iterable(a.sentence_lengths for a in analyses), dtype=np.int64
+        ),
+        "ids": np.fromiter(map(vocab.__getitem__, tokens), dtype=np.int64, count=len(tokens)),
+        "vocab_size": len(vocab),
+    }
+
+
+def _ascii_features(texts: List[str]) -> Dict[str, Any]:
+    """
+    Batch features of ASCII texts, parsed as one byte array.
+
+    Words, sentences and paragraphs are found from byte-class masks instead
+    of per-text regex and str.split passes: words are runs of word bytes,
+    sentences are the pieces between terminator runs that hold any
+    whitespace-separated token, and paragraphs are the segments between
+    newline pairs that hold any visible byte, exactly as TextAnalysis splits
+    them.
+    """
+    n = len(texts)
+    lowers = [text.lower() for text in texts]
+    stripped = [text.strip() for text in texts]
+    features = _surface_features(texts, lowers, stripped)
+
+    joined = "".join(lowers)
+    data = np.frombuffer(joined.encode("ascii"), dtype=np.uint8)
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=n)
+    offsets = np.cumsum(lengths) - lengths
+    first = np.zeros(len(data), dtype=bool)
+    first[offsets[lengths > 0]] = True
+    last = np.zeros(len(data), dtype=bool)
+    last[(offsets + lengths - 1)[lengths > 0]] = True
+
+    def row(positions: np.ndarray) -> np.ndarray:
+        # Empty texts share their offset with the next text and hold no bytes
+        return np.searchsorted(offsets, positions, side="right") - 1
+
+    classes = np.take(_BYTE_CLASSES, data)
+    word = (classes & _WORD_BYTE).view(bool)
+    space = (classes & _SPACE_BYTE) != 0
+    terminator = (classes & _TERMINATOR_BYTE) != 0
+    newline = (classes & _NEWLINE_BYTE) != 0
+
+    # Words: maximal runs of word bytes
+    starts = _starts(word, first)
+    word_lengths = _ends(word, last) - starts
+    word_rows = row(starts)
+    n_words = np.bincount(word_rows, minlength=n)
+    word_chars = np.bincount(word_rows, weights=word_lengths, minlength=n).astype(np.int64)
+
+    # Sentences: pieces between terminator runs, with the number of
+    # whitespace-separated tokens in each; pieces without tokens are dropped
+    token_starts = _starts(~(space | terminator), first)
+    piece_starts = np.union1d(np.flatnonzero(first), _starts(terminator, first))
+    piece_tokens = _counts_between(token_starts, piece_starts)
+    sentences = piece_tokens > 0
+    sentence_lengths = piece_tokens[sentences]
+    n_sentences = np.bincount(row(piece_starts[sentences]), minlength=n)
+
+    # Paragraphs: segments between "\n\n" pairs holding a visible byte
+    following_newline = np.zeros_like(newline)
+    following_newline[:-1] = newline[1:]
+    segment_starts = np.flatnonzero(first | (newline & following_newline & ~last))
+    visible = _counts_between(np.flatnonzero(~space), segment_starts) > 0
+    n_paragraphs = np.bincount(row(segment_starts[visible]), minlength=n)
+
+    # Word ids. Word bytes are never zero, so zero-padded packed halves are
+    # equal exactly when the words are; words of up to 8 bytes have no
+    # second half.
+    padded = np.concatenate([data, np.zeros(2 * _PACKED_HALF, dtype=np.uint8)])
+    ids = np.empty(len(starts), dtype=np.int64)
+    vocab_size = 0
+    single = word_lengths <= _PACKED_HALF
+    if single.any():
+        packed = _packed_words(padded, starts[single], word_lengths[single], 0)
+        _, inverse = np.unique(packed, return_inverse=True)
+        ids[single] = inverse
+        vocab_size = int(inverse.max()) + 1
+    double = ~single & (word_lengths <= 2 * _PACKED_HALF)
+    if double.any():
+        halves = [_packed_words(padded, starts[double], word_lengths[double], half) for half in range(2)]
+        ids[double] = vocab_size + _run_ids(halves)
+        vocab_size = int(ids[double].max()) + 1
+    long = word_lengths > 2 * _PACKED_HALF
+    long_words = [
+        joined[start:start + length]
+        for start, length in zip(starts[long].tolist(), word_lengths[long].tolist())
+    ]
+    vocab = {word: vocab_size + index for index, word in enumerate(set(long_words))}
+    ids[long] = np.fromiter(map(vocab.__getitem__, long_words), dtype=np.int64, count=len(long_words))
+    vocab_size += len(vocab)
+
+    return {
+        **features,
+        "empty": np.fromiter((not text for text in stripped), dtype=bool, count=n),
+        "n_sentences": n_sentences,
+        "n_words": n_words,
+        "n_tokens": n_words,
+        "n_paragraphs": n_paragraphs,
+        "word_chars": word_chars,
+        "sentence_lengths": sentence_lengths,
+        "ids": ids,
+        "vocab_size": vocab_size,
+    }
+
+
+def _length_score(word_count: int) -> float:
+    """Length appropriateness for a word count"""
+    # Optimal range: 75-300 words
+    if 75 <= word_count <= 300:
+        return 1.0
+    elif 50 <= word_count < 75:
+        return 0.7 + ((word_count - 50) / 25) * 0.3
+    elif 300 < word_count <= 500:
+        return 1.0 - ((word_count - 300) / 200) * 0.3
+    elif 25 <= word_count < 50:
+        return 0.4 + ((word_count - 25) / 25) * 0.3
+    elif word_count < 25:
+        return max(word_count / 25 * 0.4, 0.1)
+    else:  # > 500 words
+        return max(0.7 - ((word_count - 500) / 500) * 0.5, 0.2)
+
+
+def _round3(values: np.ndarray) -> List[float]:
+    """Round with Python's round() so batch results match the scalar path"""
+    return [round(value, 3) for value in values.tolist()]
 
 
 class ResponseMetrics:
     """Calculate quality metrics for LLM responses"""
     
     @staticmethod
-    def calculate_all_metrics(text: str) -> Dict[str, Any]:
+    def analyze(text: TextInput) -> TextAnalysis:
+        """Return the shared analysis for a text, reusing it if already built"""
+        if isinstance(text, TextAnalysis):
+            return text
+        return TextAnalysis(text)
+    
+    @staticmethod
+    def calculate_all_metrics(text: TextInput) -> Dict[str, Any]:
         """Calculate all metrics for a given text"""
+        analysis = ResponseMetrics.analyze(text)
         return {
-            "coherence_score": ResponseMetrics.coherence_score(text),
-            "lexical_diversity": ResponseMetrics.lexical_diversity(text),
-            "completeness_score": ResponseMetrics.completeness_score(text),
-            "structure_score": ResponseMetrics.structure_score(text),
-            "readability_score": ResponseMetrics.readability_score(text),
-            "length_appropriateness": ResponseMetrics.length_appropriateness(text),
+            "coherence_score": ResponseMetrics.coherence_score(analysis),
+            "lexical_diversity": ResponseMetrics.lexical_diversity(analysis),
+            "completeness_score": ResponseMetrics.completeness_score(analysis),
+            "structure_score": ResponseMetrics.structure_score(analysis),
+            "readability_score": ResponseMetrics.readability_score(analysis),
+            "length_appropriateness": ResponseMetrics.length_appropriateness(analysis),
+        }
+    
+    @staticmethod
+    def calculate_batch(texts: Sequence[TextInput]) -> List[Dict[str, Any]]:
+        """
+        Calculate all metrics plus overall_score for many texts at once.
+        
+        ASCII texts are parsed together from one byte array and other texts
+        through TextAnalysis; then the numeric parts (sentence-length spread,
+        moving-window TTR, readability ratios, length curves and the weighted
+        overall score) are computed on NumPy arrays for the whole batch.
+        Batches under BATCH_MIN_CHARS are scored text by text instead.
+        Results are identical to calling calculate_all_metrics and
+        calculate_overall_score on each text.
+        """
+        n = len(texts)
+        if n == 0:
+            return []
+        
+        sizes = (len(text.text if isinstance(text, TextAnalysis) else text or "") for text in texts)
+        if sum(sizes) < BATCH_MIN_CHARS:
+            results = []
+            for text in texts:
+                metrics = ResponseMetrics.calculate_all_metrics(text)
+                metrics["overall_score"] = ResponseMetrics.calculate_overall_score(metrics)
+                results.append(metrics)
+            return results
+        
+        # ASCII strings are parsed together as one byte array; other texts
+        # go through TextAnalysis. Rows are scored in that order and put
+        # back in input order at the end.
+        fast = [
+            index for index, text in enumerate(texts)
+            if not isinstance(text, TextAnalysis) and (text or "").isascii()
+        ]
+        fast_set = set(fast)
+        slow = [index for index in range(n) if index not in fast_set]
+        groups = []
+        if fast:
+            groups.append(_ascii_features([texts[index] or "" for index in fast]))
+        if slow:
+            groups.append(_analysis_features([ResponseMetrics.analyze(texts[index]) for index in slow]))
+        
+        # Word ids only have to agree within a text, so each group keeps
+        # its own id range
+        id_offsets = np.cumsum([0] + [group["vocab_size"] for group in groups])
+        features = {
+            key: np.concatenate([group[key] for group in groups])
+            for key in groups[0] if key not in ("ids", "vocab_size")
         }
+        ids = np.concatenate([group["ids"] + offset for group, offset in zip(groups, id_offsets)])
+        vocab_size = max(int(id_offsets[-1]), 1)
+        
+        empty = features["empty"]
+        n_sentences = features["n_sentences"]
+        n_words = features["n_words"]
+        n_tokens = features["n_tokens"]
+        n_paragraphs = features["n_paragraphs"]
+        word_chars = features["word_chars"]
+        transition_counts = features["transition_counts"]
+        ends_terminal = features["ends_terminal"]
+        ends_weak = features["ends_weak"]
+        has_conclusion = features["has_conclusion"]
+        has_list = features["has_list"]
+        has_headers = features["has_headers"]
+        sentence_lengths = features["sentence_lengths"]
+        safe_sentences = np.maximum(n_sentences, 1)
+        safe_words = np.maximum(n_words, 1)
+        safe_tokens = np.maximum(n_tokens, 1)
+        
+        token_offsets = np.cumsum(n_tokens) - n_tokens
+        token_rows, _ = _ragged_positions(n_tokens)
+        
+        # --- Lexical diversity ---
+        unique_rows, _ = _tuple_runs([token_rows, ids], [n, vocab_size])
+        unique_counts = np.bincount(unique_rows, minlength=n)
+        
+        windowed = n_tokens > 100
+        n_windows = np.where(
+            windowed, -(-(n_tokens - TTR_WINDOW_SIZE) // TTR_WINDOW_STEP), 0
+        )
+        window_rows, window_index = _ragged_positions(n_windows)
+        window_starts = token_offsets[window_rows] + window_index * TTR_WINDOW_STEP
+        window_unique = np.empty(len(window_starts), dtype=np.int64)
+        window_span = np.arange(TTR_WINDOW_SIZE)
+        for start in range(0, len(window_starts), _TTR_WINDOW_CHUNK):
+            stop = start + _TTR_WINDOW_CHUNK
+            windows = np.sort(ids[window_starts[start:stop, None] + window_span], axis=1)
+            window_unique[start:stop] = 1 + np.count_nonzero(windows[:, 1:] != windows[:, :-1], axis=1)
+        window_ttrs = window_unique / TTR_WINDOW_SIZE
+        moving_ttr = _row_sums(_padded(window_ttrs, n_windows)) / np.maximum(n_windows, 1)
+        
+        ttr = np.where(windowed, moving_ttr, unique_counts / safe_tokens)
+        lexical_diversity = np.where(empty | (n_tokens == 0), 0.0, np.minimum(ttr, 1.0))
+        
+        # --- Coherence ---
+        trigram_counts = np.where(n_tokens >= 10, n_tokens - 2, 0)
+        trigram_rows, trigram_index = _ragged_positions(trigram_counts)
+        positions = token_offsets[trigram_rows] + trigram_index
+        run_rows, run_lengths = _tuple_runs(
+            [trigram_rows, ids[positions], ids[positions + 1], ids[positions + 2]],
+            [n, vocab_size, vocab_size, vocab_size],
+        )
+        max_repetition = np.ones(n, dtype=np.int64)
+        np.maximum.at(max_repetition, run_rows, run_lengths)
+        
+        transition_ratio = np.minimum(transition_counts / safe_sentences, 1.0)
+        repetition_penalty = np.where(
+            n_tokens < 10, 0.0, np.minimum((max_repetition - 1) * 0.1, 0.5)
+        )
+        coherence = np.clip((transition_ratio * 0.6) + (0.4 * (1 - repetition_penalty)), 0.0, 1.0)
+        coherence = np.where(empty, 0.0, np.where(n_sentences < 2, 0.5, coherence))
+        
+        # --- Completeness ---
+        sentence_rows, _ = _ragged_positions(n_sentences)
+        sentence_totals = np.bincount(sentence_rows, weights=sentence_lengths, minlength=n)
+        avg_sentence_length = sentence_totals / safe_sentences
+        
+        completeness = np.zeros(n) + np.where(ends_terminal, 0.4, 0.0)
+        completeness = completeness + np.select(
+            [n_sentences >= 3, n_sentences >= 2, n_sentences == 1], [0.3, 0.2, 0.1], 0.0
+        )
+        completeness = completeness + np.where(has_conclusion, 0.2, 0.0)
+        completeness = completeness - np.where(ends_weak, 0.1, 0.0)
+        completeness = completeness + np.where((n_sentences > 0) & (avg_sentence_length >= 10), 0.1, 0.0)
+        completeness = np.where(empty, 0.0, np.clip(completeness, 0.0, 1.0))
+        
+        # --- Structure ---
+        # float_power goes through libm pow(), like Python's ** operator,
+        # whereas ** on arrays squares by multiplication and can differ by an ulp
+        padded_lengths = _padded(sentence_lengths, n_sentences)
+        valid = np.arange(padded_lengths.shape[1]) < n_sentences[:, None]
+        squared_deviations = np.where(
+            valid, np.float_power(padded_lengths - avg_sentence_length[:, None], 2), 0.0
+        )
+        std_dev = np.sqrt(_row_sums(squared_deviations) / safe_sentences)
+        
+        structure = np.zeros(n) + np.select(
+            [n_paragraphs >= 3, n_paragraphs == 2, n_paragraphs == 1], [0.3, 0.2, 0.1], 0.0
+        )
+        structure = structure + np.where(has_list, 0.3, 0.0)
+        structure = structure + np.where(
+            n_sentences > 0, np.select([std_dev > 5, std_dev > 3], [0.2, 0.1], 0.0), 0.0
+        )
+        structure = structure + np.where(has_headers, 0.2, 0.0)
+        structure = np.where(empty, 0.0, np.clip(structure, 0.0, 1.0))
+        
+        # --- Readability ---
+        avg_words_per_sentence = n_words / safe_sentences
+        avg_chars_per_word = word_chars / safe_words
+        sentence_score = 1.0 - np.minimum(np.abs(avg_words_per_sentence - 17.5) / 17.5, 1.0)
+        word_score = 1.0 - np.minimum(np.abs(avg_chars_per_word - 5) / 5, 1.0)
+        readability = np.clip((sentence_score * 0.6) + (word_score * 0.4), 0.0, 1.0)
+        readability = np.where(empty | (n_sentences == 0) | (n_words == 0), 0.0, readability)
+        
+        # --- Length appropriateness ---
+        wc = n_words
+        length = np.select(
+            [
+                (75 <= wc) & (wc <= 300),
+                (50 <= wc) & (wc < 75),
+                (300 < wc) & (wc <= 500),
+                (25 <= wc) & (wc < 50),
+                wc < 25,
+            ],
+            [
+                1.0,
+                0.7 + ((wc - 50) / 25) * 0.3,
+                1.0 - ((wc - 300) / 200) * 0.3,
+                0.4 + ((wc - 25) / 25) * 0.3,
+                np.maximum(wc / 25 * 0.4, 0.1),
+            ],
+            np.maximum(0.7 - ((wc - 500) / 500) * 0.5, 0.2),
+        )
+        length = np.where(empty, 0.0, length)
+        
+        metrics = {
+            "coherence_score": _round3(coherence),
+            "lexical_diversity": _round3(lexical_diversity),
+            "completeness_score": _round3(completeness),
+            "structure_score": _round3(structure),
+            "readability_score": _round3(readability),
+            "length_appropriateness": length.tolist(),
+        }
+        
+        # --- Overall score (accumulated in the same order as the scalar path) ---
+        overall = np.zeros(n)
+        for key, weight in OVERALL_WEIGHTS.items():
+            overall = overall + np.asarray(metrics[key]) * weight
+        metrics["overall_score"] = _round3(overall)
+        
+        keys = list(metrics)
+        results = [None] * n
+        for index, values in zip(fast + slow, zip(*metrics.values())):
+            results[index] = dict(zip(keys, values))
+        return results
     
     @staticmethod
-    def coherence_score(text: str) -> float:
+    def coherence_score(text: TextInput) -> float:
         """
         Measure coherence based on sentence connectivity and repetition patterns.
         
@@ -37,36 +622,27 @@ class ResponseMetrics:
         
         Score: 0.0 (poor) to 1.0 (excellent)
         """
-        if not text or len(text.strip()) == 0:
+        analysis = ResponseMetrics.analyze(text)
+        if analysis.is_empty:
             return 0.0
         
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
+        sentences = analysis.sentences
         
         if len(sentences) < 2:
             return 0.5  # Single sentence - neutral score
         
         # Check for transition words (indicators of coherence)
-        transition_words = {
-            'however', 'therefore', 'furthermore', 'moreover', 'additionally',
-            'consequently', 'thus', 'hence', 'nevertheless', 'meanwhile',
-            'subsequently', 'specifically', 'particularly', 'similarly',
-            'conversely', 'alternatively', 'in addition', 'for example',
-            'in contrast', 'as a result', 'on the other hand'
-        }
-        
-        text_lower = text.lower()
-        transition_count = sum(1 for word in transition_words if word in text_lower)
+        text_lower = analysis.lower
+        transition_count = sum(1 for word in TRANSITION_WORDS if word in text_lower)
         transition_ratio = min(transition_count / len(sentences), 1.0)
         
         # Check for excessive repetition (indicates poor coherence)
-        words = re.findall(r'\b\w+\b', text.lower())
+        words = analysis.words_lower
         if len(words) < 10:
             repetition_penalty = 0
         else:
             # Get 3-grams and check repetition
-            trigrams = [' '.join(words[i:i+3]) for i in range(len(words)-2)]
-            trigram_counts = Counter(trigrams)
+            trigram_counts = Counter(zip(words, words[1:], words[2:]))
             max_repetition = max(trigram_counts.values()) if trigram_counts else 1
             repetition_penalty = min((max_repetition - 1) * 0.1, 0.5)
         
@@ -76,7 +652,7 @@ class ResponseMetrics:
         return round(min(max(coherence, 0.0), 1.0), 3)
     
     @staticmethod
-    def lexical_diversity(text: str) -> float:
+    def lexical_diversity(text: TextInput) -> float:
         """
         Type-Token Ratio (TTR) - ratio of unique words to total words.
         
@@ -85,10 +661,11 @@ class ResponseMetrics:
         
         Score: 0.0 (low diversity) to 1.0 (high diversity)
         """
-        if not text or len(text.strip()) == 0:
+        analysis = ResponseMetrics.analyze(text)
+        if analysis.is_empty:
             return 0.0
         
-        words = re.findall(r'\b\w+\b', text.lower())
+        words = analysis.words_lower
         
         if len(words) == 0:
             return 0.0
@@ -99,9 +676,9 @@ class ResponseMetrics:
         # Adjust for length (longer texts naturally have lower TTR)
         # Use moving-average TTR for longer texts
         if len(words) > 100:
-            window_size = 50
+            window_size = TTR_WINDOW_SIZE
             ttrs = []
-            for i in range(0, len(words) - window_size, 25):
+            for i in range(0, len(words) - window_size, TTR_WINDOW_STEP):
                 window = words[i:i+window_size]
                 window_ttr = len(set(window)) / len(window)
                 ttrs.append(window_ttr)
@@ -110,7 +687,7 @@ class ResponseMetrics:
         return round(min(ttr, 1.0), 3)
     
     @staticmethod
-    def completeness_score(text: str) -> float:
+    def completeness_score(text: TextInput) -> float:
         """
         Assess if response appears complete based on structural cues.
         
@@ -121,10 +698,11 @@ class ResponseMetrics:
         
         Score: 0.0 (incomplete) to 1.0 (complete)
         """
-        if not text or len(text.strip()) == 0:
+        analysis = ResponseMetrics.analyze(text)
+        if analysis.is_empty:
             return 0.0
         
-        text = text.strip()
+        text = analysis.stripped
         score = 0.0
         
         # Check if ends with proper punctuation
@@ -132,8 +710,7 @@ class ResponseMetrics:
             score += 0.4
         
         # Check sentence count
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
+        sentences = analysis.sentences
         
         if len(sentences) >= 3:
             score += 0.3
@@ -142,9 +719,8 @@ class ResponseMetrics:
         elif len(sentences) == 1:
             score += 0.1
         
-        # Check for incomplete indicators
-        incomplete_indicators = ['...', 'to be continued', 'in conclusion', 'finally']
-        has_conclusion = any(indicator in text.lower() for indicator in ['in conclusion', 'finally', 'to summarize', 'in summary'])
+        # Check for conclusion indicators
+        has_conclusion = any(indicator in analysis.lower for indicator in CONCLUSION_INDICATORS)
         
         if has_conclusion:
             score += 0.2
@@ -155,14 +731,14 @@ class ResponseMetrics:
         
         # Check average sentence length (very short might indicate truncation)
         if sentences:
-            avg_length = sum(len(s.split()) for s in sentences) / len(sentences)
+            avg_length = sum(analysis.sentence_lengths) / len(sentences)
             if avg_length >= 10:
                 score += 0.1
         
         return round(min(max(score, 0.0), 1.0), 3)
     
     @staticmethod
-    def structure_score(text: str) -> float:
+    def structure_score(text: TextInput) -> float:
         """
         Evaluate structural quality (paragraphs, lists, formatting).
         
@@ -173,14 +749,15 @@ class ResponseMetrics:
         
         Score: 0.0 (poor structure) to 1.0 (excellent structure)
         """
-        if not text or len(text.strip()) == 0:
+        analysis = ResponseMetrics.analyze(text)
+        if analysis.is_empty:
             return 0.0
         
+        text = analysis.text
         score = 0.0
         
         # Check for paragraphs (double line breaks)
-        paragraphs = text.split('\n\n')
-        paragraphs = [p.strip() for p in paragraphs if p.strip()]
+        paragraphs = analysis.paragraphs
         
         if len(paragraphs) >= 3:
             score += 0.3
@@ -190,19 +767,18 @@ class ResponseMetrics:
             score += 0.1
         
         # Check for lists
-        has_numbered_list = bool(re.search(r'^\s*\d+\.', text, re.MULTILINE))
-        has_bullet_list = bool(re.search(r'^\s*[-*•]', text, re.MULTILINE))
+        has_numbered_list = bool(NUMBERED_LIST_PATTERN.search(text))
+        has_bullet_list = bool(BULLET_LIST_PATTERN.search(text))
         
         if has_numbered_list or has_bullet_list:
             score += 0.3
         
         # Check for proper sentence structure
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
+        sentences = analysis.sentences
         
         if sentences:
             # Good variation in sentence length
-            lengths = [len(s.split()) for s in sentences]
+            lengths = analysis.sentence_lengths
             avg_length = sum(lengths) / len(lengths)
             std_dev = math.sqrt(sum((x - avg_length) ** 2 for x in lengths) / len(lengths))
             
@@ -213,14 +789,14 @@ class ResponseMetrics:
                 score += 0.1
         
         # Check for headers or section markers
-        has_headers = bool(re.search(r'^#+\s+.+$|^[A-Z][^.!?]*:$', text, re.MULTILINE))
+        has_headers = bool(HEADER_PATTERN.search(text))
         if has_headers:
             score += 0.2
         
         return round(min(max(score, 0.0), 1.0), 3)
     
     @staticmethod
-    def readability_score(text: str) -> float:
+    def readability_score(text: TextInput) -> float:
         """
         Simplified Flesch Reading Ease approximation.
         
@@ -229,16 +805,16 @@ class ResponseMetrics:
         
         Score: 0.0 (poor readability) to 1.0 (excellent readability)
         """
-        if not text or len(text.strip()) == 0:
+        analysis = ResponseMetrics.analyze(text)
+        if analysis.is_empty:
             return 0.0
         
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
+        sentences = analysis.sentences
         
         if not sentences:
             return 0.0
         
-        words = re.findall(r'\b\w+\b', text)
+        words = analysis.words
         
         if not words:
             return 0.0
@@ -259,7 +835,7 @@ class ResponseMetrics:
         return round(min(max(readability, 0.0), 1.0), 3)
     
     @staticmethod
-    def length_appropriateness(text: str) -> float:
+    def length_appropriateness(text: TextInput) -> float:
         """
         Evaluate if response length is appropriate (not too short or verbose).
         
@@ -268,25 +844,11 @@ class ResponseMetrics:
         
         Score: 0.0 (inappropriate length) to 1.0 (appropriate length)
         """
-        if not text or len(text.strip()) == 0:
+        analysis = ResponseMetrics.analyze(text)
+        if analysis.is_empty:
             return 0.0
         
-        words = re.findall(r'\b\w+\b', text)
-        word_count = len(words)
-        
-        # Optimal range: 75-300 words
-        if 75 <= word_count <= 300:
-            return 1.0
-        elif 50 <= word_count < 75:
-            return 0.7 + ((word_count - 50) / 25) * 0.3
-        elif 300 < word_count <= 500:
-            return 1.0 - ((word_count - 300) / 200) * 0.3
-        elif 25 <= word_count < 50:
-            return 0.4 + ((word_count - 25) / 25) * 0.3
-        elif word_count < 25:
-            return max(word_count / 25 * 0.4, 0.1)
-        else:  # > 500 words
-            return max(0.7 - ((word_count - 500) / 500) * 0.5, 0.2)
+        return _length_score(len(analysis.words))
     
     @staticmethod
     def calculate_overall_score(metrics: Dict[str, float]) -> float:
@@ -295,15 +857,226 @@ class ResponseMetrics:
         
         Weights prioritize coherence and completeness as primary indicators.
         """
-        weights = {
-            "coherence_score": 0.25,
-            "lexical_diversity": 0.15,
-            "completeness_score": 0.25,
-            "structure_score": 0.15,
-            "readability_score": 0.10,
-            "length_appropriateness": 0.10,
-        }
-        
-        overall = sum(metrics.get(key, 0) * weight for key, weight in weights.items())
+        overall = sum(metrics.get(key, 0) * weight for key, weight in OVERALL_WEIGHTS.items())
         return round(overall, 3)
+    
+    @staticmethod
+    def summarize(samples: Sequence[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+        """
+        Mean and sample standard deviation of every metric across repeated
+        samples of one cell. The deviation is 0.0 for a single sample.
+        """
+        values = np.array([[sample[name] for name in METRIC_NAMES] for sample in samples], dtype=float)
+        means = values.mean(axis=0)
+        stds = values.std(axis=0, ddof=1) if len(samples) > 1 else np.zeros(len(METRIC_NAMES))
+        return {
+            name: {"mean": mean, "std": std}
+            for name, mean, std in zip(METRIC_NAMES, _round3(means), _round3(stds))
+        }
+
+
+class MetricsAccumulator:
+    """
+    Incremental ResponseMetrics for a response that arrives in chunks.
+
+    Tokens, trigram counts, TTR windows, sentence lengths and paragraph
+    counts are updated as each chunk is fed, so finish() only applies the
+    scoring formulas and two regex searches. Scores are identical to
+    ResponseMetrics.calculate_batch on the complete text.
+    """
+
+    # Longest phrase searched for as a substring of the lowercased text
+    _PHRASE_OVERLAP = max(map(len, chain(TRANSITION_WORDS, CONCLUSION_INDICATORS))) - 1
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.last_char = ""
+        # Text not yet tokenized / split, because the next chunk may extend it
+        self._word_pending = ""
+        self._sentence_pending = ""
+        self._paragraph_pending = ""
+        self._lower_tail = ""
+
+        self.word_count = 0
+        self.word_chars = 0
+        self.token_count = 0
+        self.unique_words = set()
+        self.trigrams: Counter = Counter()
+        self.max_trigram = 0
+        self._recent = deque(maxlen=TTR_WINDOW_SIZE)
+        self.window_ttrs: List[float] = []
+
+        self.sentence_lengths: List[int] = []
+        self.paragraph_count = 0
+        self.transitions = set()
+        self.conclusions = set()
+
+    def feed(self, chunk: str):
+        if not chunk:
+            return
+        self.parts.append(chunk)
+        stripped = chunk.rstrip()
+        if stripped:
+            self.last_char = stripped[-1]
+        self._scan_phrases(chunk.lower())
+
+        pending = self._word_pending + chunk
+        cut = TRAILING_WORD_PATTERN.search(pending).start()
+        self._add_words(pending[:cut])
+        self._word_pending = pending[cut:]
 
+        pieces = SENTENCE_SPLIT_PATTERN.split(self._sentence_pending + chunk)
+        self._sentence_pending = pieces.pop()
+        self._add_sentences(pieces)
+
+        pieces = (self._paragraph_pending + chunk).split('\n\n')
+        self._paragraph_pending = pieces.pop()
+        self.paragraph_count += sum(1 for piece in pieces if piece.strip())
+
+    def _scan_phrases(self, lower: str):
+        # Phrases may straddle chunks, so search from the end of the previous chunk
+        window = self._lower_tail + lower
+        for phrase in TRANSITION_WORDS:
+            if phrase not in self.transitions and phrase in window:
+                self.transitions.add(phrase)
+        for phrase in CONCLUSION_INDICATORS:
+            if phrase not in self.conclusions and phrase in window:
+                self.conclusions.add(phrase)
+        self._lower_tail = window[-self._PHRASE_OVERLAP:]
+
+    def _add_words(self, text: str):
+        words = WORD_PATTERN.findall(text)
+        if not words:
+            return
+        self.word_count += len(words)
+        self.word_chars += sum(map(len, words))
+        lower = list(map(str.lower, words)) if text.isascii() else WORD_PATTERN.findall(text.lower())
+
+        recent = self._recent
+        for word in lower:
+            self.unique_words.add(word)
+            if len(recent) >= 2:
+                trigram = (recent[-2], recent[-1], word)
+                count = self.trigrams[trigram] + 1
+                self.trigrams[trigram] = count
+                if count > self.max_trigram:
+                    self.max_trigram = count
+            recent.append(word)
+            # Windows start every TTR_WINDOW_STEP tokens and are TTR_WINDOW_SIZE long
+            self.token_count += 1
+            seen = self.token_count
+            if seen >= TTR_WINDOW_SIZE and (seen - TTR_WINDOW_SIZE) % TTR_WINDOW_STEP == 0:
+                self.window_ttrs.append(len(set(recent)) / TTR_WINDOW_SIZE)
+
+    def _add_sentences(self, pieces: List[str]):
+        for piece in pieces:
+            piece = piece.strip()
+            if piece:
+                self.sentence_lengths.append(len(piece.split()))
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def finish(self) -> Dict[str, Any]:
+        """All metrics plus overall_score for the text fed so far"""
+        self._add_words(self._word_pending)
+        self._word_pending = ""
+        self._add_sentences([self._sentence_pending])
+        self._sentence_pending = ""
+        if self._paragraph_pending.strip():
+            self.paragraph_count += 1
+        self._paragraph_pending = ""
+
+        text = self.text
+        if not self.last_char:
+            metrics = {name: 0.0 for name in OVERALL_WEIGHTS}
+            metrics["overall_score"] = ResponseMetrics.calculate_overall_score(metrics)
+            return metrics
+
+        tokens = self.token_count
+        lengths = self.sentence_lengths
+        n_sentences = len(lengths)
+
+        # Coherence
+        if n_sentences < 2:
+            coherence = 0.5
+        else:
+            transition_ratio = min(len(self.transitions) / n_sentences, 1.0)
+            if tokens < 10:
+                repetition_penalty = 0
+            else:
+                max_repetition = self.max_trigram if self.trigrams else 1
+                repetition_penalty = min((max_repetition - 1) * 0.1, 0.5)
+            coherence = round(min(max((transition_ratio * 0.6) + (0.4 * (1 - repetition_penalty)), 0.0), 1.0), 3)
+
+        # Lexical diversity; windows must be followed by at least one more token
+        if tokens == 0:
+            diversity = 0.0
+        else:
+            ttr = len(self.unique_words) / tokens
+            if tokens > 100:
+                ttrs = [
+                    window_ttr for i, window_ttr in enumerate(self.window_ttrs)
+                    if i * TTR_WINDOW_STEP < tokens - TTR_WINDOW_SIZE
+                ]
+                ttr = sum(ttrs) / len(ttrs) if ttrs else ttr
+            diversity = round(min(ttr, 1.0), 3)
+
+        # Completeness
+        score = 0.0
+        if self.last_char in '.!?"':
+            score += 0.4
+        if n_sentences >= 3:
+            score += 0.3
+        elif n_sentences >= 2:
+            score += 0.2
+        elif n_sentences == 1:
+            score += 0.1
+        if self.conclusions:
+            score += 0.2
+        if self.last_char in ',.;:':
+            score -= 0.1
+        if lengths and sum(lengths) / n_sentences >= 10:
+            score += 0.1
+        completeness = round(min(max(score, 0.0), 1.0), 3)
+
+        # Structure
+        score = 0.0
+        if self.paragraph_count >= 3:
+            score += 0.3
+        elif self.paragraph_count == 2:
+            score += 0.2
+        elif self.paragraph_count == 1:
+            score += 0.1
+        if NUMBERED_LIST_PATTERN.search(text) or BULLET_LIST_PATTERN.search(text):
+            score += 0.3
+        if lengths:
+            avg_length = sum(lengths) / n_sentences
+            std_dev = math.sqrt(sum((x - avg_length) ** 2 for x in lengths) / n_sentences)
+            if std_dev > 5:
+                score += 0.2
+            elif std_dev > 3:
+                score += 0.1
+        if HEADER_PATTERN.search(text):
+            score += 0.2
+        structure = round(min(max(score, 0.0), 1.0), 3)
+
+        # Readability
+        if not lengths or not self.word_count:
+            readability = 0.0
+        else:
+            sentence_score = 1.0 - min(abs(self.word_count / n_sentences - 17.5) / 17.5, 1.0)
+            word_score = 1.0 - min(abs(self.word_chars / self.word_count - 5) / 5, 1.0)
+            readability = round(min(max((sentence_score * 0.6) + (word_score * 0.4), 0.0), 1.0), 3)
+
+        metrics = {
+            "coherence_score": coherence,
+            "lexical_diversity": diversity,
+            "completeness_score": completeness,
+            "structure_score": structure,
+            "readability_score": readability,
+            "length_appropriateness": _length_score(self.word_count),
+        }
+        metrics["overall_score"] = ResponseMetrics.calculate_overall_score(metrics)
+        return metrics
@@ -0,0 +1,182 @@
+"""
+Schema migrations for databases created by earlier versions of the app.
+
+Fresh databases get the current schema from Base.metadata.create_all; each
+migration brings an existing database forward and must be safe to run on a
+database that already has the change. Applied versions are recorded in the
+schema_version table.
+"""
+
+from typing import Callable, List, Tuple
+from sqlalchemy import inspect, select, update, insert, bindparam, text, func, column
+from sqlalchemy.engine import Connection
+
+from app.models import Experiment, Response, ResponseBlob, JobCell
+from app.metrics import METRIC_NAMES
+from app.search import LEGACY_TRIGGERS, create_search_index, rebuild_search_index
+from app.blobs import content_hash, new_blobs
+
+# Rows read and rewritten per backfill round-trip
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _add_missing_columns(conn: Connection, table):
+    """ALTER TABLE ADD COLUMN for every model column the database lacks"""
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    for column in table.columns:
+        if column.name not in existing:
+            ddl = f"{column.name} {column.type.compile(dialect=conn.dialect)}"
+            if column.server_default is not None:
+                # SQLite only accepts NOT NULL on an added column with a default
+                if not column.nullable:
+                    ddl += " NOT NULL"
+                ddl += f" DEFAULT {column.server_default.arg}"
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+
+def _create_missing_indexes(conn: Connection, table):
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def _typed_metric_columns(conn: Connection):
+    """Move metrics out of the JSON blob into typed, indexed columns"""
+    responses = Response.__table__
+    _add_missing_columns(conn, responses)
+    _create_missing_indexes(conn, responses)
+    _create_missing_indexes(conn, Experiment.__table__)
+
+    move = (
+        update(responses)
+        .where(responses.c.id == bindparam("row_id"))
+        .values({name: bindparam(name) for name in METRIC_NAMES + ["metrics"]})
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(responses.c.id, responses.c.metrics)
+            .where(responses.c.id > last_id, responses.c.metrics.isnot(None))
+            .order_by(responses.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        params = [
+            {"row_id": row.id, **Response.metric_values(row.metrics)}
+            for row in rows
+            if any(name in (row.metrics or {}) for name in METRIC_NAMES)
+        ]
+        if params:
+            conn.execute(move, params)
+        last_id = rows[-1].id
+
+
+def _experiment_response_count(conn: Connection):
+    """Add the denormalized response counter and fill it from the responses table"""
+    experiments = Experiment.__table__
+    responses = Response.__table__
+    _add_missing_columns(conn, experiments)
+    conn.execute(
+        update(experiments).values(
+            response_count=select(func.count(responses.c.id))
+            .where(responses.c.experiment_id == experiments.c.id)
+            .scalar_subquery()
+        )
+    )
+
+
+def _full_text_search(conn: Connection):
+    """FTS5 index over prompts and response content (SQLite only; filled by migration 6)"""
+    if conn.dialect.name == "sqlite":
+        create_search_index(conn)
+
+
+def _streaming_latency_columns(conn: Connection):
+    """Time to first token and decode rate of streamed responses"""
+    _add_missing_columns(conn, Response.__table__)
+
+
+def _content_addressed_storage(conn: Connection):
+    """Move response text into compressed blobs shared by identical responses"""
+    responses = Response.__table__
+    existing = {column["name"] for column in inspect(conn).get_columns(responses.name)}
+    _add_missing_columns(conn, responses)
+    _create_missing_indexes(conn, responses)
+    if "content" not in existing:
+        return
+
+    link = (
+        update(responses)
+        .where(responses.c.id == bindparam("row_id"))
+        .values(content_hash=bindparam("hash"))
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(responses.c.id, column("content"), responses.c.metrics, *(responses.c[name] for name in METRIC_NAMES))
+            .select_from(responses)
+            .where(responses.c.id > last_id)
+            .order_by(responses.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        contents = [
+            (
+                row.content,
+                {**{name: row._mapping[name] for name in METRIC_NAMES}, **(row.metrics or {})}
+                if row.coherence_score is not None else None
+            )
+            for row in rows
+        ]
+        stored = set(conn.execute(
+            select(ResponseBlob.hash)
+            .where(ResponseBlob.hash.in_({content_hash(content) for content, _ in contents}))
+        ).scalars())
+        hashes, blobs = new_blobs(contents, stored)
+        if blobs:
+            conn.execute(insert(ResponseBlob), blobs)
+        conn.execute(link, [{"row_id": row.id, "hash": digest} for row, digest in zip(rows, hashes)])
+        last_id = rows[-1].id
+
+    if conn.dialect.name == "sqlite":
+        # Triggers that read the old column; migration 6 rebuilds the index
+        for trigger in LEGACY_TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    conn.execute(text(f"ALTER TABLE {responses.name} DROP COLUMN content"))
+
+
+def _blob_search_index(conn: Connection):
+    """Index each distinct response text once, keyed by its blob (SQLite only)"""
+    blobs = ResponseBlob.__table__
+    _add_missing_columns(conn, blobs)
+    _create_missing_indexes(conn, blobs)
+    if conn.dialect.name == "sqlite":
+        rebuild_search_index(conn)
+
+
+def _job_cell_leases(conn: Connection):
+    """Lease expiry of running job cells, so other processes can tell live claims from abandoned ones"""
+    _add_missing_columns(conn, JobCell.__table__)
+
+
+# (version, migration) in the order they were introduced
+MIGRATIONS: List[Tuple[int, Callable[[Connection], None]]] = [
+    (1, _typed_metric_columns),
+    (2, _experiment_response_count),
+    (3, _full_text_search),
+    (4, _streaming_latency_columns),
+    (5, _content_addressed_storage),
+    (6, _blob_search_index),
+    (7, _job_cell_leases),
+]
+
+
+def run_migrations(conn: Connection):
+    """Apply every migration newer than the recorded schema version"""
+    conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    current = conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+    for version, migration in MIGRATIONS:
+        if version > current:
+            migration(conn)
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (:version)"), {"version": version})
@@ -0,0 +1,307 @@
+"""
+Offline provider backends: seeded synthetic responses with configurable
+latency and error rates, and record/replay of real provider responses
+"""
+
+import os
+import re
+import json
+import math
+import random
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, Union, Any
+from dotenv import load_dotenv
+
+from app.resilience import ProviderError
+
+load_dotenv()
+
+# Building blocks for synthetic responses. Each list is ordered from the
+# most to the least common choice; low temperature / top_p draws from a
+# short prefix, which lowers lexical diversity the way real sampling does.
+SUBJECTS = [
+    "this approach", "the main idea", "the underlying process", "each component",
+    "a careful design", "the overall result", "this principle", "the key factor",
+    "a consistent routine", "the broader system", "a practical example", "the core mechanism",
+]
+VERBS = [
+    "improves", "supports", "shapes", "explains", "reduces", "strengthens",
+    "clarifies", "connects", "balances", "influences", "accelerates", "reframes",
+]
+OBJECTS = [
+    "long-term outcomes", "everyday decisions", "the quality of results",
+    "overall efficiency", "how people learn", "measurable progress",
+    "the way teams work", "practical trade-offs", "the core problem",
+    "future planning", "shared understanding", "unexpected edge cases",
+]
+QUALIFIERS = [
+    "in most situations", "over time", "when applied consistently", "in practice",
+    "with the right context", "for beginners and experts alike",
+    "under real constraints", "at a surprisingly low cost",
+]
+TRANSITIONS = [
+    "However", "Therefore", "Furthermore", "Additionally", "For example",
+    "Moreover", "As a result", "In addition", "Consequently", "Similarly",
+    "On the other hand", "Specifically",
+]
+CONCLUSIONS = ["In conclusion", "In summary", "To summarize", "Finally"]
+
+# Structure -> relative frequency
+STRUCTURES = {
+    "paragraphs": 4,
+    "bullets": 2,
+    "numbered": 2,
+    "single": 2,
+    "short": 1,
+}
+
+# Streamed mock responses: one chunk per word with its leading whitespace, the
+# share of the latency spent before the first chunk, and the most sleeps per stream
+STREAM_CHUNK_PATTERN = re.compile(r'\s*\S+\s*$|\s*\S+')
+STREAM_TTFT_FRACTION = 0.3
+STREAM_MAX_PAUSES = 20
+
+# Distinct (model, prompt, parameters) inputs whose call counts are kept.
+# The least recently requested is forgotten first; requesting it again
+# starts its sequence over.
+MOCK_MAX_SEQUENCES = int(os.getenv("MOCK_MAX_SEQUENCES", "10000"))
+
+STOP_WORDS = {
+    "about", "after", "their", "there", "these", "those", "which", "would",
+    "could", "should", "explain", "describe", "write", "what", "with", "from",
+    "that", "this", "your", "into", "simple", "terms",
+}
+
+
+def _pick(rng: random.Random, options: List[str], breadth: float) -> str:
+    """Choose from the first `breadth` fraction of options"""
+    return options[rng.randrange(max(1, math.ceil(len(options) * breadth)))]
+
+
+def _topics(prompt: str) -> List[str]:
+    words = [word.strip(".,!?;:\"'()").lower() for word in prompt.split()]
+    topics = [word for word in words if len(word) > 3 and word not in STOP_WORDS]
+    return list(dict.fromkeys(topics))[:6] or ["the topic"]
+
+
+def _sentence(rng: random.Random, topics: List[str], breadth: float, transition_rate: float) -> str:
+    subject = rng.choice(topics) if rng.random() < 0.4 else _pick(rng, SUBJECTS, breadth)
+    words = [subject, _pick(rng, VERBS, breadth), _pick(rng, OBJECTS, breadth)]
+    if rng.random() < 0.6:
+        words.append(_pick(rng, QUALIFIERS, breadth))
+    text = " ".join(words)
+    if rng.random() < transition_rate:
+        return f"{_pick(rng, TRANSITIONS, breadth)}, {text}."
+    return text[0].upper() + text[1:] + "."
+
+
+def synthesize(prompt: str, temperature: float, top_p: float, rng: random.Random) -> str:
+    """
+    Synthetic response in one of several structures. Length spread and
+    vocabulary breadth grow with temperature and top_p, so metric scores
+    vary across a parameter grid.
+    """
+    topics = _topics(prompt)
+    breadth = min(1.0, 0.35 + 0.4 * temperature) * max(0.3, top_p)
+    transition_rate = 0.45 - 0.15 * min(temperature, 2.0) / 2.0
+    target_words = int(min(700, max(12, rng.lognormvariate(math.log(150), 0.3 + 0.35 * temperature))))
+    sentence_count = max(1, target_words // 9)
+    structure = rng.choices(list(STRUCTURES), weights=list(STRUCTURES.values()))[0]
+
+    def sentences(count: int) -> List[str]:
+        return [_sentence(rng, topics, breadth, transition_rate) for _ in range(count)]
+
+    def conclusion() -> str:
+        return f"{rng.choice(CONCLUSIONS)}, {_sentence(rng, topics, breadth, 0.0)[0].lower()}" \
+            f"{_sentence(rng, topics, breadth, 0.0)[1:]}"
+
+    if structure == "short":
+        text = " ".join(sentences(rng.randint(1, 3)))
+    elif structure == "single":
+        text = " ".join(sentences(sentence_count))
+    elif structure in ("bullets", "numbered"):
+        items = sentences(max(3, sentence_count - 2))
+        marker = (lambda i: f"{i}.") if structure == "numbered" else (lambda i: "-")
+        header = f"Key points about {topics[0]}:"
+        lines = [f"{marker(i)} {item}" for i, item in enumerate(items, 1)]
+        text = "\n\n".join([" ".join(sentences(1)), header + "\n" + "\n".join(lines), conclusion()])
+    else:
+        body = sentences(sentence_count)
+        paragraph_count = min(len(body), rng.randint(2, 5))
+        size = math.ceil(len(body) / paragraph_count)
+        paragraphs = [" ".join(body[i:i + size]) for i in range(0, len(body), size)]
+        text = "\n\n".join(paragraphs + [conclusion()])
+
+    # Hot sampling occasionally runs into the token limit mid-sentence
+    if rng.random() < 0.05 * temperature:
+        text = text[:max(20, int(len(text) * rng.uniform(0.6, 0.95)))].rstrip(" .")
+    return text
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latency distribution in seconds from a spec in milliseconds:
+    "fixed:MS", "uniform:MIN_MS:MAX_MS" or "lognormal:MEDIAN_MS:SIGMA"
+    """
+    kind, *args = spec.split(":")
+    values = [float(arg) for arg in args]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1]) / 1000
+    raise ValueError(f"Invalid latency spec '{spec}'")
+
+
+class MockProvider:
+    """
+    Synthetic provider for offline runs and load tests.
+
+    Every call draws its response, latency and failure from an RNG seeded by
+    the call's inputs and how many times those inputs were requested, so runs
+    with the same seed produce the same sequence regardless of scheduling.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        max_sequences: int = MOCK_MAX_SEQUENCES
+    ):
+        self.seed = seed
+        self.latency_spec = latency
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.max_sequences = max_sequences
+        self._counts: "OrderedDict[str, int]" = OrderedDict()
+        self.calls = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "MockProvider":
+        return cls(
+            seed=int(os.getenv("MOCK_SEED", "0")),
+            latency=os.getenv("MOCK_LATENCY", "fixed:0"),
+            error_rate=float(os.getenv("MOCK_ERROR_RATE", "0"))
+        )
+
+    def _rng(self, prompt: str, model: str, temperature: float, top_p: float) -> random.Random:
+        digest = hashlib.sha256(json.dumps([prompt, model, temperature, top_p]).encode("utf-8")).hexdigest()
+        index = self._counts.pop(digest, 0)
+        self._counts[digest] = index + 1
+        if len(self._counts) > self.max_sequences:
+            self._counts.popitem(last=False)
+        return random.Random(f"{self.seed}:{digest}:{index}")
+
+    def _draw(self, prompt: str, model: str, temperature: float, top_p: float) -> Tuple[float, bool, str]:
+        """Latency, whether the call fails, and the response text for one call"""
+        self.calls += 1
+        rng = self._rng(prompt, model, temperature, top_p)
+        delay = self.latency(rng)
+        failed = rng.random() < self.error_rate
+        return delay, failed, synthesize(prompt, temperature, top_p, rng)
+
+    def _fail(self):
+        self.errors += 1
+        raise ProviderError("Mock provider error (injected)", retryable=True)
+
+    async def generate(self, prompt: str, model: str, temperature: float, top_p: float) -> str:
+        delay, failed, text = self._draw(prompt, model, temperature, top_p)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if failed:
+            self._fail()
+        return text
+
+    async def stream(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        top_p: float
+    ) -> AsyncIterator[Union[str, int]]:
+        """
+        Stream the same response generate() would return, one word per
+        chunk, then the chunk count as the completion token count. The
+        first chunk arrives after STREAM_TTFT_FRACTION of the drawn latency
+        and the rest of it is spread over the remaining chunks.
+        """
+        delay, failed, text = self._draw(prompt, model, temperature, top_p)
+        chunks = STREAM_CHUNK_PATTERN.findall(text)
+        if delay > 0:
+            await asyncio.sleep(delay * STREAM_TTFT_FRACTION)
+        pauses = min(len(chunks), STREAM_MAX_PAUSES)
+        for index, chunk in enumerate(chunks):
+            if failed and index == len(chunks) // 2:
+                self._fail()
+            if delay > 0 and index and index % max(len(chunks) // pauses, 1) == 0:
+                await asyncio.sleep(delay * (1 - STREAM_TTFT_FRACTION) / pauses)
+            yield chunk
+        if failed:
+            self._fail()
+        yield len(chunks)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "seed": self.seed,
+            "latency": self.latency_spec,
+            "error_rate": self.error_rate,
+            "sequences": len(self._counts),
+        }
+
+
+class ReplayStore:
+    """
+    Provider responses recorded to a JSON lines file. Responses recorded for
+    the same key are served back in recorded order, cycling when exhausted.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._responses: Dict[str, List[str]] = {}
+        self._next: Dict[str, int] = {}
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._responses.setdefault(entry["key"], []).append(entry["content"])
+
+    def _append(self, line: str):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    async def record(self, key: str, content: str, **details: Any):
+        """Append a response; details (prompt, model, parameters) are kept for readability"""
+        self._responses.setdefault(key, []).append(content)
+        line = json.dumps({"key": key, **details, "content": content}, ensure_ascii=False) + "\n"
+        await asyncio.to_thread(self._append, line)
+        self.recorded += 1
+
+    def replay(self, key: str) -> Optional[str]:
+        responses = self._responses.get(key)
+        if not responses:
+            self.misses += 1
+            return None
+        index = self._next.get(key, 0)
+        self._next[key] = index + 1
+        self.replayed += 1
+        return responses[index % len(responses)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "keys": len(self._responses),
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+        }
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Dict, Any, Optional
 from app.database import Base
+from app.metrics import METRIC_NAMES
 
 
 class Experiment(Base):
@@ -10,7 +12,9 @@ class Experiment(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     prompt = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # Denormalized count of responses, maintained on insert and delete
+    response_count = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relationships
     responses = relationship("Response", back_populates="experiment", cascade="all, delete-orphan")
@@ -28,13 +32,116 @@ class Response(Base):
     top_p = Column(Float, nullable=False)
     model = Column(String, default="gpt-3.5-turbo")
     
-    # Response data
-    content = Column(Text, nullable=False)
+    # Response text, stored once per distinct content in response_blobs
+    content_hash = Column(String(64), ForeignKey("response_blobs.hash"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    # Quality metrics (stored as JSON for flexibility)
-    metrics = Column(JSON, nullable=True)
+    # Quality metrics, one typed column per ResponseMetrics metric
+    coherence_score = Column(Float, nullable=True)
+    lexical_diversity = Column(Float, nullable=True)
+    completeness_score = Column(Float, nullable=True)
+    structure_score = Column(Float, nullable=True)
+    readability_score = Column(Float, nullable=True)
+    length_appropriateness = Column(Float, nullable=True)
+    overall_score = Column(Float, nullable=True)
+    
+    # Extension metrics without their own column (stored as JSON for flexibility)
+    metrics = Column(JSON(none_as_null=True), nullable=True)
+    
+    # Latency of streamed generations: time to first token and decode rate
+    ttft_ms = Column(Float, nullable=True)
+    tokens_per_second = Column(Float, nullable=True)
     
     # Relationships
     experiment = relationship("Experiment", back_populates="responses")
+    
+    __table_args__ = (
+        Index("ix_responses_experiment_params", "experiment_id", "temperature", "top_p"),
+    )
+    
+    @staticmethod
+    def metric_values(metrics: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Split a metrics dict into typed column values and the JSON extras"""
+        metrics = metrics or {}
+        values = {name: metrics.get(name) for name in METRIC_NAMES}
+        extras = {k: v for k, v in metrics.items() if k not in values}
+        values["metrics"] = extras or None
+        return values
+    
+    @property
+    def metrics_dict(self) -> Optional[Dict[str, Any]]:
+        """All metrics for this response, typed columns merged with extras"""
+        if self.coherence_score is None and not self.metrics:
+            return None
+        return {
+            **{name: getattr(self, name) for name in METRIC_NAMES},
+            **(self.metrics or {})
+        }
+
 
+class ResponseBlob(Base):
+    """Model for compressed response text, keyed by the SHA-256 of the text"""
+    __tablename__ = "response_blobs"
+
+    hash = Column(String(64), primary_key=True)
+    # zlib-compressed UTF-8 text and its uncompressed size in bytes
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)
+    # Scores of the text, shared by every response with this content
+    metrics = Column(JSON(none_as_null=True), nullable=True)
+    # Row of the text in the full-text index; None until indexed
+    search_id = Column(Integer, nullable=True, unique=True, index=True)
+
+
+class Job(Base):
+    """Model for a background parameter sweep over one or more prompts"""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # queued, running, completed or cancelled
+    status = Column(String(20), nullable=False, default="queued")
+    # Generation settings shared by every cell (model, cache_stochastic)
+    params = Column(JSON, nullable=False)
+    
+    # Progress counters, updated as cells finish
+    total_cells = Column(Integer, nullable=False, default=0)
+    completed_cells = Column(Integer, nullable=False, default=0)
+    failed_cells = Column(Integer, nullable=False, default=0)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    cells = relationship("JobCell", back_populates="job", cascade="all, delete-orphan")
+
+
+class JobCell(Base):
+    """Model for one (prompt, temperature, top_p) call of a job; the queue itself"""
+    __tablename__ = "job_cells"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False)
+    # The experiment the cell's prompt and response belong to
+    experiment_id = Column(Integer, ForeignKey("experiments.id"), nullable=False)
+    temperature = Column(Float, nullable=False)
+    top_p = Column(Float, nullable=False)
+    
+    # pending, running, done, failed or cancelled
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    claimed_at = Column(DateTime, nullable=True)
+    # A running cell belongs to the worker that claimed it until this time;
+    # the worker extends it while the cell runs
+    lease_expires_at = Column(DateTime, nullable=True)
+    response_id = Column(Integer, ForeignKey("responses.id"), nullable=True)
+    error = Column(Text, nullable=True)
+    
+    # Relationships
+    job = relationship("Job", back_populates="cells")
+    
+    __table_args__ = (
+        # Workers claim the oldest pending cell; progress is read per job
+        Index("ix_job_cells_status_id", "status", "id"),
+        Index("ix_job_cells_job_status", "job_id", "status"),
+    )
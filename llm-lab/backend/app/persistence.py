@@ -0,0 +1,168 @@
+"""
+Persistence of generated experiments, inline or through a write-behind queue
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+
+from app.database import write_session
+from app.models import Experiment, Response
+from app.blobs import store_contents
+from app.search import index_contents
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+# A generated experiment waiting to be written: (prompt, created_at, response rows)
+ExperimentRecord = Tuple[str, datetime, List[Dict[str, Any]]]
+
+
+async def insert_experiment(
+    session: AsyncSession,
+    prompt: str,
+    created_at: datetime,
+    responses: List[Dict[str, Any]]
+) -> Tuple[int, List[int]]:
+    """
+    Insert one experiment and all of its responses with a single executemany,
+    storing each response's content as a blob and indexing texts not seen
+    before. Returns the experiment id and the response ids in input order.
+    The caller owns the transaction.
+    """
+    result = await session.execute(
+        insert(Experiment)
+        .values(prompt=prompt, created_at=created_at, response_count=len(responses))
+        .returning(Experiment.id)
+    )
+    experiment_id = result.scalar_one()
+
+    if not responses:
+        return experiment_id, []
+
+    hashes = await store_contents(session, [(row["content"], row.get("metrics")) for row in responses])
+    result = await session.execute(
+        insert(Response).returning(Response.id, sort_by_parameter_order=True),
+        [
+            {
+                **{k: v for k, v in row.items() if k not in ("content", "metrics")},
+                **Response.metric_values(row.get("metrics")),
+                "content_hash": content_hash,
+                "experiment_id": experiment_id
+            }
+            for row, content_hash in zip(responses, hashes)
+        ]
+    )
+    response_ids = list(result.scalars())
+    await index_contents(session, (row["content"] for row in responses))
+    return experiment_id, response_ids
+
+
+class WriteBehindQueue:
+    """
+    Background writer for generated experiments.
+
+    Experiments are queued without waiting for the database. A single worker
+    drains the queue and writes everything that has accumulated in one
+    transaction, so bursts of generate calls share commits.
+    """
+
+    def __init__(self, batch_size: int = 64):
+        self.batch_size = batch_size
+        self.written = 0
+        self.failed = 0
+        self._queue: "asyncio.Queue[ExperimentRecord]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write everything still queued, then stop the worker"""
+        if self._worker is None:
+            return
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    def submit(self, record: ExperimentRecord):
+        self._queue.put_nowait(record)
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                async with write_session() as session:
+                    for prompt, created_at, responses in batch:
+                        await insert_experiment(session, prompt, created_at, responses)
+                    await session.commit()
+                self.written += len(batch)
+            except Exception:
+                self.failed += len(batch)
+                logger.exception("Write-behind flush of %d experiments failed", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "failed": self.failed,
+        }
+
+
+class ExperimentStore:
+    """
+    Saves generated experiments. With PERSISTENCE_MODE=write_behind, saves
+    are queued and ids are not known when the generate call returns.
+    """
+
+    def __init__(self, mode: Optional[str] = None):
+        self.mode = (mode or os.getenv("PERSISTENCE_MODE", "sync")).lower()
+        if self.mode not in ("sync", "write_behind"):
+            raise ValueError(f"Unknown persistence mode '{self.mode}'")
+        self.queue = None
+        if self.mode == "write_behind":
+            self.queue = WriteBehindQueue(int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "64")))
+
+    def start(self):
+        if self.queue:
+            self.queue.start()
+
+    async def stop(self):
+        if self.queue:
+            await self.queue.stop()
+
+    async def save(
+        self,
+        prompt: str,
+        created_at: datetime,
+        responses: List[Dict[str, Any]]
+    ) -> Optional[Tuple[int, List[int]]]:
+        """Persist an experiment; returns its ids, or None when deferred"""
+        if self.queue:
+            self.queue.submit((prompt, created_at, responses))
+            return None
+
+        async with write_session() as session:
+            ids = await insert_experiment(session, prompt, created_at, responses)
+            await session.commit()
+        return ids
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, **(self.queue.stats() if self.queue else {})}
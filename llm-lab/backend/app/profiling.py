@@ -0,0 +1,250 @@
+"""
+Opt-in per-request profiling: Server-Timing stage breakdowns and sampled
+stack profiles.
+
+A request is profiled when it carries X-Profile-Token matching
+PROFILING_TOKEN and asks for it with X-Profile (or ?profile=): "1" for
+stage timings, "sample" to also record a stack profile, which is saved
+under PROFILE_DIR and downloadable from /api/profiles/{id}. Without a
+configured token profiling is off, and unprofiled requests pay only a
+context variable lookup per stage.
+
+Saved profiles are pruned on every save: only the newest PROFILE_MAX_FILES
+younger than PROFILE_MAX_AGE seconds are kept, and /api/profiles lists them.
+"""
+
+import os
+import re
+import sys
+import hmac
+import time
+import uuid
+import asyncio
+import threading
+import contextvars
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+# Retention of saved profiles; 0 disables either limit
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+PROFILE_MAX_AGE = float(os.getenv("PROFILE_MAX_AGE", "86400"))
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class RequestProfile:
+    """Time spent per stage of one request, in seconds"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def server_timing(self) -> str:
+        """Server-Timing header value; stages seen more than once report their count"""
+        entries = []
+        for name, seconds in self.stages.items():
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if self.counts[name] > 1:
+                entry += f';desc="{self.counts[name]} calls, cumulative"'
+            entries.append(entry)
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar(
+    "request_profile", default=None
+)
+
+
+class stage:
+    """Context manager adding its block's duration to the current request's profile"""
+
+    __slots__ = ("name", "profile", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.profile = _current.get()
+
+    def __enter__(self):
+        if self.profile is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profile is not None:
+            self.profile.add(self.name, time.perf_counter() - self.started)
+
+
+def record(name: str, seconds: float):
+    """Add a measured duration to the current request's profile, if any"""
+    profile = _current.get()
+    if profile is not None:
+        profile.add(name, seconds)
+
+
+def authorized(token: Optional[str]) -> bool:
+    return bool(PROFILING_TOKEN) and token is not None and hmac.compare_digest(token, PROFILING_TOKEN)
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """Path of a saved stack profile, or None for ids that are not well-formed"""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    return os.path.join(PROFILE_DIR, f"{profile_id}.folded")
+
+
+class StackSampler:
+    """
+    Samples the stacks of all threads at a fixed interval and counts them
+    in folded format ("thread;outer;...;inner count"), which flame graph
+    tools and speedscope read directly. The event loop thread runs every
+    request, so concurrent requests show up in the profile too.
+    """
+
+    # One sampled request at a time keeps the overhead bounded
+    _active = threading.Lock()
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> bool:
+        """Start sampling; False if another request is already being sampled"""
+        if not StackSampler._active.acquire(blocking=False):
+            return False
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        StackSampler._active.release()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.counts[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+def prune_profiles() -> List[Dict[str, Any]]:
+    """
+    Delete saved profiles beyond the retention limits and describe the
+    rest, newest first
+    """
+    try:
+        entries = [
+            entry for entry in os.scandir(PROFILE_DIR)
+            if entry.name.endswith(".folded") and PROFILE_ID_PATTERN.match(entry.name[:-len(".folded")])
+        ]
+    except FileNotFoundError:
+        return []
+
+    profiles = []
+    now = time.time()
+    for entry in entries:
+        try:
+            info = entry.stat()
+        except FileNotFoundError:
+            continue
+        profiles.append((info.st_mtime, info.st_size, entry))
+    profiles.sort(key=lambda profile: profile[0], reverse=True)
+
+    retained = []
+    for index, (modified, size, entry) in enumerate(profiles):
+        expired = PROFILE_MAX_AGE > 0 and now - modified > PROFILE_MAX_AGE
+        if expired or (PROFILE_MAX_FILES > 0 and index >= PROFILE_MAX_FILES):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            continue
+        retained.append({
+            "id": entry.name[:-len(".folded")],
+            "size": size,
+            "created_at": modified,
+        })
+    return retained
+
+
+def _save(profile_id: str, content: str):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(profile_path(profile_id), "w", encoding="utf-8") as f:
+        f.write(content)
+    prune_profiles()
+
+
+class ProfilingMiddleware:
+    """Profiles authorized requests that ask for it and reports the result in headers"""
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _mode(scope) -> Optional[str]:
+        headers = dict(scope["headers"])
+        mode = headers.get(b"x-profile", b"").decode()
+        if not mode:
+            query = scope.get("query_string", b"").decode()
+            match = re.search(r"(?:^|&)profile=([^&]*)", query)
+            mode = match.group(1) if match else ""
+        if mode not in ("1", "true", "sample"):
+            return None
+        token = headers.get(b"x-profile-token")
+        return mode if authorized(token.decode() if token else None) else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILING_TOKEN:
+            await self.app(scope, receive, send)
+            return
+        mode = self._mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        sampler = StackSampler() if mode == "sample" else None
+        profile_id = uuid.uuid4().hex if sampler and sampler.start() else None
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing().encode()))
+                if profile_id:
+                    headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current.set(profile)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if profile_id:
+                sampler.stop()
+                await asyncio.to_thread(_save, profile_id, sampler.folded())
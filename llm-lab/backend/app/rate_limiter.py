@@ -0,0 +1,202 @@
+"""
+Request scheduling for LLM providers: fair queuing, concurrency limits and
+request/token-per-minute rate limiting
+"""
+
+import os
+import time
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Dict, Deque, Hashable, Optional, Any
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Estimate tokens for a call: roughly 4 characters per prompt token plus the completion budget"""
+    return len(prompt) // 4 + 1 + max_tokens
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `per_minute` tokens per minute.
+
+    Waiters are served in FIFO order. A limit of 0 disables the bucket.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        """Wait until `amount` tokens are available and take them"""
+        if self.capacity <= 0:
+            return
+        # A single request larger than the bucket would otherwise never fit
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class FairQueue:
+    """
+    Concurrency limiter that grants slots round-robin across queue keys.
+
+    Each experiment queues under its own key, so a large sweep cannot starve
+    smaller ones submitted after it.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._waiters.values())
+
+    async def acquire(self, key: Hashable):
+        """Wait for a slot for the given queue key"""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                queue = self._waiters.get(key)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._waiters[key]
+            else:
+                # The slot was granted just before cancellation; hand it on
+                self.release()
+            raise
+
+    def release(self):
+        """Release a slot and wake the next waiter in round-robin order"""
+        self.active -= 1
+        while self.active < self.limit and self._waiters:
+            key, queue = self._waiters.popitem(last=False)
+            waiter = queue.popleft()
+            if queue:
+                # Move this key to the back of the rotation
+                self._waiters[key] = queue
+            if waiter.done():
+                # Cancelled while queued
+                continue
+            self.active += 1
+            waiter.set_result(None)
+
+
+class ProviderScheduler:
+    """Admission control for one provider"""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        model_concurrency: Optional[Dict[str, int]] = None
+    ):
+        self.name = name
+        self.queue = FairQueue(max_concurrency)
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.model_limits = model_concurrency or {}
+        self._model_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @classmethod
+    def from_env(cls, name: str) -> "ProviderScheduler":
+        """
+        Build a scheduler from <NAME>_MAX_CONCURRENCY, <NAME>_RPM, <NAME>_TPM
+        and <NAME>_MODEL_CONCURRENCY ("model=limit,model=limit")
+        """
+        prefix = name.upper()
+        model_concurrency = {}
+        for item in os.getenv(f"{prefix}_MODEL_CONCURRENCY", "").split(","):
+            if "=" in item:
+                model, limit = item.split("=", 1)
+                model_concurrency[model.strip()] = int(limit)
+
+        return cls(
+            name,
+            max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", "8")),
+            requests_per_minute=int(os.getenv(f"{prefix}_RPM", "500")),
+            tokens_per_minute=int(os.getenv(f"{prefix}_TPM", "200000")),
+            model_concurrency=model_concurrency
+        )
+
+    def _model_semaphore(self, model: str) -> Optional[asyncio.Semaphore]:
+        limit = self.model_limits.get(model)
+        if not limit:
+            return None
+        if model not in self._model_semaphores:
+            self._model_semaphores[model] = asyncio.Semaphore(limit)
+        return self._model_semaphores[model]
+
+    @asynccontextmanager
+    async def slot(self, model: str, estimated_tokens: int, queue_key: Hashable):
+        """
+        Hold a provider slot for one call. The model limit and the rate limit
+        budget are waited for first, so a throttled model never sits on
+        provider slots that calls to other models could use.
+        """
+        semaphore = self._model_semaphore(model)
+        if semaphore:
+            await semaphore.acquire()
+        try:
+            await self.requests.acquire(1)
+            await self.tokens.acquire(estimated_tokens)
+            await self.queue.acquire(queue_key)
+            try:
+                yield
+            finally:
+                self.queue.release()
+        finally:
+            if semaphore:
+                semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.queue.active,
+            "queued": self.queue.queued,
+            "max_concurrency": self.queue.limit,
+            "requests_per_minute": self.requests.capacity,
+            "tokens_per_minute": self.tokens.capacity,
+        }
+
+
+class RequestScheduler:
+    """Per-provider schedulers, created on first use from the environment"""
+
+    def __init__(self):
+        self._providers: Dict[str, ProviderScheduler] = {}
+
+    def provider(self, name: str) -> ProviderScheduler:
+        if name not in self._providers:
+            self._providers[name] = ProviderScheduler.from_env(name)
+        return self._providers[name]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: scheduler.stats() for name, scheduler in self._providers.items()}
@@ -0,0 +1,281 @@
+"""
+Tail-latency control for provider calls: retries with jitter, hedged
+requests and per-provider circuit breakers
+"""
+
+import os
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+import httpx
+import openai
+import anthropic
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Status codes worth another attempt: timeouts, conflicts, rate limits and
+# upstream failures (529 is Anthropic's "overloaded")
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class ProviderError(Exception):
+    """A failed provider call, flagged with whether another attempt may succeed"""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class CircuitOpenError(ProviderError):
+    """Raised without calling the provider while its circuit is open"""
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, ProviderError):
+        return error.retryable
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError)):
+        return True
+    # Connection errors (including SDK timeouts) carry no status code
+    if isinstance(error, (openai.APIConnectionError, anthropic.APIConnectionError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return status_code in RETRYABLE_STATUS_CODES or (status_code or 0) >= 500
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """Sleep before retry number attempt + 1 (attempt counts from 0)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class LatencyTracker:
+    """Rolling window of successful provider call durations, excluding queueing"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """None until enough calls have been observed"""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[int(fraction * (len(ordered) - 1))]
+
+
+class AttemptClock:
+    """
+    Started by an attempt once it is admitted to call the provider, so time
+    spent waiting for a scheduler slot is left out of the hedge delay and
+    of the latency samples
+    """
+
+    def __init__(self):
+        self.created = time.monotonic()
+        self.started: Optional[float] = None
+        self.admitted = asyncio.Event()
+
+    def start(self):
+        self.started = time.monotonic()
+        self.admitted.set()
+
+    def elapsed(self) -> float:
+        """Seconds since the provider call started (since creation if it never did)"""
+        return time.monotonic() - (self.started if self.started is not None else self.created)
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive upstream failures and fails
+    calls fast for reset_timeout seconds. Then one trial call is let through:
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started: Optional[float] = None
+
+    def before_call(self):
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(
+                    f"{self.name} circuit open after {self.failures} consecutive failures"
+                )
+            self.state = "half_open"
+            self.trial_started = None
+        if self.state == "half_open":
+            # A trial that never reported back (e.g. cancelled) stops
+            # blocking others after reset_timeout
+            if self.trial_started is not None and now - self.trial_started < self.reset_timeout:
+                raise CircuitOpenError(f"{self.name} circuit half-open, trial call in flight")
+            self.trial_started = now
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.trial_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.trial_started = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+class ResilientCaller:
+    """
+    Runs provider attempts with retries, optional hedging and a circuit
+    breaker per provider. Each attempt is supplied by the caller, which owns
+    admission control and the per-call timeout, and starts the AttemptClock
+    it is given when admitted.
+    """
+
+    def __init__(
+        self,
+        retry: RetryPolicy,
+        hedge: bool = False,
+        hedge_percentile: float = 0.95,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        call_timeout: float = 60.0,
+        sweep_timeout: Optional[float] = None
+    ):
+        self.retry = retry
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout
+        self.sweep_timeout = sweep_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[Tuple[str, str], LatencyTracker] = {}
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def from_env(cls) -> "ResilientCaller":
+        sweep_timeout = float(os.getenv("SWEEP_TIMEOUT", "300"))
+        return cls(
+            RetryPolicy(
+                max_attempts=int(os.getenv("RETRY_MAX_ATTEMPTS", "3")),
+                base_delay=float(os.getenv("RETRY_BASE_DELAY", "0.5")),
+                max_delay=float(os.getenv("RETRY_MAX_DELAY", "8"))
+            ),
+            hedge=os.getenv("HEDGE_REQUESTS", "false").lower() == "true",
+            hedge_percentile=float(os.getenv("HEDGE_PERCENTILE", "0.95")),
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30")),
+            call_timeout=float(os.getenv("CALL_TIMEOUT", "60")),
+            sweep_timeout=sweep_timeout if sweep_timeout > 0 else None
+        )
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        if provider not in self._breakers:
+            self._breakers[provider] = CircuitBreaker(
+                provider, self.failure_threshold, self.reset_timeout
+            )
+        return self._breakers[provider]
+
+    def _tracker(self, provider: str, model: str) -> LatencyTracker:
+        key = (provider, model)
+        if key not in self._latency:
+            self._latency[key] = LatencyTracker()
+        return self._latency[key]
+
+    async def call(self, provider: str, model: str, attempt: Callable[[AttemptClock], Awaitable[str]]) -> str:
+        """Run attempt() until it succeeds, fails permanently or retries run out"""
+        breaker = self.breaker(provider)
+        for number in range(self.retry.max_attempts):
+            breaker.before_call()
+            try:
+                result = await self._hedged(self._tracker(provider, model), attempt)
+            except Exception as e:
+                if not is_retryable(e):
+                    # The upstream answered; the request itself was bad
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if number == self.retry.max_attempts - 1:
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self.retry.delay(number))
+            else:
+                breaker.record_success()
+                return result
+
+    async def _hedged(self, tracker: LatencyTracker, attempt: Callable[[AttemptClock], Awaitable[str]]) -> str:
+        """
+        Run one attempt. With hedging on, a duplicate is started once the
+        attempt's provider call outlives the observed percentile and the
+        first success wins. Queueing for a slot counts towards neither.
+        """
+        hedge_after = tracker.percentile(self.hedge_percentile) if self.hedge else None
+        clock = AttemptClock()
+        if hedge_after is None:
+            result = await attempt(clock)
+            tracker.record(clock.elapsed())
+            return result
+
+        primary = asyncio.ensure_future(attempt(clock))
+        admitted = asyncio.ensure_future(clock.admitted.wait())
+        hedge = None
+        try:
+            await asyncio.wait({primary, admitted}, return_when=asyncio.FIRST_COMPLETED)
+            if not primary.done():
+                await asyncio.wait({primary}, timeout=hedge_after)
+            if primary.done():
+                result = primary.result()
+                tracker.record(clock.elapsed())
+                return result
+
+            self.hedges += 1
+            hedge_clock = AttemptClock()
+            hedge = asyncio.ensure_future(attempt(hedge_clock))
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        tracker.record((hedge_clock if task is hedge else clock).elapsed())
+                        return task.result()
+            # Both failed; report the hedge's error, the most recent one
+            return hedge.result()
+        finally:
+            admitted.cancel()
+            primary.cancel()
+            if hedge:
+                hedge.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "circuits": {name: breaker.stats() for name, breaker in self._breakers.items()},
+        }
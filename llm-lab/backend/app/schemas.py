@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Annotated
 from datetime import datetime
 
 
@@ -9,6 +9,20 @@ class GenerateRequest(BaseModel):
     model: str = Field(default="gpt-3.5-turbo")
     temperature_range: List[float] = Field(default=[0.3, 0.7, 1.0])
     top_p_range: List[float] = Field(default=[0.9, 0.95, 1.0])
+    # Temperature 0 calls are always cached; opt in to caching the rest
+    cache_stochastic: bool = Field(default=False)
+    # Deadline for the whole sweep in seconds; defaults to SWEEP_TIMEOUT
+    timeout: Optional[float] = Field(default=None, gt=0, le=3600)
+    # Samples per parameter combination, for measuring variance
+    repetitions: int = Field(default=1, ge=1, le=20)
+    # Stream tokens from the provider, scoring as they arrive and recording
+    # time to first token and tokens/sec per response
+    stream_tokens: bool = Field(default=False)
+    # "grid" calls every combination; "adaptive" spends `budget` provider
+    # calls on the best-scoring region of the grid
+    search: str = Field(default="grid", pattern="^(grid|adaptive)$")
+    # Provider calls for an adaptive search; defaults to a quarter of the grid
+    budget: Optional[int] = Field(default=None, ge=1, le=2000)
     
     class Config:
         json_schema_extra = {
@@ -40,18 +54,63 @@ class ResponseData(BaseModel):
     model: str
     content: str
     metrics: Optional[ResponseMetrics] = None
+    cached: bool = False
+    # Set for responses generated with stream_tokens
+    ttft_ms: Optional[float] = None
+    tokens_per_second: Optional[float] = None
     created_at: datetime
     
     class Config:
         from_attributes = True
 
 
+class MetricSummary(BaseModel):
+    """Mean and sample standard deviation of one metric"""
+    mean: float
+    std: float
+
+
+class CellStats(BaseModel):
+    """Metric statistics over the repeated samples of one parameter combination"""
+    temperature: float
+    top_p: float
+    samples: int
+    metrics: Dict[str, MetricSummary]
+
+
+class ExploredPoint(BaseModel):
+    """One combination evaluated by an adaptive search"""
+    temperature: float
+    top_p: float
+    # Mean over the combination's samples; None if they all failed
+    overall_score: Optional[float] = None
+    round: int
+
+
+class SearchSummary(BaseModel):
+    """Outcome of an adaptive parameter search"""
+    strategy: str
+    budget: int
+    calls: int
+    grid_cells: int
+    rounds: int
+    best_temperature: Optional[float] = None
+    best_top_p: Optional[float] = None
+    best_overall_score: Optional[float] = None
+    # In evaluation order
+    points: List[ExploredPoint]
+
+
 class ExperimentResponse(BaseModel):
     """Response model for experiment data"""
     id: int
     prompt: str
     created_at: datetime
     responses: List[ResponseData]
+    # Present when some combination has more than one sample
+    cell_stats: Optional[List[CellStats]] = None
+    # Present for adaptive searches
+    search: Optional[SearchSummary] = None
     
     class Config:
         from_attributes = True
@@ -68,8 +127,73 @@ class ExperimentListItem(BaseModel):
         from_attributes = True
 
 
+class ExperimentPage(BaseModel):
+    """One page of the experiment list, newest first"""
+    items: List[ExperimentListItem]
+    # Opaque cursor for the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+
+class SearchResult(BaseModel):
+    """A response matching a full-text search"""
+    response_id: int
+    experiment_id: int
+    prompt: str
+    model: str
+    temperature: float
+    top_p: float
+    overall_score: Optional[float] = None
+    # Best matching fragment with matches wrapped in <mark></mark>
+    snippet: str
+    # bm25 rank; lower is a better match
+    rank: float
+
+
+class ParameterStats(BaseModel):
+    """Aggregated quality for one temperature/top_p combination"""
+    temperature: float
+    top_p: float
+    response_count: int
+    avg_overall_score: Optional[float] = None
+    max_overall_score: Optional[float] = None
+    # Over streamed responses only
+    avg_ttft_ms: Optional[float] = None
+    avg_tokens_per_second: Optional[float] = None
+
+
+class JobRequest(BaseModel):
+    """Request model for a background sweep over one or more prompts"""
+    prompts: List[Annotated[str, Field(min_length=1, max_length=5000)]] = Field(..., min_length=1, max_length=1000)
+    model: str = Field(default="gpt-3.5-turbo")
+    temperature_range: List[float] = Field(default=[0.3, 0.7, 1.0], min_length=1)
+    top_p_range: List[float] = Field(default=[0.9, 0.95, 1.0], min_length=1)
+    cache_stochastic: bool = Field(default=False)
+
+
+class JobStatus(BaseModel):
+    """Progress of a background job"""
+    id: int
+    status: str
+    model: Optional[str] = None
+    total_cells: int
+    completed_cells: int
+    failed_cells: int
+    pending_cells: int
+    running_cells: int
+    cancelled_cells: int
+    # Fraction of the cells still to be run that finished, completed or
+    # failed; cancelled cells are left out
+    progress: float
+    # One experiment per prompt, in prompt order
+    experiment_ids: List[int]
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
 class ExportRequest(BaseModel):
     """Request model for exporting experiment data"""
     experiment_ids: List[int]
-    format: str = Field(default="json", pattern="^(json|csv)$")
+    format: str = Field(default="json", pattern="^(json|csv|ndjson)$")
+    gzip: bool = Field(default=False)
 
@@ -0,0 +1,101 @@
+"""
+Executor for running response metric scoring off the event loop
+"""
+
+import os
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Dict, Any, Optional
+from dotenv import load_dotenv
+
+from app.metrics import ResponseMetrics
+from app.instrumentation import SCORING_SECONDS
+
+load_dotenv()
+
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+
+def _score_chunk(texts: List[str]) -> List[Dict[str, Any]]:
+    """Score one chunk of texts (module-level so process pools can pickle it)"""
+    return ResponseMetrics.calculate_batch(texts)
+
+
+class MetricsExecutor:
+    """
+    Runs ResponseMetrics scoring inline, on a thread pool or on a process pool.
+
+    Work is split into chunks that are scored with calculate_batch. The pool is
+    created on first use and released by shutdown(), which the app calls from
+    its lifespan handler.
+
+    Configured with METRICS_EXECUTOR (inline | thread | process),
+    METRICS_WORKERS and METRICS_CHUNK_SIZE.
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None
+    ):
+        self.mode = (mode or os.getenv("METRICS_EXECUTOR", "thread")).lower()
+        if self.mode not in EXECUTOR_MODES:
+            raise ValueError(
+                f"Unknown metrics executor mode '{self.mode}', expected one of {EXECUTOR_MODES}"
+            )
+
+        workers = max_workers or int(os.getenv("METRICS_WORKERS", "0"))
+        self.max_workers = workers or min(4, os.cpu_count() or 1)
+        self.chunk_size = max(chunk_size or int(os.getenv("METRICS_CHUNK_SIZE", "8")), 1)
+        self._pool: Optional[Executor] = None
+
+    def _get_pool(self) -> Executor:
+        """Create the worker pool on first use"""
+        if self._pool is None:
+            if self.mode == "process":
+                # Spawn avoids forking a process that is running an event loop
+                # and provider client threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="metrics"
+                )
+        return self._pool
+
+    async def score(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Calculate all metrics plus overall_score for each text"""
+        if not texts:
+            return []
+        started = time.perf_counter()
+        results = await self._score(texts)
+        SCORING_SECONDS.observe(
+            (time.perf_counter() - started) / len(texts), count=len(texts), executor=self.mode
+        )
+        return results
+
+    async def _score(self, texts: List[str]) -> List[Dict[str, Any]]:
+        if self.mode == "inline":
+            return ResponseMetrics.calculate_batch(texts)
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+
+        results = await asyncio.gather(
+            *(loop.run_in_executor(pool, _score_chunk, chunk) for chunk in chunks)
+        )
+        return [metrics for chunk_metrics in results for metrics in chunk_metrics]
+
+    def shutdown(self):
+        """Shut down the worker pool, if one was created"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
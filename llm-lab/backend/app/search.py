@@ -0,0 +1,278 @@
+"""
+Full-text search over prompts and response content with SQLite FTS5
+"""
+
+import json
+import asyncio
+import sqlite3
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from sqlalchemy import text, select, update, bindparam
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import IS_SQLITE
+from app.models import ResponseBlob
+from app.blobs import content_hash, decompress
+
+# Response text is indexed once per distinct text, keyed by the blob's
+# search_id. The table is contentless: the text itself only lives in the
+# compressed blob, and snippets are built from the decompressed text.
+SEARCH_TABLE = "response_search"
+
+# Prompts are indexed from experiments.prompt as an external-content table,
+# kept in sync by triggers
+PROMPT_SEARCH_TABLE = "experiment_search"
+
+TOKENIZER = "porter unicode61"
+
+# Weights of bm25 ranks: prompt matches rank above content matches
+PROMPT_WEIGHT = 2.0
+CONTENT_WEIGHT = 1.0
+
+SNIPPET_OPEN = "<mark>"
+SNIPPET_CLOSE = "</mark>"
+SNIPPET_TOKENS = 16
+
+# Rows read and indexed per round-trip when rebuilding
+REINDEX_BATCH_SIZE = 1000
+
+SEARCH_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE}
+    USING fts5(content, content='', tokenize='{TOKENIZER}')
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {PROMPT_SEARCH_TABLE}
+    USING fts5(prompt, content='experiments', content_rowid='id', tokenize='{TOKENIZER}')
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {PROMPT_SEARCH_TABLE}_insert AFTER INSERT ON experiments BEGIN
+        INSERT INTO {PROMPT_SEARCH_TABLE} (rowid, prompt) VALUES (new.id, new.prompt);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {PROMPT_SEARCH_TABLE}_delete AFTER DELETE ON experiments BEGIN
+        INSERT INTO {PROMPT_SEARCH_TABLE} ({PROMPT_SEARCH_TABLE}, rowid, prompt) VALUES ('delete', old.id, old.prompt);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {PROMPT_SEARCH_TABLE}_update AFTER UPDATE OF prompt ON experiments BEGIN
+        INSERT INTO {PROMPT_SEARCH_TABLE} ({PROMPT_SEARCH_TABLE}, rowid, prompt) VALUES ('delete', old.id, old.prompt);
+        INSERT INTO {PROMPT_SEARCH_TABLE} (rowid, prompt) VALUES (new.id, new.prompt);
+    END
+    """,
+]
+
+
+# Triggers of earlier versions, which kept one index row per response
+LEGACY_TRIGGERS = [
+    f"{SEARCH_TABLE}_insert",
+    f"{SEARCH_TABLE}_update",
+    f"{SEARCH_TABLE}_delete",
+    f"{SEARCH_TABLE}_prompt_update",
+]
+
+INDEX_CONTENT = text(f"INSERT INTO {SEARCH_TABLE} (rowid, content) VALUES (:search_id, :content)")
+# Contentless rows are removed by passing the indexed text back
+UNINDEX_CONTENT = text(
+    f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, content) VALUES ('delete', :search_id, :content)"
+)
+
+
+def create_search_index(conn: Connection):
+    """Create the FTS5 tables and the prompt triggers"""
+    for statement in SEARCH_SCHEMA:
+        conn.execute(text(statement))
+
+
+def rebuild_search_index(conn: Connection):
+    """Recreate both indexes and fill them from the blobs and experiments"""
+    for trigger in LEGACY_TRIGGERS:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    for table in (SEARCH_TABLE, PROMPT_SEARCH_TABLE):
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    create_search_index(conn)
+
+    blobs = ResponseBlob.__table__
+    conn.execute(update(blobs).values(search_id=text("rowid")))
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(blobs.c.search_id, blobs.c.data)
+            .where(blobs.c.search_id > last_id)
+            .order_by(blobs.c.search_id)
+            .limit(REINDEX_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(INDEX_CONTENT, [{"search_id": row.search_id, "content": decompress(row.data)} for row in rows])
+        last_id = rows[-1].search_id
+    conn.execute(text(f"INSERT INTO {PROMPT_SEARCH_TABLE} ({PROMPT_SEARCH_TABLE}) VALUES ('rebuild')"))
+
+
+async def index_contents(session: AsyncSession, contents: Iterable[str]):
+    """
+    Index the texts whose blobs are not indexed yet (SQLite only). Runs on
+    the writer after store_contents; the caller owns the transaction.
+    """
+    texts = {content_hash(content): content for content in contents}
+    if not IS_SQLITE or not texts:
+        return
+    result = await session.execute(
+        select(ResponseBlob.hash)
+        .where(ResponseBlob.hash.in_(texts), ResponseBlob.search_id.is_(None))
+        .order_by(ResponseBlob.hash)
+    )
+    unindexed = list(result.scalars())
+    if not unindexed:
+        return
+
+    last_id = await session.scalar(select(ResponseBlob.search_id).order_by(ResponseBlob.search_id.desc()).limit(1))
+    params = [
+        {"row_hash": digest, "search_id": search_id, "content": texts[digest]}
+        for search_id, digest in enumerate(unindexed, (last_id or 0) + 1)
+    ]
+    await session.execute(
+        update(ResponseBlob.__table__)
+        .where(ResponseBlob.__table__.c.hash == bindparam("row_hash"))
+        .values(search_id=bindparam("search_id")),
+        [{"row_hash": param["row_hash"], "search_id": param["search_id"]} for param in params]
+    )
+    await session.execute(INDEX_CONTENT, [{"search_id": param["search_id"], "content": param["content"]} for param in params])
+
+
+async def unindex_blobs(session: AsyncSession, blobs: Iterable[Tuple[Optional[int], bytes]]):
+    """Remove deleted (search_id, data) blobs from the index (SQLite only)"""
+    params = [
+        {"search_id": search_id, "content": decompress(data)}
+        for search_id, data in blobs
+        if search_id is not None
+    ]
+    if IS_SQLITE and params:
+        await session.execute(UNINDEX_CONTENT, params)
+
+
+def match_terms(query: str) -> List[str]:
+    """
+    Turn free text into FTS5 query terms.
+    Terms are quoted so punctuation and FTS operators in user input are taken
+    literally; a trailing * keeps prefix matching.
+    """
+    terms = []
+    for term in query.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*").replace('"', '""')
+        if term:
+            terms.append(f'"{term}"' + ("*" if prefix else ""))
+    return terms
+
+
+def build_snippets(match: str, documents: List[Tuple[str, str]]) -> List[str]:
+    """
+    Highlighted fragments of (prompt, content) pairs. The index keeps no
+    text, so the few result rows are indexed in a throwaway in-memory FTS5
+    table with the same tokenizer, where snippet() picks the best column.
+    """
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute(f"CREATE VIRTUAL TABLE snippets USING fts5(prompt, content, tokenize='{TOKENIZER}')")
+        conn.executemany(
+            "INSERT INTO snippets (rowid, prompt, content) VALUES (?, ?, ?)",
+            [(i, prompt, content) for i, (prompt, content) in enumerate(documents)]
+        )
+        snippets = dict(conn.execute(
+            f"SELECT rowid, snippet(snippets, -1, ?, ?, '...', {SNIPPET_TOKENS}) FROM snippets WHERE snippets MATCH ?",
+            (SNIPPET_OPEN, SNIPPET_CLOSE, match)
+        ))
+    finally:
+        conn.close()
+    return [snippets.get(i, "") for i in range(len(documents))]
+
+
+async def search_responses(
+    session: AsyncSession,
+    query: str,
+    model: Optional[str] = None,
+    min_temperature: Optional[float] = None,
+    max_temperature: Optional[float] = None,
+    min_overall_score: Optional[float] = None,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    Responses matching every term of the query in their prompt or content,
+    best weighted bm25 rank first, with a highlighted snippet. Filters are
+    applied to the responses the matches expand to.
+    """
+    terms = match_terms(query)
+    if not terms:
+        return []
+
+    conditions = []
+    params: Dict[str, Any] = {
+        "terms": json.dumps(terms),
+        "term_count": len(terms),
+        "limit": limit,
+        "content_weight": CONTENT_WEIGHT,
+        "prompt_weight": PROMPT_WEIGHT,
+    }
+    if model:
+        conditions.append("responses.model = :model")
+        params["model"] = model
+    if min_temperature is not None:
+        conditions.append("responses.temperature >= :min_temperature")
+        params["min_temperature"] = min_temperature
+    if max_temperature is not None:
+        conditions.append("responses.temperature <= :max_temperature")
+        params["max_temperature"] = max_temperature
+    if min_overall_score is not None:
+        conditions.append("responses.overall_score >= :min_overall_score")
+        params["min_overall_score"] = min_overall_score
+
+    # Each term is matched on its own so a response matches when every term
+    # occurs in its prompt or its content. A matching text counts for every
+    # response sharing its blob; bm25 is a sum over terms, so the weighted
+    # per-term ranks add up to the response's rank.
+    result = await session.execute(
+        text(f"""
+            WITH terms AS (
+                SELECT key AS term, value AS match FROM json_each(:terms)
+            ),
+            hits AS (
+                SELECT responses.id, terms.term, :content_weight * bm25({SEARCH_TABLE}) AS rank
+                FROM terms
+                JOIN {SEARCH_TABLE} ON {SEARCH_TABLE} MATCH terms.match
+                JOIN response_blobs ON response_blobs.search_id = {SEARCH_TABLE}.rowid
+                JOIN responses ON responses.content_hash = response_blobs.hash
+                UNION ALL
+                SELECT responses.id, terms.term, :prompt_weight * bm25({PROMPT_SEARCH_TABLE})
+                FROM terms
+                JOIN {PROMPT_SEARCH_TABLE} ON {PROMPT_SEARCH_TABLE} MATCH terms.match
+                JOIN responses ON responses.experiment_id = {PROMPT_SEARCH_TABLE}.rowid
+            )
+            SELECT
+                responses.id AS response_id,
+                responses.experiment_id,
+                experiments.prompt,
+                responses.model,
+                responses.temperature,
+                responses.top_p,
+                responses.overall_score,
+                response_blobs.data,
+                SUM(hits.rank) AS rank
+            FROM hits
+            JOIN responses ON responses.id = hits.id
+            JOIN experiments ON experiments.id = responses.experiment_id
+            JOIN response_blobs ON response_blobs.hash = responses.content_hash
+            {"WHERE " + " AND ".join(conditions) if conditions else ""}
+            GROUP BY responses.id
+            HAVING COUNT(DISTINCT hits.term) = :term_count
+            ORDER BY rank
+            LIMIT :limit
+        """),
+        params
+    )
+    rows = [dict(row._mapping) for row in result]
+    snippets = await asyncio.to_thread(
+        build_snippets, " ".join(terms), [(row["prompt"], decompress(row.pop("data"))) for row in rows]
+    )
+    return [{**row, "snippet": snippet} for row, snippet in zip(rows, snippets)]
@@ -0,0 +1,74 @@
+"""
+Single-flight coalescing of identical in-flight calls
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.instrumentation import COALESCED_CALLS
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """One shared in-flight call and the number of callers waiting on it"""
+
+    __slots__ = ("task", "callers", "abandoned")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.callers = 0
+        # Set once the task is cancelled; it stays registered until the
+        # cancellation completes, but must not be joined
+        self.abandoned = False
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key onto one shared task.
+
+    Every caller awaits the same result or exception. A caller that is
+    cancelled stops waiting without affecting the others; the shared task is
+    cancelled only once no callers remain.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """Run factory() for this key, or join the call already in flight"""
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None or flight.abandoned:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.coalesced += 1
+            COALESCED_CALLS.inc()
+
+        flight.callers += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.callers -= 1
+            if flight.callers == 0 and not flight.task.done():
+                # Last interested caller went away
+                flight.abandoned = True
+                flight.task.cancel()
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            # Mark the exception as retrieved even if every caller has left
+            flight.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
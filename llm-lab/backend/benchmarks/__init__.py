@@ -0,0 +1,12 @@
+"""
+Benchmarks for the metrics, the generate pipeline, the storage layer and
+response serialization.
+
+Run from the backend directory:
+
+    python -m benchmarks --output results.json
+    python -m benchmarks metrics --quick --compare results.json
+
+Provider calls go to the mock provider and the database is a temporary
+SQLite file, so results depend only on this code and the machine.
+"""
@@ -0,0 +1,77 @@
+"""
+Command line entry point: python -m benchmarks [suite ...] [options]
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import importlib
+
+SUITES = ["metrics", "generate", "storage", "serialize"]
+
+
+def configure_environment(directory: str, mock_latency: str):
+    """
+    Point the app at a scratch database and the mock provider. Must run
+    before any app module is imported, since they read settings at import.
+    """
+    os.environ.update({
+        "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(directory, 'benchmark.db')}",
+        "PROVIDER_MODE": "mock",
+        "MOCK_LATENCY": mock_latency,
+        "MOCK_ERROR_RATE": "0",
+        # Measure the pipeline, not the rate limiter's or the cache's effect
+        "MOCK_MAX_CONCURRENCY": "1000",
+        "MOCK_RPM": "100000000",
+        "MOCK_TPM": "100000000000",
+        "RESPONSE_CACHE": "off",
+        "PERSISTENCE_MODE": "sync",
+        "JOB_WORKERS": "0",
+    })
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("suites", nargs="*", metavar="suite",
+                        help=f"Suites to run: {', '.join(SUITES)} (default: all)")
+    parser.add_argument("--output", default="benchmark-results.json", help="JSON results file")
+    parser.add_argument("--compare", help="Previous results file to compare median times against")
+    parser.add_argument("--quick", action="store_true", help="Fewer sizes, for smoke runs")
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds spent timing each benchmark")
+    parser.add_argument("--mock-latency", default="fixed:0", help="Mock provider latency spec")
+    args = parser.parse_args()
+    suites = args.suites or SUITES
+    for suite in suites:
+        if suite not in SUITES:
+            parser.error(f"unknown suite '{suite}'")
+
+    with tempfile.TemporaryDirectory(prefix="llm-lab-bench-") as directory:
+        configure_environment(directory, args.mock_latency)
+        from benchmarks.harness import write_results, compare, result_id
+
+        results = []
+        for suite in suites:
+            module = importlib.import_module(f"benchmarks.bench_{suite}")
+            print(f"Running {suite} benchmarks...")
+            for entry in module.run(quick=args.quick, budget=args.budget):
+                print(f"  {result_id(entry)}: median {entry['median_s'] * 1000:.3f} ms")
+                results.append(entry)
+
+        options = {
+            "suites": suites,
+            "quick": args.quick,
+            "budget": args.budget,
+            "mock_latency": args.mock_latency,
+        }
+        write_results(args.output, results, options)
+        print(f"Wrote {len(results)} results to {args.output}")
+
+        if args.compare:
+            for line in compare(args.compare, results):
+                print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
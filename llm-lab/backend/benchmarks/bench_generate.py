@@ -0,0 +1,79 @@
+"""
+End-to-end /api/generate benchmarks against the mock provider: scheduling,
+scoring, persistence and serialization at several grid sizes
+"""
+
+import asyncio
+from typing import Any, Dict, List
+import httpx
+
+from app.main import app
+from app.adaptive import default_budget
+from benchmarks.corpus import PROMPT
+from benchmarks.harness import measure_async, result
+
+SUITE = "generate"
+
+# (temperatures, top_ps) per grid
+GRID_SIZES = [(1, 1), (3, 3), (5, 5), (10, 10)]
+QUICK_GRID_SIZES = [(1, 1), (5, 5)]
+
+# Requests in flight at once for the throughput runs
+CONCURRENCY = 8
+
+# Grids from this size are also searched adaptively with the default budget
+ADAPTIVE_MIN_CELLS = 25
+
+
+def _grid(temperatures: int, top_ps: int) -> Dict[str, Any]:
+    return {
+        "prompt": PROMPT,
+        "model": "mock",
+        "temperature_range": [round(0.1 + 1.8 * i / max(temperatures - 1, 1), 3) for i in range(temperatures)],
+        "top_p_range": [round(0.1 + 0.9 * i / max(top_ps - 1, 1), 3) for i in range(top_ps)],
+    }
+
+
+async def _run(quick: bool, budget: float) -> List[Dict[str, Any]]:
+    results = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+
+            for temperatures, top_ps in QUICK_GRID_SIZES if quick else GRID_SIZES:
+                body = _grid(temperatures, top_ps)
+                cells = temperatures * top_ps
+                params = {"grid": f"{temperatures}x{top_ps}"}
+
+                async def generate():
+                    response = await client.post("/api/generate", json=body)
+                    response.raise_for_status()
+
+                async def generate_concurrently():
+                    await asyncio.gather(*(generate() for _ in range(CONCURRENCY)))
+
+                results.append(result(
+                    SUITE, "generate", params,
+                    await measure_async(generate, items=cells, budget=budget)
+                ))
+                results.append(result(
+                    SUITE, "generate_concurrent", {**params, "concurrency": CONCURRENCY},
+                    await measure_async(generate_concurrently, items=cells * CONCURRENCY, budget=budget)
+                ))
+
+                if cells >= ADAPTIVE_MIN_CELLS:
+                    adaptive_body = {**body, "search": "adaptive"}
+
+                    async def generate_adaptive():
+                        response = await client.post("/api/generate", json=adaptive_body)
+                        response.raise_for_status()
+
+                    results.append(result(
+                        SUITE, "generate_adaptive", {**params, "budget": default_budget(cells)},
+                        await measure_async(generate_adaptive, items=cells, budget=budget)
+                    ))
+    return results
+
+
+def run(quick: bool = False, budget: float = 1.0) -> List[Dict[str, Any]]:
+    return asyncio.run(_run(quick, budget))
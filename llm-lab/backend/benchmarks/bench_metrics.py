@@ -0,0 +1,63 @@
+"""
+Microbenchmarks of each ResponseMetrics method over a range of response sizes
+"""
+
+from typing import Any, Dict, List
+
+from app.metrics import ResponseMetrics
+from benchmarks.corpus import corpus
+from benchmarks.harness import measure, result
+
+SUITE = "metrics"
+
+RESPONSE_WORDS = [50, 200, 1000, 5000]
+QUICK_RESPONSE_WORDS = [50, 1000]
+
+# Methods taking one text; each call analyzes the text from scratch
+SINGLE_TEXT_METHODS = [
+    "analyze",
+    "coherence_score",
+    "lexical_diversity",
+    "completeness_score",
+    "structure_score",
+    "readability_score",
+    "length_appropriateness",
+    "calculate_all_metrics",
+]
+
+# Texts per calculate_batch call, the size of a 5x5 grid
+BATCH_SIZE = 25
+
+
+def run(quick: bool = False, budget: float = 1.0) -> List[Dict[str, Any]]:
+    results = []
+    for words in QUICK_RESPONSE_WORDS if quick else RESPONSE_WORDS:
+        texts = corpus(words, BATCH_SIZE)
+        text = texts[0]
+        params = {"words": words}
+
+        for name in SINGLE_TEXT_METHODS:
+            method = getattr(ResponseMetrics, name)
+            results.append(result(SUITE, name, params, measure(lambda: method(text), budget=budget)))
+
+        results.append(result(
+            SUITE,
+            "calculate_batch",
+            {**params, "batch": BATCH_SIZE},
+            measure(lambda: ResponseMetrics.calculate_batch(texts), items=BATCH_SIZE, budget=budget)
+        ))
+
+        scores = ResponseMetrics.calculate_batch(texts)
+        results.append(result(
+            SUITE,
+            "calculate_overall_score",
+            params,
+            measure(lambda: ResponseMetrics.calculate_overall_score(scores[0]), budget=budget)
+        ))
+        results.append(result(
+            SUITE,
+            "summarize",
+            {**params, "samples": BATCH_SIZE},
+            measure(lambda: ResponseMetrics.summarize(scores), budget=budget)
+        ))
+    return results
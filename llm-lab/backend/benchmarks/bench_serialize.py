@@ -0,0 +1,107 @@
+"""
+Serialization benchmarks for large experiment payloads: a 10x10 grid of
+~1000-token responses, encoded through FastAPI's validating path and
+through the constructed-model path the API uses
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List
+import httpx
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.main import app, _experiment_json
+from app.database import write_session
+from app.metrics import ResponseMetrics
+from app.persistence import insert_experiment
+from app.schemas import ExperimentResponse, ResponseData, ResponseMetrics as ResponseMetricsSchema
+from benchmarks.corpus import PROMPT, corpus
+from benchmarks.harness import measure, measure_async, result
+
+SUITE = "serialize"
+
+# (temperatures, top_ps) per grid; ~750 words is ~1000 tokens
+GRID_SIZES = [(5, 5), (10, 10)]
+QUICK_GRID_SIZES = [(10, 10)]
+RESPONSE_WORDS = 750
+
+
+def _rows(temperatures: int, top_ps: int, created_at: datetime) -> List[Dict[str, Any]]:
+    contents = corpus(RESPONSE_WORDS, temperatures * top_ps)
+    metrics = ResponseMetrics.calculate_batch(contents)
+    return [
+        {
+            "temperature": round(0.1 + 1.8 * (i // top_ps) / max(temperatures - 1, 1), 3),
+            "top_p": round(0.1 + 0.9 * (i % top_ps) / max(top_ps - 1, 1), 3),
+            "model": "mock",
+            "content": content,
+            "metrics": scores,
+            "created_at": created_at,
+        }
+        for i, (content, scores) in enumerate(zip(contents, metrics))
+    ]
+
+
+def _validated(rows: List[Dict[str, Any]], created_at: datetime) -> bytes:
+    """FastAPI's default path: validated models, re-validated against response_model, then encoded"""
+    experiment = ExperimentResponse(
+        id=1,
+        prompt=PROMPT,
+        created_at=created_at,
+        responses=[
+            ResponseData(id=i, **{**row, "metrics": ResponseMetricsSchema(**row["metrics"])})
+            for i, row in enumerate(rows, 1)
+        ]
+    )
+    validated = ExperimentResponse.model_validate(experiment.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def _constructed(rows: List[Dict[str, Any]], created_at: datetime) -> bytes:
+    experiment = ExperimentResponse.model_construct(
+        id=1,
+        prompt=PROMPT,
+        created_at=created_at,
+        responses=[
+            ResponseData.model_construct(id=i, **{**row, "metrics": ResponseMetricsSchema.model_construct(**row["metrics"])})
+            for i, row in enumerate(rows, 1)
+        ]
+    )
+    return _experiment_json(experiment).body
+
+
+async def _run(quick: bool, budget: float) -> List[Dict[str, Any]]:
+    results = []
+    created_at = datetime(2024, 1, 1)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+
+            for temperatures, top_ps in QUICK_GRID_SIZES if quick else GRID_SIZES:
+                cells = temperatures * top_ps
+                params = {"grid": f"{temperatures}x{top_ps}", "words": RESPONSE_WORDS}
+                rows = _rows(temperatures, top_ps, created_at)
+                async with write_session() as session:
+                    experiment_id, _ = await insert_experiment(session, PROMPT, created_at, rows)
+                    await session.commit()
+
+                for path, encode in (("validated", _validated), ("constructed", _constructed)):
+                    results.append(result(
+                        SUITE, "encode", {**params, "path": path},
+                        measure(lambda: encode(rows, created_at), items=cells, budget=budget)
+                    ))
+
+                async def get_experiment():
+                    (await client.get(f"/api/experiments/{experiment_id}")).raise_for_status()
+
+                results.append(result(
+                    SUITE, "get_experiment", params,
+                    await measure_async(get_experiment, items=cells, budget=budget)
+                ))
+    return results
+
+
+def run(quick: bool = False, budget: float = 1.0) -> List[Dict[str, Any]]:
+    return asyncio.run(_run(quick, budget))
@@ -0,0 +1,150 @@
+"""
+Storage benchmarks: inserting, listing and exporting experiments as the
+responses table grows from thousands to millions of rows
+"""
+
+import time
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+import httpx
+from sqlalchemy import text
+
+from app.main import app, _encode_cursor
+from app.database import write_session
+from app.metrics import ResponseMetrics
+from app.persistence import insert_experiment
+from app.search import SEARCH_TABLE
+from benchmarks.corpus import PROMPT, corpus
+from benchmarks.harness import measure_async, result, summarize
+
+SUITE = "storage"
+
+# Stored responses at which list and export are measured; the table is
+# grown from one size to the next
+RESPONSE_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+QUICK_RESPONSE_COUNTS = [1_000, 10_000]
+
+# A 5x5 grid per experiment, and experiments per insert transaction
+RESPONSES_PER_EXPERIMENT = 25
+EXPERIMENTS_PER_BATCH = 40
+
+# Experiments per export request (1,000 rows)
+EXPORT_EXPERIMENTS = 40
+
+
+def _rows(contents: List[str], metrics: List[Dict[str, Any]], created_at: datetime) -> List[Dict[str, Any]]:
+    return [
+        {
+            "temperature": round(0.1 + 0.4 * (i // 5), 2),
+            "top_p": round(0.2 + 0.2 * (i % 5), 2),
+            "model": "mock",
+            "content": contents[i % len(contents)],
+            "metrics": metrics[i % len(metrics)],
+            "created_at": created_at,
+        }
+        for i in range(RESPONSES_PER_EXPERIMENT)
+    ]
+
+
+async def _clear():
+    async with write_session() as session:
+        for table in ("job_cells", "jobs", "responses", "response_blobs", "experiments"):
+            await session.execute(text(f"DELETE FROM {table}"))
+        # The content index is contentless, so rows cannot be deleted by query
+        await session.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('delete-all')"))
+        await session.commit()
+
+
+async def _grow(
+    stored: int,
+    target: int,
+    contents: List[str],
+    metrics: List[Dict[str, Any]],
+    started_at: datetime
+) -> List[float]:
+    """Insert experiments until `target` responses are stored; returns per-batch durations"""
+    samples = []
+    while stored < target:
+        experiments = min(EXPERIMENTS_PER_BATCH, (target - stored) // RESPONSES_PER_EXPERIMENT)
+        started = time.perf_counter()
+        async with write_session() as session:
+            for i in range(experiments):
+                created_at = started_at + timedelta(seconds=stored // RESPONSES_PER_EXPERIMENT + i)
+                await insert_experiment(session, PROMPT, created_at, _rows(contents, metrics, created_at))
+            await session.commit()
+        samples.append(time.perf_counter() - started)
+        stored += experiments * RESPONSES_PER_EXPERIMENT
+    return samples
+
+
+async def _experiment_ids(client: httpx.AsyncClient) -> List[int]:
+    response = await client.get("/api/experiments", params={"limit": EXPORT_EXPERIMENTS})
+    return [experiment["id"] for experiment in response.json()["items"]]
+
+
+async def _run(quick: bool, budget: float) -> List[Dict[str, Any]]:
+    contents = corpus(150, 16)
+    metrics = ResponseMetrics.calculate_batch(contents)
+    started_at = datetime(2024, 1, 1)
+    results = []
+
+    async with app.router.lifespan_context(app):
+        await _clear()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+
+            stored = 0
+            for target in QUICK_RESPONSE_COUNTS if quick else RESPONSE_COUNTS:
+                params = {"responses": target}
+                samples = await _grow(stored, target, contents, metrics, started_at)
+                stored = target
+                results.append(result(
+                    SUITE, "insert", {**params, "batch": EXPERIMENTS_PER_BATCH * RESPONSES_PER_EXPERIMENT},
+                    summarize(samples, EXPERIMENTS_PER_BATCH * RESPONSES_PER_EXPERIMENT)
+                ))
+
+                experiments = target // RESPONSES_PER_EXPERIMENT
+                middle = started_at + timedelta(seconds=experiments // 2)
+                middle_cursor = _encode_cursor(middle, experiments)
+                ids = await _experiment_ids(client)
+
+                async def list_first_page():
+                    (await client.get("/api/experiments")).raise_for_status()
+
+                async def list_middle_page():
+                    (await client.get("/api/experiments", params={"cursor": middle_cursor})).raise_for_status()
+
+                async def get_experiment():
+                    (await client.get(f"/api/experiments/{ids[0]}")).raise_for_status()
+
+                def export(export_format: str, gzip: bool = False):
+                    async def run_export():
+                        response = await client.post(
+                            "/api/export",
+                            json={"experiment_ids": ids, "format": export_format, "gzip": gzip}
+                        )
+                        response.raise_for_status()
+                    return run_export
+
+                results.append(result(SUITE, "list_first_page", params, await measure_async(list_first_page, budget=budget)))
+                results.append(result(SUITE, "list_middle_page", params, await measure_async(list_middle_page, budget=budget)))
+                results.append(result(
+                    SUITE, "get_experiment", params,
+                    await measure_async(get_experiment, items=RESPONSES_PER_EXPERIMENT, budget=budget)
+                ))
+                export_rows = len(ids) * RESPONSES_PER_EXPERIMENT
+                for export_format in ("ndjson", "csv"):
+                    results.append(result(
+                        SUITE, "export", {**params, "format": export_format, "rows": export_rows},
+                        await measure_async(export(export_format), items=export_rows, budget=budget)
+                    ))
+                results.append(result(
+                    SUITE, "export", {**params, "format": "ndjson.gz", "rows": export_rows},
+                    await measure_async(export("ndjson", gzip=True), items=export_rows, budget=budget)
+                ))
+    return results
+
+
+def run(quick: bool = False, budget: float = 1.0) -> List[Dict[str, Any]]:
+    return asyncio.run(_run(quick, budget))
@@ -0,0 +1,27 @@
+"""
+Deterministic response corpus built from the mock provider's synthesizer
+"""
+
+import random
+from typing import List
+
+from app.mock_provider import synthesize
+
+PROMPT = "Explain how photosynthesis works and why it matters for life on Earth"
+
+
+def response_text(words: int, seed: int = 0, temperature: float = 0.7) -> str:
+    """Synthetic response of about `words` words"""
+    rng = random.Random(f"corpus:{words}:{seed}")
+    parts = []
+    count = 0
+    while count < words:
+        part = synthesize(PROMPT, temperature, 1.0, rng)
+        parts.append(part)
+        count += len(part.split())
+    return " ".join(" ".join(parts).split(" ")[:words])
+
+
+def corpus(words: int, size: int) -> List[str]:
+    """`size` distinct responses of about `words` words each"""
+    return [response_text(words, seed) for seed in range(size)]
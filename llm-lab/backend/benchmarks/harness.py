@@ -0,0 +1,135 @@
+"""
+Timing helpers and JSON result files shared by the benchmark suites
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+def summarize(samples: List[float], items: int) -> Dict[str, Any]:
+    """Statistics over per-run durations in seconds; items is work done per run"""
+    ordered = sorted(samples)
+    median = statistics.median(ordered)
+    return {
+        "runs": len(ordered),
+        "min_s": ordered[0],
+        "median_s": median,
+        "mean_s": statistics.fmean(ordered),
+        "p95_s": ordered[int(0.95 * (len(ordered) - 1))],
+        "stdev_s": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "items_per_run": items,
+        "items_per_s": items / median if median > 0 else None,
+    }
+
+
+def _runs_for(seconds: float, min_runs: int, max_runs: int, budget: float) -> int:
+    """Runs that fit in the time budget given one run's duration"""
+    if seconds <= 0:
+        return max_runs
+    return max(min_runs, min(max_runs, int(budget / seconds)))
+
+
+def measure(
+    fn: Callable[[], Any],
+    items: int = 1,
+    min_runs: int = 5,
+    max_runs: int = 1000,
+    budget: float = 1.0
+) -> Dict[str, Any]:
+    """Time fn() after one warm-up call, running it as often as the budget allows"""
+    started = time.perf_counter()
+    fn()
+    runs = _runs_for(time.perf_counter() - started, min_runs, max_runs, budget)
+
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples, items)
+
+
+async def measure_async(
+    fn: Callable[[], Awaitable[Any]],
+    items: int = 1,
+    min_runs: int = 5,
+    max_runs: int = 1000,
+    budget: float = 1.0
+) -> Dict[str, Any]:
+    """Async counterpart of measure()"""
+    started = time.perf_counter()
+    await fn()
+    runs = _runs_for(time.perf_counter() - started, min_runs, max_runs, budget)
+
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples, items)
+
+
+def result(suite: str, name: str, params: Dict[str, Any], stats: Dict[str, Any]) -> Dict[str, Any]:
+    """One benchmark entry; suite, name and params identify it across runs"""
+    return {"suite": suite, "name": name, "params": params, **stats}
+
+
+def result_id(entry: Dict[str, Any]) -> str:
+    params = ",".join(f"{key}={value}" for key, value in sorted(entry["params"].items()))
+    return f"{entry['suite']}/{entry['name']}[{params}]"
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    """Where and on what the benchmarks ran"""
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(path: str, results: List[Dict[str, Any]], options: Dict[str, Any]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"environment": environment(), "options": options, "results": results},
+            f,
+            indent=2
+        )
+        f.write("\n")
+
+
+def compare(baseline_path: str, results: List[Dict[str, Any]]) -> List[str]:
+    """Lines comparing median times with a previous results file"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {result_id(entry): entry for entry in json.load(f)["results"]}
+
+    lines = []
+    for entry in results:
+        before = baseline.get(result_id(entry))
+        if before is None or not before["median_s"]:
+            continue
+        ratio = entry["median_s"] / before["median_s"]
+        lines.append(
+            f"{result_id(entry)}: {before['median_s'] * 1000:.3f} ms -> "
+            f"{entry['median_s'] * 1000:.3f} ms ({ratio:.2f}x)"
+        )
+    return lines
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Tests that touch the database get a throwaway SQLite file; set before any
+# app module creates its engines
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/llm_lab_test.db")
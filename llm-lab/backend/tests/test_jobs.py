@@ -0,0 +1,71 @@
+"""
+Job progress must reach 1.0 once every cell that was not cancelled finished
+"""
+
+import asyncio
+
+from sqlalchemy import update
+
+from app.database import init_db, close_db, write_session, AsyncSessionLocal
+from app.models import Job, JobCell
+from app.jobs import create_job, cancel_job, job_status
+
+
+async def _finish_cells(job_id: int, count: int):
+    """Mark the job's first `count` cells done, as a worker would"""
+    async with write_session() as session:
+        status = await job_status(session, job_id)
+        first = min(status["experiment_ids"])
+        await session.execute(
+            update(JobCell)
+            .where(JobCell.job_id == job_id, JobCell.experiment_id == first)
+            .values(status="done")
+        )
+        await session.execute(
+            update(Job).where(Job.id == job_id).values(completed_cells=count)
+        )
+        await session.commit()
+
+
+def test_cancelled_cells_are_left_out_of_progress():
+    async def run():
+        await init_db()
+        try:
+            async with write_session() as session:
+                job_id = await create_job(session, ["first", "second"], "gpt-4", [0.0, 1.0], [1.0])
+                await session.commit()
+            await _finish_cells(job_id, 2)
+
+            async with write_session() as session:
+                assert await cancel_job(session, job_id)
+                await session.commit()
+
+            async with AsyncSessionLocal() as session:
+                status = await job_status(session, job_id)
+            assert status["total_cells"] == 4
+            assert status["completed_cells"] == 2
+            assert status["cancelled_cells"] == 2
+            assert status["progress"] == 1.0
+        finally:
+            await close_db()
+
+    asyncio.run(run())
+
+
+def test_job_cancelled_before_any_cell_ran():
+    async def run():
+        await init_db()
+        try:
+            async with write_session() as session:
+                job_id = await create_job(session, ["prompt"], "gpt-4", [0.0, 0.5, 1.0], [1.0])
+                assert await cancel_job(session, job_id)
+                await session.commit()
+
+            async with AsyncSessionLocal() as session:
+                status = await job_status(session, job_id)
+            assert status["cancelled_cells"] == 3
+            assert status["progress"] == 1.0
+        finally:
+            await close_db()
+
+    asyncio.run(run())
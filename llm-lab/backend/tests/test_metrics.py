@@ -0,0 +1,130 @@
+"""
+calculate_batch and MetricsAccumulator must score every text exactly like
+the scalar calculate_all_metrics + calculate_overall_score path
+"""
+
+import random
+from typing import Any, Dict, List
+
+import pytest
+
+from app import metrics as metrics_module
+from app.metrics import ResponseMetrics, MetricsAccumulator, TRANSITION_WORDS, CONCLUSION_INDICATORS
+from benchmarks.corpus import corpus
+
+EDGE_CASES = [
+    "",
+    " ",
+    "\n\n",
+    "...",
+    "?!",
+    "!!! ... ???",
+    "- * #",
+    "Hello",
+    "Hello.",
+    "hello world",
+    "One. Two. Three.",
+    "Café naïve résumé. Über straße! 東京は大きい。 Привет, мир?",
+    "Emoji only 🙂🙃 and more 🚀.",
+    "# Title\n\n- first item\n- second item\n\n1. numbered\n2. list\n\nIn conclusion, done.",
+    "word " * 150,
+    "Repeat this phrase. " * 40,
+    "Trailing whitespace.   \n\n  ",
+    "No final punctuation but several sentences. Here is another one and it goes on",
+]
+
+VOCABULARY = [
+    "the", "model", "response", "quality", "light", "energy", "plants", "water",
+    "is", "are", "was", "very", "quickly", "carefully", "über", "naïve", "東京", "🙂",
+] + sorted(TRANSITION_WORDS) + sorted(CONCLUSION_INDICATORS)
+SEPARATORS = [" ", " ", " ", ", ", ". ", "! ", "? ", "\n", "\n\n", "\n- ", "\n1. ", "; ", "...", "  "]
+
+# ASCII texts take the batch path's byte parser: words around its 8 and 16
+# byte packing limits, and every kind of whitespace str.split() knows
+ASCII_VOCABULARY = [
+    "the", "A", "Model", "x", "42", "3", "snake_case", "__init__", "abcdefgh", "abcdefghi",
+    "abcdefghijklmnop", "abcdefghijklmnopq", "internationalization", "HELLO", "hello",
+] + sorted(TRANSITION_WORDS) + CONCLUSION_INDICATORS
+ASCII_SEPARATORS = SEPARATORS + [
+    "\n\n\n", "\n\n\n\n", "\r\n", "\r\n\r\n", "\t", "\x0b", "\x0c", "\x1c", "\x1f", "\x00",
+    "?!", "\n# ", ":\n", '"', "-", "(", ")",
+]
+
+
+def _random_text(rng: random.Random, vocabulary: List[str] = VOCABULARY, separators: List[str] = SEPARATORS) -> str:
+    parts = []
+    for _ in range(rng.randint(0, 400)):
+        parts.append(rng.choice(vocabulary))
+        parts.append(rng.choice(separators))
+    text = "".join(parts)
+    start = rng.randint(0, len(text)) if rng.random() < 0.3 else 0
+    return text[start:start + rng.randint(0, 4000)]
+
+
+def _texts() -> List[str]:
+    rng = random.Random(2024)
+    return (
+        EDGE_CASES
+        + [_random_text(rng) for _ in range(300)]
+        + [_random_text(rng, ASCII_VOCABULARY, ASCII_SEPARATORS) for _ in range(300)]
+        + corpus(250, 20)
+    )
+
+
+def _scalar(text: str) -> Dict[str, Any]:
+    metrics = ResponseMetrics.calculate_all_metrics(text)
+    metrics["overall_score"] = ResponseMetrics.calculate_overall_score(metrics)
+    return metrics
+
+
+def _streamed(text: str, rng: random.Random) -> Dict[str, Any]:
+    accumulator = MetricsAccumulator()
+    position = 0
+    while position < len(text):
+        size = rng.choice([1, 1, 2, 3, 5, 8, 16, 64])
+        accumulator.feed(text[position:position + size])
+        position += size
+    return accumulator.finish()
+
+
+TEXTS = _texts()
+
+
+def test_batch_matches_scalar():
+    for text, metrics in zip(TEXTS, ResponseMetrics.calculate_batch(TEXTS)):
+        assert metrics == _scalar(text), repr(text[:80])
+
+
+def test_empty_batch():
+    assert ResponseMetrics.calculate_batch([]) == []
+
+
+def test_array_path_on_small_batches(monkeypatch):
+    monkeypatch.setattr(metrics_module, "BATCH_MIN_CHARS", 0)
+    rng = random.Random(7)
+    for text in TEXTS:
+        assert ResponseMetrics.calculate_batch([text]) == [_scalar(text)], repr(text[:80])
+    for _ in range(50):
+        batch = rng.sample(TEXTS, rng.randint(1, 12)) + [""] * rng.randint(0, 2)
+        rng.shuffle(batch)
+        assert ResponseMetrics.calculate_batch(batch) == [_scalar(text) for text in batch]
+
+
+def test_batch_of_analyses_keeps_order():
+    batch = [ResponseMetrics.analyze(text) if index % 3 == 0 else text for index, text in enumerate(TEXTS)]
+    assert ResponseMetrics.calculate_batch(batch) == [_scalar(text) for text in TEXTS]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_accumulator_matches_scalar(seed: int):
+    rng = random.Random(seed)
+    for text in TEXTS:
+        assert _streamed(text, rng) == _scalar(text), repr(text[:80])
+
+
+def test_accumulator_single_chunk():
+    for text in TEXTS:
+        accumulator = MetricsAccumulator()
+        accumulator.feed(text)
+        assert accumulator.finish() == _scalar(text), repr(text[:80])
+        assert accumulator.text == text
@@ -0,0 +1,63 @@
+"""
+ProviderScheduler must only hold a provider slot while a call is admitted,
+not while it waits for its model limit or rate limit budget
+"""
+
+import asyncio
+
+from app.rate_limiter import ProviderScheduler
+
+
+def _scheduler(**limits) -> ProviderScheduler:
+    options = {"max_concurrency": 2, "requests_per_minute": 0, "tokens_per_minute": 0}
+    options.update(limits)
+    return ProviderScheduler("test", **options)
+
+
+async def _hold(scheduler: ProviderScheduler, model: str, release: asyncio.Event, admitted: list, tokens: int = 1):
+    async with scheduler.slot(model, tokens, queue_key=model):
+        admitted.append(model)
+        await release.wait()
+
+
+def test_throttled_model_does_not_block_other_models():
+    async def run():
+        scheduler = _scheduler(model_concurrency={"slow": 1})
+        release = asyncio.Event()
+        admitted = []
+        slow = [asyncio.create_task(_hold(scheduler, "slow", release, admitted)) for _ in range(5)]
+        await asyncio.sleep(0)
+
+        fast = asyncio.create_task(_hold(scheduler, "fast", release, admitted))
+        await asyncio.wait_for(_admitted(admitted, "fast"), timeout=1)
+        assert admitted.count("slow") == 1
+        assert scheduler.queue.active == 2
+
+        release.set()
+        await asyncio.gather(fast, *slow)
+        assert admitted.count("slow") == 5
+        assert scheduler.queue.active == 0
+
+    asyncio.run(run())
+
+
+def test_rate_limited_call_does_not_hold_a_slot():
+    async def run():
+        scheduler = _scheduler(max_concurrency=1, tokens_per_minute=600)
+        release = asyncio.Event()
+        release.set()
+        admitted = []
+        # Drains the bucket; the next call has to wait about a second for tokens
+        await _hold(scheduler, "big", release, admitted, tokens=600)
+        waiting = asyncio.create_task(_hold(scheduler, "big", release, admitted, tokens=10))
+        await asyncio.sleep(0.05)
+        assert admitted == ["big"]
+        assert scheduler.queue.active == 0
+        waiting.cancel()
+
+    asyncio.run(run())
+
+
+async def _admitted(admitted: list, model: str):
+    while model not in admitted:
+        await asyncio.sleep(0.01)
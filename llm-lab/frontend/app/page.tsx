@@ -1,8 +1,8 @@
 'use client';
 
 import { useState } from 'react';
-import { useMutation, useQuery } from '@tanstack/react-query';
-import { generateResponses, getExperiments, type GenerateRequest, type ExperimentResponse } from '@/lib/api';
+import { useInfiniteQuery, useMutation } from '@tanstack/react-query';
+import { generateResponses, generateResponsesStream, getExperiments, type GenerateRequest, type ExperimentResponse } from '@/lib/api';
 import ExperimentForm from '@/components/ExperimentForm';
 import ResultsDisplay from '@/components/ResultsDisplay';
 import ExperimentHistory from '@/components/ExperimentHistory';
@@ -12,19 +12,48 @@ export default function Home() {
   const [currentExperiment, setCurrentExperiment] = useState<ExperimentResponse | null>(null);
 
   const generateMutation = useMutation({
-    mutationFn: generateResponses,
-    onSuccess: (data) => {
-      setCurrentExperiment(data);
+    mutationFn: async (request: GenerateRequest) => {
+      // Adaptive searches choose combinations from earlier scores, so they
+      // come back as one experiment
+      if (request.search === 'adaptive') {
+        setCurrentExperiment(await generateResponses(request));
+        return;
+      }
+      // Render each response as soon as it arrives
+      const summary = await generateResponsesStream(request, (response) => {
+        setCurrentExperiment((prev) =>
+          prev ? { ...prev, responses: [...prev.responses, response] } : prev
+        );
+      });
+      setCurrentExperiment((prev) =>
+        prev
+          ? { ...prev, id: summary.id, created_at: summary.created_at, cell_stats: summary.cell_stats }
+          : prev
+      );
     },
   });
 
-  const { data: experiments, refetch: refetchExperiments } = useQuery({
+  const {
+    data: experimentPages,
+    refetch: refetchExperiments,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
     queryKey: ['experiments'],
-    queryFn: getExperiments,
+    queryFn: ({ pageParam }) => getExperiments(pageParam),
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
   });
+  const experiments = experimentPages?.pages.flatMap((page) => page.items);
 
   const handleGenerate = async (request: GenerateRequest) => {
-    setCurrentExperiment(null);
+    setCurrentExperiment({
+      id: 0,
+      prompt: request.prompt,
+      created_at: new Date().toISOString(),
+      responses: [],
+    });
     await generateMutation.mutateAsync(request);
     refetchExperiments();
   };
@@ -111,7 +140,7 @@ export default function Home() {
               </div>
             )}
 
-            {currentExperiment && (
+            {currentExperiment && currentExperiment.responses.length > 0 && (
               <ResultsDisplay experiment={currentExperiment} />
             )}
           </div>
@@ -124,6 +153,9 @@ export default function Home() {
                 setActiveTab('new');
               }}
               onRefresh={refetchExperiments}
+              hasMore={hasNextPage}
+              isLoadingMore={isFetchingNextPage}
+              onLoadMore={fetchNextPage}
             />
           </div>
         )}
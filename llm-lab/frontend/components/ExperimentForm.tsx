@@ -13,6 +13,10 @@ export default function ExperimentForm({ onSubmit, isLoading }: ExperimentFormPr
   const [model, setModel] = useState('gpt-3.5-turbo');
   const [temperatureValues, setTemperatureValues] = useState('0.3, 0.7, 1.0');
   const [topPValues, setTopPValues] = useState('0.9, 1.0');
+  const [repetitions, setRepetitions] = useState(1);
+  const [streamTokens, setStreamTokens] = useState(false);
+  const [adaptiveSearch, setAdaptiveSearch] = useState(false);
+  const [budget, setBudget] = useState('');
   const [showAdvanced, setShowAdvanced] = useState(false);
 
   const handleSubmit = async (e: React.FormEvent) => {
@@ -39,6 +43,10 @@ export default function ExperimentForm({ onSubmit, isLoading }: ExperimentFormPr
       model,
       temperature_range,
       top_p_range,
+      repetitions,
+      stream_tokens: streamTokens,
+      search: adaptiveSearch ? 'adaptive' : 'grid',
+      budget: adaptiveSearch && parseInt(budget) > 0 ? parseInt(budget) : undefined,
     });
   };
 
@@ -210,6 +218,77 @@ export default function ExperimentForm({ onSubmit, isLoading }: ExperimentFormPr
                     Controls diversity (0.0 - 1.0)
                   </p>
                 </div>
+
+                {/* Repetitions */}
+                <div className="space-y-4">
+                  <label htmlFor="repetitions" className="block text-lg font-bold text-gray-800 flex items-center space-x-2">
+                    <div className="w-2 h-2 rounded-full bg-gradient-to-r from-violet-500 to-indigo-500"></div>
+                    <span>Repetitions</span>
+                  </label>
+                  <input
+                    id="repetitions"
+                    type="number"
+                    min={1}
+                    max={20}
+                    value={repetitions}
+                    onChange={(e) => setRepetitions(Math.min(20, Math.max(1, parseInt(e.target.value) || 1)))}
+                    className="w-full px-5 py-4 text-lg border-2 border-violet-200 rounded-xl focus:ring-4 focus:ring-violet-200 focus:border-violet-400 transition-all shadow-sm hover:shadow-md bg-white"
+                    disabled={isLoading}
+                  />
+                  <p className="text-sm text-gray-600 font-medium">
+                    Samples per combination, for mean and spread (1 - 20)
+                  </p>
+                </div>
+
+                {/* Token Streaming */}
+                <div className="space-y-4">
+                  <label htmlFor="streamTokens" className="block text-lg font-bold text-gray-800 flex items-center space-x-2">
+                    <div className="w-2 h-2 rounded-full bg-gradient-to-r from-sky-500 to-cyan-500"></div>
+                    <span>Stream Tokens</span>
+                  </label>
+                  <input
+                    id="streamTokens"
+                    type="checkbox"
+                    checked={streamTokens}
+                    onChange={(e) => setStreamTokens(e.target.checked)}
+                    className="w-6 h-6 accent-sky-500 cursor-pointer"
+                    disabled={isLoading}
+                  />
+                  <p className="text-sm text-gray-600 font-medium">
+                    Measure time to first token and tokens/sec per response
+                  </p>
+                </div>
+
+                {/* Adaptive Search */}
+                <div className="space-y-4">
+                  <label htmlFor="adaptiveSearch" className="block text-lg font-bold text-gray-800 flex items-center space-x-2">
+                    <div className="w-2 h-2 rounded-full bg-gradient-to-r from-amber-500 to-yellow-500"></div>
+                    <span>Adaptive Search</span>
+                  </label>
+                  <div className="flex items-center gap-4">
+                    <input
+                      id="adaptiveSearch"
+                      type="checkbox"
+                      checked={adaptiveSearch}
+                      onChange={(e) => setAdaptiveSearch(e.target.checked)}
+                      className="w-6 h-6 accent-amber-500 cursor-pointer"
+                      disabled={isLoading}
+                    />
+                    <input
+                      id="budget"
+                      type="number"
+                      min={1}
+                      value={budget}
+                      onChange={(e) => setBudget(e.target.value)}
+                      placeholder="Budget (default: 1/4 of grid)"
+                      className="w-full px-5 py-4 text-lg border-2 border-amber-200 rounded-xl focus:ring-4 focus:ring-amber-200 focus:border-amber-400 transition-all shadow-sm hover:shadow-md bg-white"
+                      disabled={isLoading || !adaptiveSearch}
+                    />
+                  </div>
+                  <p className="text-sm text-gray-600 font-medium">
+                    Spend a call budget on the best-scoring region instead of every combination
+                  </p>
+                </div>
               </div>
             </div>
           </div>
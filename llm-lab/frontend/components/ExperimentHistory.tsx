@@ -1,20 +1,54 @@
 'use client';
 
-import { useMutation, useQueryClient } from '@tanstack/react-query';
-import { deleteExperiment, getExperiment, type ExperimentListItem, type ExperimentResponse } from '@/lib/api';
+import { Fragment, useState, type FormEvent } from 'react';
+import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
+import {
+  deleteExperiment,
+  getExperiment,
+  searchResponses,
+  type ExperimentListItem,
+  type ExperimentResponse,
+} from '@/lib/api';
 
 interface ExperimentHistoryProps {
   experiments: ExperimentListItem[];
   onExperimentSelect: (experiment: ExperimentResponse) => void;
   onRefresh: () => void;
+  hasMore?: boolean;
+  isLoadingMore?: boolean;
+  onLoadMore?: () => void;
 }
 
 export default function ExperimentHistory({
   experiments,
   onExperimentSelect,
   onRefresh,
+  hasMore = false,
+  isLoadingMore = false,
+  onLoadMore,
 }: ExperimentHistoryProps) {
   const queryClient = useQueryClient();
+  const [searchInput, setSearchInput] = useState('');
+  const [searchTerm, setSearchTerm] = useState('');
+
+  const { data: searchResults, isFetching: isSearching } = useQuery({
+    queryKey: ['search', searchTerm],
+    queryFn: () => searchResponses({ q: searchTerm }),
+    enabled: searchTerm.length > 0,
+  });
+
+  const handleSearch = (e: FormEvent) => {
+    e.preventDefault();
+    setSearchTerm(searchInput.trim());
+  };
+
+  // Snippets wrap matches in <mark></mark>; render them without injecting HTML
+  const renderSnippet = (snippet: string) =>
+    snippet.split(/<mark>|<\/mark>/).map((part, index) => (
+      <Fragment key={index}>
+        {index % 2 === 1 ? <mark className="bg-yellow-200 rounded px-0.5">{part}</mark> : part}
+      </Fragment>
+    ));
 
   const deleteMutation = useMutation({
     mutationFn: deleteExperiment,
@@ -66,7 +100,7 @@ export default function ExperimentHistory({
         <div>
           <h2 className="text-3xl font-bold gradient-text mb-2">Experiment History</h2>
           <p className="text-sm text-purple-700 font-medium">
-            {experiments.length} experiments saved
+            {experiments.length}{hasMore ? '+' : ''} experiments saved
           </p>
         </div>
         <button
@@ -77,6 +111,71 @@ export default function ExperimentHistory({
         </button>
       </div>
 
+      {/* Search */}
+      <form onSubmit={handleSearch} className="glass p-6 rounded-2xl shadow-lg flex items-center gap-3">
+        <input
+          type="search"
+          value={searchInput}
+          onChange={(e) => setSearchInput(e.target.value)}
+          placeholder="Search prompts and responses"
+          className="flex-1 px-5 py-3 border-2 border-indigo-200 rounded-xl focus:ring-4 focus:ring-indigo-200 focus:border-indigo-400 transition-all shadow-sm bg-white"
+        />
+        <button
+          type="submit"
+          className="px-6 py-3 btn-gradient text-white rounded-xl font-semibold shadow-lg hover:shadow-xl transition-all"
+        >
+          Search
+        </button>
+        {searchTerm && (
+          <button
+            type="button"
+            onClick={() => {
+              setSearchInput('');
+              setSearchTerm('');
+            }}
+            className="px-5 py-3 bg-slate-100 text-slate-700 rounded-xl font-semibold hover:bg-slate-200 transition-all"
+          >
+            Clear
+          </button>
+        )}
+      </form>
+
+      {searchTerm && (
+        <div className="grid gap-4">
+          {isSearching && <p className="text-sm text-slate-600 font-medium">Searching...</p>}
+          {!isSearching && searchResults?.length === 0 && (
+            <p className="text-sm text-slate-600 font-medium">No matches for &quot;{searchTerm}&quot;</p>
+          )}
+          {searchResults?.map((result) => (
+            <div key={result.response_id} className="glass p-6 rounded-2xl shadow-lg">
+              <div className="flex items-start justify-between gap-4">
+                <div className="flex-1 min-w-0">
+                  <div className="flex items-center gap-3 mb-2">
+                    <span className="font-bold text-indigo-700">#{result.experiment_id}</span>
+                    <h3 className="text-lg font-bold text-gray-800 truncate flex-1">{result.prompt}</h3>
+                  </div>
+                  <p className="text-sm text-gray-700 mb-3">{renderSnippet(result.snippet)}</p>
+                  <div className="flex items-center gap-3 text-xs font-semibold text-slate-600">
+                    <span>{result.model}</span>
+                    <span>T={result.temperature}</span>
+                    <span>P={result.top_p}</span>
+                    {result.overall_score !== null && (
+                      <span>Score {(result.overall_score * 100).toFixed(1)}%</span>
+                    )}
+                  </div>
+                </div>
+                <button
+                  onClick={() => handleView(result.experiment_id)}
+                  className="px-5 py-3 btn-gradient text-white rounded-xl font-semibold shadow-lg hover:shadow-xl transition-all flex-shrink-0"
+                >
+                  View
+                </button>
+              </div>
+            </div>
+          ))}
+        </div>
+      )}
+
       {/* Experiments List */}
       <div className="grid gap-4">
         {experiments.map((experiment, index) => (
@@ -128,6 +227,18 @@ export default function ExperimentHistory({
           </div>
         ))}
       </div>
+
+      {hasMore && onLoadMore && (
+        <div className="flex justify-center">
+          <button
+            onClick={() => onLoadMore()}
+            disabled={isLoadingMore}
+            className="px-6 py-3 btn-gradient text-white rounded-xl font-semibold shadow-lg hover:shadow-xl transition-all disabled:opacity-50"
+          >
+            {isLoadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
\ No newline at end of file
@@ -103,6 +103,14 @@ export default function ResultsDisplay({ experiment }: ResultsDisplayProps) {
               Top P: <span className="font-bold">{bestResponse.top_p}</span> • 
               Quality Score: <span className="font-bold">{bestResponse.metrics?.overall_score?.toFixed(3)}</span>
             </p>
+            {experiment.search && (
+              <p className="text-sm text-yellow-100 font-medium mt-1">
+                Adaptive search: {experiment.search.points.length} of {experiment.search.grid_cells} combinations
+                in {experiment.search.rounds} rounds ({experiment.search.calls} calls) • 
+                Best mean score: <span className="font-bold">{experiment.search.best_overall_score?.toFixed(3)}</span> at
+                T {experiment.search.best_temperature}, P {experiment.search.best_top_p}
+              </p>
+            )}
           </div>
         </div>
       </div>
@@ -137,6 +145,41 @@ export default function ResultsDisplay({ experiment }: ResultsDisplayProps) {
         </ResponsiveContainer>
       </div>
 
+      {/* Variance across repetitions */}
+      {experiment.cell_stats && experiment.cell_stats.length > 0 && (
+        <div className="glass p-6 rounded-2xl shadow-xl">
+          <h3 className="text-xl font-bold mb-4 text-gray-800">Variance Across Repetitions</h3>
+          <div className="overflow-x-auto">
+            <table className="w-full text-sm">
+              <thead>
+                <tr className="text-left text-gray-600">
+                  <th className="py-2 pr-4">Temperature</th>
+                  <th className="py-2 pr-4">Top P</th>
+                  <th className="py-2 pr-4">Samples</th>
+                  <th className="py-2 pr-4">Overall (mean ± std)</th>
+                  <th className="py-2 pr-4">Coherence (mean ± std)</th>
+                </tr>
+              </thead>
+              <tbody>
+                {experiment.cell_stats.map((cell) => (
+                  <tr key={`${cell.temperature}-${cell.top_p}`} className="border-t border-purple-100">
+                    <td className="py-2 pr-4 font-semibold text-purple-700">{cell.temperature}</td>
+                    <td className="py-2 pr-4 font-semibold text-pink-700">{cell.top_p}</td>
+                    <td className="py-2 pr-4">{cell.samples}</td>
+                    <td className="py-2 pr-4">
+                      {cell.metrics.overall_score?.mean.toFixed(3)} ± {cell.metrics.overall_score?.std.toFixed(3)}
+                    </td>
+                    <td className="py-2 pr-4">
+                      {cell.metrics.coherence_score?.mean.toFixed(3)} ± {cell.metrics.coherence_score?.std.toFixed(3)}
+                    </td>
+                  </tr>
+                ))}
+              </tbody>
+            </table>
+          </div>
+        </div>
+      )}
+
       {/* Response Selector */}
       <div className="glass p-6 rounded-2xl shadow-xl">
         <h3 className="text-xl font-bold mb-4 text-gray-800">Select Response to Analyze</h3>
@@ -237,6 +280,16 @@ export default function ResultsDisplay({ experiment }: ResultsDisplayProps) {
           <span className="bg-pink-100 px-3 py-1.5 rounded-full">
             Character count: {selectedResponse.content.length}
           </span>
+          {selectedResponse.ttft_ms != null && (
+            <span className="bg-purple-100 px-3 py-1.5 rounded-full">
+              First token: {selectedResponse.ttft_ms} ms
+            </span>
+          )}
+          {selectedResponse.tokens_per_second != null && (
+            <span className="bg-pink-100 px-3 py-1.5 rounded-full">
+              {selectedResponse.tokens_per_second} tokens/sec
+            </span>
+          )}
         </div>
       </div>
     </div>
@@ -15,6 +15,12 @@ export interface GenerateRequest {
   model: string;
   temperature_range: number[];
   top_p_range: number[];
+  cache_stochastic?: boolean;
+  timeout?: number;
+  repetitions?: number;
+  stream_tokens?: boolean;
+  search?: 'grid' | 'adaptive';
+  budget?: number;
 }
 
 export interface ResponseMetrics {
@@ -34,14 +40,50 @@ export interface ResponseData {
   model: string;
   content: string;
   metrics: ResponseMetrics | null;
+  cached?: boolean;
+  ttft_ms?: number | null;
+  tokens_per_second?: number | null;
   created_at: string;
 }
 
+export interface MetricSummary {
+  mean: number;
+  std: number;
+}
+
+export interface CellStats {
+  temperature: number;
+  top_p: number;
+  samples: number;
+  metrics: Record<string, MetricSummary>;
+}
+
+export interface ExploredPoint {
+  temperature: number;
+  top_p: number;
+  overall_score: number | null;
+  round: number;
+}
+
+export interface SearchSummary {
+  strategy: string;
+  budget: number;
+  calls: number;
+  grid_cells: number;
+  rounds: number;
+  best_temperature: number | null;
+  best_top_p: number | null;
+  best_overall_score: number | null;
+  points: ExploredPoint[];
+}
+
 export interface ExperimentResponse {
   id: number;
   prompt: string;
   created_at: string;
   responses: ResponseData[];
+  cell_stats?: CellStats[] | null;
+  search?: SearchSummary | null;
 }
 
 export interface ExperimentListItem {
@@ -51,13 +93,103 @@ export interface ExperimentListItem {
   response_count: number;
 }
 
+export interface ExperimentPage {
+  items: ExperimentListItem[];
+  next_cursor: string | null;
+}
+
 export const generateResponses = async (request: GenerateRequest): Promise<ExperimentResponse> => {
   const response = await api.post('/api/generate', request);
   return response.data;
 };
 
-export const getExperiments = async (): Promise<ExperimentListItem[]> => {
-  const response = await api.get('/api/experiments');
+export interface GenerateStreamSummary {
+  id: number;
+  prompt: string;
+  created_at: string;
+  response_count: number;
+  cache_hits: number;
+  best_response_id: number | null;
+  cell_stats: CellStats[] | null;
+  elapsed_ms: number;
+}
+
+// Streams responses as each parameter combination completes, calling
+// onResult for every response and resolving with the final summary.
+export const generateResponsesStream = async (
+  request: GenerateRequest,
+  onResult: (response: ResponseData) => void
+): Promise<GenerateStreamSummary> => {
+  const response = await fetch(new URL('api/generate/stream?format=ndjson', API_BASE_URL), {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(request),
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Request failed with status code ${response.status}`);
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  let summary: GenerateStreamSummary | null = null;
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffer += value;
+    const lines = buffer.split('\n');
+    buffer = lines.pop() ?? '';
+
+    for (const line of lines) {
+      if (!line.trim()) continue;
+      const { event, data } = JSON.parse(line);
+      if (event === 'result') {
+        onResult(data);
+      } else if (event === 'summary') {
+        summary = data;
+      } else if (event === 'error') {
+        throw new Error(data.detail);
+      }
+    }
+  }
+
+  if (!summary) {
+    throw new Error('Stream ended before all responses were received');
+  }
+  return summary;
+};
+
+export const getExperiments = async (cursor?: string): Promise<ExperimentPage> => {
+  const response = await api.get('/api/experiments', {
+    params: cursor ? { cursor } : undefined,
+  });
+  return response.data;
+};
+
+export interface SearchParams {
+  q: string;
+  model?: string;
+  min_temperature?: number;
+  max_temperature?: number;
+  min_overall_score?: number;
+  limit?: number;
+}
+
+export interface SearchResult {
+  response_id: number;
+  experiment_id: number;
+  prompt: string;
+  model: string;
+  temperature: number;
+  top_p: number;
+  overall_score: number | null;
+  snippet: string;
+  rank: number;
+}
+
+export const searchResponses = async (params: SearchParams): Promise<SearchResult[]> => {
+  const response = await api.get('/api/search', { params });
   return response.data;
 };
 
@@ -70,11 +202,20 @@ export const deleteExperiment = async (id: number): Promise<void> => {
   await api.delete(`/api/experiments/${id}`);
 };
 
-export const exportExperiments = async (experimentIds: number[], format: 'json' | 'csv') => {
-  const response = await api.post('/api/export', {
-    experiment_ids: experimentIds,
-    format,
-  });
+export const exportExperiments = async (
+  experimentIds: number[],
+  format: 'json' | 'csv' | 'ndjson',
+  gzip = false
+): Promise<Blob> => {
+  const response = await api.post(
+    '/api/export',
+    {
+      experiment_ids: experimentIds,
+      format,
+      gzip,
+    },
+    { responseType: 'blob' }
+  );
   return response.data;
 };
 